@@ -0,0 +1,28 @@
+"""keyset pagination indexes
+
+Revision ID: 7c2e41d9a5b3
+Revises: f1f3bfac2b05
+Create Date: 2026-10-18 09:12:31.214507
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e41d9a5b3'
+down_revision: Union[str, None] = 'f1f3bfac2b05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+    op.create_index('ix_events_created_at_id', 'events', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_created_at_id', table_name='events')
+    op.drop_index('ix_users_created_at_id', table_name='users')
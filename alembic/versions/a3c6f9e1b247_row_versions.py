@@ -0,0 +1,28 @@
+"""row versions for optimistic concurrency
+
+Revision ID: a3c6f9e1b247
+Revises: e5b8a2d4c713
+Create Date: 2026-10-18 17:02:33.185904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c6f9e1b247'
+down_revision: Union[str, None] = 'e5b8a2d4c713'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('events', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('events', 'version')
+    op.drop_column('users', 'version')
@@ -0,0 +1,53 @@
+"""user search and filter indexes
+
+Revision ID: c7e2a9d4f5b8
+Revises: a3c6f9e1b247
+Create Date: 2026-10-18 21:40:12.503318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e2a9d4f5b8'
+down_revision: Union[str, None] = 'a3c6f9e1b247'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = ('email', 'nickname', 'first_name', 'last_name')
+
+
+def upgrade() -> None:
+    for column in SEARCH_COLUMNS:
+        op.create_index(f'ix_users_{column}_lower_pattern', 'users', [sa.text(f'lower({column}) text_pattern_ops')], unique=False)
+    op.create_index('ix_users_role_created_at_id', 'users', ['role', 'created_at', 'id'], unique=False)
+    op.create_index('ix_users_locked_created_at_id', 'users', ['created_at', 'id'], unique=False,
+                    postgresql_where=sa.text('is_locked'))
+    op.create_index('ix_users_unverified_created_at_id', 'users', ['created_at', 'id'], unique=False,
+                    postgresql_where=sa.text('NOT email_verified'))
+    op.create_index('ix_users_professional_created_at_id', 'users', ['created_at', 'id'], unique=False,
+                    postgresql_where=sa.text('is_professional'))
+
+    # Substring search (LIKE '%term%') needs trigram indexes. pg_trgm ships with the
+    # Postgres contrib modules; without them substring search still works, by scanning.
+    # These indexes are not declared on the model, since create_all cannot rely on the
+    # extension.
+    if op.get_bind().execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar():
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for column in SEARCH_COLUMNS:
+            op.create_index(f'ix_users_{column}_lower_trgm', 'users', [sa.text(f'lower({column}) gin_trgm_ops')],
+                            unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    for column in SEARCH_COLUMNS:
+        op.execute(f'DROP INDEX IF EXISTS ix_users_{column}_lower_trgm')
+    op.drop_index('ix_users_professional_created_at_id', table_name='users')
+    op.drop_index('ix_users_unverified_created_at_id', table_name='users')
+    op.drop_index('ix_users_locked_created_at_id', table_name='users')
+    op.drop_index('ix_users_role_created_at_id', table_name='users')
+    for column in SEARCH_COLUMNS:
+        op.drop_index(f'ix_users_{column}_lower_pattern', table_name='users')
@@ -0,0 +1,32 @@
+"""bio full-text search
+
+Revision ID: d2b8f6a1c9e4
+Revises: c7e2a9d4f5b8
+Create Date: 2026-10-18 23:05:47.918264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b8f6a1c9e4'
+down_revision: Union[str, None] = 'c7e2a9d4f5b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A stored generated column: Postgres computes it for existing rows here (rewriting the
+    # table) and on every insert or update of bio afterwards.
+    op.add_column('users', sa.Column('bio_tsv', postgresql.TSVECTOR(),
+                                     sa.Computed("to_tsvector('english', coalesce(bio, ''))", persisted=True), nullable=True))
+    op.create_index('ix_users_bio_tsv', 'users', ['bio_tsv'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_bio_tsv', table_name='users', postgresql_using='gin')
+    op.drop_column('users', 'bio_tsv')
@@ -0,0 +1,28 @@
+"""nickname sequence and users.updated_at index
+
+Revision ID: e5b8a2d4c713
+Revises: d91a7f3c5e20
+Create Date: 2026-10-18 15:21:09.418620
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8a2d4c713'
+down_revision: Union[str, None] = 'd91a7f3c5e20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('nickname_seq')))
+    op.create_index('ix_users_updated_at', 'users', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_updated_at', table_name='users')
+    op.execute(sa.schema.DropSequence(sa.Sequence('nickname_seq')))
@@ -1,18 +1,49 @@
+from builtins import bool, classmethod, float, int, min, range, str
+import asyncio
+import time
+from typing import Dict, Optional
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import declarative_base, sessionmaker
+from app.utils.metrics import LatencyHistogram
 
 Base = declarative_base()
 
+# Pool waits are usually sub-millisecond, so the buckets start lower than the service defaults.
+POOL_WAIT_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000, 30000)
+
 class Database:
     """Handles database connections and sessions."""
     _engine = None
     _session_factory = None
+    _pool_wait = LatencyHistogram(POOL_WAIT_BUCKETS_MS)
+    _pool_timeouts = 0
 
     @classmethod
-    def initialize(cls, database_url: str, echo: bool = False):
-        """Initialize the async engine and sessionmaker."""
+    def initialize(cls, database_url: str, echo: bool = False, pool_size: int = 5, max_overflow: int = 10,
+                   pool_timeout: float = 30, pool_pre_ping: bool = False, pool_recycle: int = -1,
+                   statement_cache_size: Optional[int] = None):
+        """
+        Initialize the async engine and sessionmaker.
+
+        Pool options map directly onto SQLAlchemy's queue pool. statement_cache_size sets the
+        asyncpg prepared statement cache per connection (0 disables it, e.g. behind pgbouncer).
+        """
         if cls._engine is None:  # Ensure engine is created once
-            cls._engine = create_async_engine(database_url, echo=echo, future=True)
+            connect_args = {}
+            if statement_cache_size is not None and database_url.startswith("postgresql+asyncpg"):
+                connect_args["prepared_statement_cache_size"] = statement_cache_size
+            cls._engine = create_async_engine(
+                database_url,
+                echo=echo,
+                future=True,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_timeout=pool_timeout,
+                pool_pre_ping=pool_pre_ping,
+                pool_recycle=pool_recycle,
+                connect_args=connect_args,
+            )
             cls._session_factory = sessionmaker(
                 bind=cls._engine, class_=AsyncSession, expire_on_commit=False, future=True
             )
@@ -23,3 +54,45 @@ class Database:
         if cls._session_factory is None:
             raise ValueError("Database not initialized. Call `initialize()` first.")
         return cls._session_factory
+
+    @classmethod
+    async def checkout(cls, session: AsyncSession, **execution_options):
+        """Bind a pooled connection to the session up front, recording how long the pool made us wait."""
+        started = time.perf_counter()
+        try:
+            await session.connection(execution_options=execution_options or None)
+        except PoolTimeoutError:
+            cls._pool_timeouts += 1
+            raise
+        finally:
+            cls._pool_wait.observe((time.perf_counter() - started) * 1000)
+
+    @classmethod
+    async def warm_up(cls, connections: int):
+        """Open up to `connections` pool connections concurrently so the first requests don't pay for connect."""
+        if cls._engine is None or connections <= 0:
+            return
+        connections = min(connections, cls._engine.pool.size())
+        opened = await asyncio.gather(*(cls._engine.connect().start() for _ in range(connections)))
+        for connection in opened:
+            await connection.close()
+
+    @classmethod
+    def pool_stats(cls) -> Dict[str, object]:
+        """Report pool occupancy and the distribution of checkout wait times."""
+        if cls._engine is None:
+            raise ValueError("Database not initialized. Call `initialize()` first.")
+        pool = cls._engine.pool
+        return {
+            "pool_size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "timeouts": cls._pool_timeouts,
+            "wait_time": cls._pool_wait.snapshot(),
+        }
+
+    @classmethod
+    async def dispose(cls):
+        if cls._engine is not None:
+            await cls._engine.dispose()
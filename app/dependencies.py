@@ -1,4 +1,4 @@
-from builtins import Exception, dict, str
+from builtins import Exception, dict, frozenset, str
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -6,6 +6,7 @@ from app.database import Database
 from app.utils.template_manager import TemplateManager
 from app.services.email_service import EmailService
 from app.services.jwt_service import decode_token
+from app.services.revocation_service import RevocationService
 from settings.config import Settings
 from fastapi import Depends
 
@@ -18,35 +19,72 @@ def get_email_service() -> EmailService:
     return EmailService(template_manager=template_manager)
 
 async def get_db() -> AsyncSession:
-    """Dependency that provides a database session for each request."""
+    """
+    Dependency that provides a database session for each request.
+
+    The session is the request's unit of work: services only flush, and the whole request
+    is committed once after the endpoint returns, or rolled back if it raises. Exceptions
+    are re-raised unchanged, so the application's handlers map them to responses (412 for
+    PreconditionFailed, 503 for PasswordHashingBusy, a detail-free 500 for the rest).
+
+    Routes declare it with Depends(get_db, scope="function"), so the commit runs before the
+    response is sent. With the default request scope FastAPI sends the response first, and
+    a commit that fails would still reach the client as a success.
+    """
     async_session_factory = Database.get_session_factory()
     async with async_session_factory() as session:
+        await Database.checkout(session)
         try:
             yield session
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
-        
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+async def get_read_db() -> AsyncSession:
+    """
+    Dependency that provides a session for read-only endpoints.
+
+    The connection runs in autocommit mode, so each SELECT is its own implicit read-only
+    transaction and the request pays neither the BEGIN nor the COMMIT round-trip.
+    """
+    async_session_factory = Database.get_session_factory()
+    async with async_session_factory() as session:
+        await Database.checkout(session, isolation_level="AUTOCOMMIT")
+        yield session
+
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    """
+    Resolve the bearer token into the request's principal.
+
+    Declared async so FastAPI awaits it on the event loop instead of dispatching it to the
+    threadpool. FastAPI caches dependency results per request, so the token is read and
+    decoded once however many dependencies ask for the current user. Revoked tokens are
+    rejected from the in-memory revocation index, without a database round trip.
+    """
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     payload = decode_token(token)
-    if payload is None:
+    if payload is None or RevocationService.is_revoked(payload):
         raise credentials_exception
     user_id: str = payload.get("sub")
     user_role: str = payload.get("role")
     if user_id is None or user_role is None:
         raise credentials_exception
-    return {"user_id": user_id, "role": user_role}
+    # jti and exp let routes such as logout act on this very token without decoding it again.
+    return {"user_id": user_id, "role": user_role, "jti": payload.get("jti"), "exp": payload.get("exp")}
 
 def require_role(role: str):
-    def role_checker(current_user: dict = Depends(get_current_user)):
-        if current_user["role"] not in role:
+    allowed_roles = frozenset(role)
+
+    async def role_checker(current_user: dict = Depends(get_current_user)):
+        if current_user["role"] not in allowed_roles:
             raise HTTPException(status_code=403, detail="Operation not permitted")
         return current_user
     return role_checker
@@ -1,11 +1,20 @@
-from builtins import Exception
+from builtins import Exception, str
 from fastapi import FastAPI
 from starlette.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware  # Import the CORSMiddleware
 from app.database import Database
 from app.dependencies import get_settings
-from app.routers import user_routes, event_routes
+from app.routers import user_routes, event_routes, metrics_routes
+from app.services.email_filter import EmailFilter
+from app.services.list_cache import ListCache
+from app.services.nickname_service import NicknameService
+from app.services.password_service import PasswordHashingBusy, PasswordService
+from app.services.revocation_service import RevocationService
+from app.services.user_cache import UserCache
 from app.utils.api_description import getDescription
+from app.utils.etag import PreconditionFailed
+from app.utils.link_generation import compile_route_templates
+from app.utils.query_metrics import QueryMetrics, QueryMetricsMiddleware
 app = FastAPI(
     title="User Management",
     description=getDescription(),
@@ -28,10 +37,48 @@ app.add_middleware(
     allow_headers=["*"],  # Allowed HTTP headers
 )
 
+QueryMetrics.install()
+UserCache.install()
+ListCache.install()
+app.add_middleware(QueryMetricsMiddleware)
+
 @app.on_event("startup")
 async def startup_event():
     settings = get_settings()
-    Database.initialize(settings.database_url, settings.debug)
+    Database.initialize(
+        settings.database_url,
+        settings.debug,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_recycle=settings.db_pool_recycle,
+        statement_cache_size=settings.db_statement_cache_size,
+    )
+    await Database.warm_up(settings.db_pool_warmup)
+    await UserCache.start_listener(settings.database_url)
+    await ListCache.start_listener(settings.database_url)
+    await RevocationService.start(settings.database_url)
+    await NicknameService.start()
+    await EmailFilter.start(settings.database_url)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    PasswordService.shutdown()
+    await UserCache.stop_listener()
+    await ListCache.stop_listener()
+    await RevocationService.stop()
+    await NicknameService.stop()
+    await EmailFilter.stop()
+    await Database.dispose()
+
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request, exc):
+    return JSONResponse(status_code=503, content={"message": str(exc)}, headers={"Retry-After": "1"})
+
+@app.exception_handler(PreconditionFailed)
+async def precondition_failed_handler(request, exc):
+    return JSONResponse(status_code=412, content={"detail": str(exc)})
 
 @app.exception_handler(Exception)
 async def exception_handler(request, exc):
@@ -39,5 +86,7 @@ async def exception_handler(request, exc):
 
 app.include_router(user_routes.router)
 app.include_router(event_routes.router)
+app.include_router(metrics_routes.router)
+compile_route_templates(app.routes)
 
 
@@ -3,7 +3,7 @@ from datetime import datetime
 from enum import Enum
 import uuid
 from sqlalchemy import (
-    Column, String, Integer, DateTime, Boolean, func, Enum as SQLAlchemyEnum
+    Column, String, Integer, DateTime, Boolean, Index, func, literal_column, Enum as SQLAlchemyEnum
 )
 from sqlalchemy.dialects.postgresql import UUID, ENUM
 from sqlalchemy.orm import Mapped, mapped_column
@@ -32,6 +32,10 @@ class Event(Base):
     """
     __tablename__ = "events"
     __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Backs keyset pagination ordered by (created_at, id).
+        Index("ix_events_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title: Mapped[str] = Column(String(100), unique=True, nullable=False, index=True)
@@ -40,6 +44,8 @@ class Event(Base):
     enddate: Mapped[datetime] = Column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Bumped by every UPDATE; served as the ETag and checked against If-Match.
+    version: Mapped[int] = Column(Integer, default=0, server_default="0", nullable=False, onupdate=literal_column("version") + 1)
 
     def __repr__(self) -> str:
         """Provides a readable representation of a event object."""
@@ -0,0 +1,39 @@
+from builtins import str
+from datetime import datetime
+import uuid
+from sqlalchemy import Column, DateTime, ForeignKey, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class RefreshToken(Base):
+    """
+    A refresh token issued at login, corresponding to the 'refresh_tokens' table.
+
+    Only an HMAC digest of the token is stored. Every token issued from one login shares a
+    family_id: refreshing marks the presented token used and issues the next one in the
+    family, and presenting a used token again revokes the whole family.
+
+    Attributes:
+        id (UUID): Unique identifier for the token record.
+        user_id (UUID): The user the token was issued to; removed with the user.
+        family_id (UUID): Identifier shared by all rotations of one login.
+        token_hash (str): Hex HMAC-SHA256 digest of the token.
+        expires_at (datetime): When the token stops being accepted.
+        used_at (datetime): When the token was exchanged for its successor.
+        revoked_at (datetime): When the token's family was revoked.
+        created_at (datetime): Timestamp when the token was issued, set by the server.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    family_id: Mapped[uuid.UUID] = Column(UUID(as_uuid=True), nullable=False, index=True)
+    token_hash: Mapped[str] = Column(String(64), unique=True, nullable=False)
+    expires_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=False)
+    used_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=True)
+    revoked_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self) -> str:
+        return f"<RefreshToken {self.id}, User: {self.user_id}>"
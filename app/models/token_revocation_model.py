@@ -0,0 +1,35 @@
+from builtins import int, str
+from datetime import datetime
+import uuid
+from sqlalchemy import BigInteger, Column, DateTime, Identity, Integer, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class TokenRevocation(Base):
+    """
+    A revocation of access tokens, corresponding to the 'token_revocations' table.
+
+    Either every token of a user below `token_version` (user_id and token_version set) or a
+    single token (jti set) is revoked. Rows are only needed until the tokens they revoke
+    have expired, which is recorded in expires_at.
+
+    Attributes:
+        id (int): Sequential identifier.
+        user_id (UUID): User whose older tokens are revoked; kept after the user is deleted.
+        token_version (int): Lowest token version still accepted for the user.
+        jti (str): Identifier of a single revoked token.
+        expires_at (datetime): When every token this row revokes has expired.
+        created_at (datetime): Timestamp of the revocation, set by the server.
+    """
+    __tablename__ = "token_revocations"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    user_id: Mapped[uuid.UUID] = Column(UUID(as_uuid=True), nullable=True)
+    token_version: Mapped[int] = Column(Integer, nullable=True)
+    jti: Mapped[str] = Column(String(64), nullable=True)
+    expires_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=False)
+    created_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    def __repr__(self) -> str:
+        return f"<TokenRevocation {self.id}, User: {self.user_id}, JTI: {self.jti}>"
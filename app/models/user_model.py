@@ -3,12 +3,15 @@ from datetime import datetime
 from enum import Enum
 import uuid
 from sqlalchemy import (
-    Column, String, Integer, DateTime, Boolean, func, Enum as SQLAlchemyEnum
+    Column, Computed, String, Integer, DateTime, Boolean, Index, Sequence, func, literal_column, text, Enum as SQLAlchemyEnum
 )
-from sqlalchemy.dialects.postgresql import UUID, ENUM
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID, ENUM
 from sqlalchemy.orm import Mapped, mapped_column
 from app.database import Base
 
+# Text search configuration of the bio search vector, which queries against it must use too.
+BIO_SEARCH_CONFIG = "english"
+
 class UserRole(Enum):
     """Enumeration of user roles within the application, stored as ENUM in the database."""
     ANONYMOUS = "ANONYMOUS"
@@ -16,6 +19,9 @@ class UserRole(Enum):
     MANAGER = "MANAGER"
     ADMIN = "ADMIN"
 
+# Hands out blocks of counter values from which generated nicknames are derived.
+nickname_sequence = Sequence("nickname_seq", metadata=Base.metadata)
+
 class User(Base):
     """
     Represents a user within the application, corresponding to the 'users' table in the database.
@@ -42,6 +48,7 @@ class User(Base):
         is_locked (bool): Flag indicating if the account is locked.
         created_at (datetime): Timestamp when the user was created, set by the server.
         updated_at (datetime): Timestamp of the last update, set by the server.
+        token_version (int): Bumped to revoke every access token issued to the user so far.
 
     Methods:
         lock_account(): Locks the user account.
@@ -51,7 +58,27 @@ class User(Base):
         update_professional_status(status): Updates the professional status and logs the update time.
     """
     __tablename__ = "users"
-    __mapper_args__ = {"eager_defaults": True}
+    # bio_tsv is only read by full-text search queries, so the ORM and the caches never load it.
+    __mapper_args__ = {"eager_defaults": True, "exclude_properties": ["bio_tsv"]}
+    __table_args__ = (
+        # Backs keyset pagination ordered by (created_at, id).
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Lets workers read recently written nicknames without scanning the table.
+        Index("ix_users_updated_at", "updated_at"),
+        # Case-insensitive prefix search (lower(column) LIKE 'term%'), whatever the collation.
+        Index("ix_users_email_lower_pattern", text("lower(email) text_pattern_ops")),
+        Index("ix_users_nickname_lower_pattern", text("lower(nickname) text_pattern_ops")),
+        Index("ix_users_first_name_lower_pattern", text("lower(first_name) text_pattern_ops")),
+        Index("ix_users_last_name_lower_pattern", text("lower(last_name) text_pattern_ops")),
+        # Role and state filters, in keyset order. The states admins look for are rare, so
+        # partial indexes hold just those rows.
+        Index("ix_users_role_created_at_id", "role", "created_at", "id"),
+        Index("ix_users_locked_created_at_id", "created_at", "id", postgresql_where=text("is_locked")),
+        Index("ix_users_unverified_created_at_id", "created_at", "id", postgresql_where=text("NOT email_verified")),
+        Index("ix_users_professional_created_at_id", "created_at", "id", postgresql_where=text("is_professional")),
+        # Full-text search over bios.
+        Index("ix_users_bio_tsv", "bio_tsv", postgresql_using="gin"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     nickname: Mapped[str] = Column(String(50), unique=True, nullable=False, index=True)
@@ -73,6 +100,11 @@ class User(Base):
     verification_token = Column(String, nullable=True)
     email_verified: Mapped[bool] = Column(Boolean, default=False, nullable=False)
     hashed_password: Mapped[str] = Column(String(255), nullable=False)
+    token_version: Mapped[int] = Column(Integer, default=0, server_default="0", nullable=False)
+    # Bumped by every UPDATE; served as the ETag and checked against If-Match.
+    version: Mapped[int] = Column(Integer, default=0, server_default="0", nullable=False, onupdate=literal_column("version") + 1)
+    # Generated by Postgres from bio, so every write keeps it in sync.
+    bio_tsv = Column(TSVECTOR, Computed(f"to_tsvector('{BIO_SEARCH_CONFIG}', coalesce(bio, ''))", persisted=True))
 
 
     def __repr__(self) -> str:
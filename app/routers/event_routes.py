@@ -1,76 +1,107 @@
-from builtins import dict, int, len, str
+from builtins import bool, dict, int, len, str
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Response, status, Request
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.dependencies import get_db, get_email_service, require_role
-from app.schemas.event_schemas import EventCreate, EventUpdate, EventResponse, EventListResponse
+from app.dependencies import get_db, get_email_service, get_read_db, require_role
+from app.schemas.batch_schema import BatchGetRequest
+from app.schemas.event_schemas import EventBatchResponse, EventCreate, EventUpdate, EventResponse, EventListResponse
+from app.models.event_model import Event
+from app.services.count_service import CountMode, RowCountService
 from app.services.event_service import EventService
+from app.services.list_cache import ListCache
+from app.utils.etag import make_etag, none_match, parse_if_match
+from app.utils.link_generation import PaginationLinkRow, pagination_link_rows
+from app.utils.pagination import InvalidCursor, decode_cursor, offset_page_cursors
+from app.utils.serialization import InvalidFieldset, ModelEncoder, RawJSONResponse, parse_fieldset
 from app.dependencies import get_settings
 from app.services.email_service import EmailService
 router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 settings = get_settings()
 
+FIELDS_DESCRIPTION = "Comma-separated response fields to include, e.g. id,title"
+
+# Responses are encoded straight from rows; see ModelEncoder.
+@lru_cache(maxsize=64)
+def event_encoders(fields: Optional[Tuple[str, ...]] = None) -> Tuple[ModelEncoder, ModelEncoder]:
+    """The event and event list encoders for a sparse fieldset, or for every field."""
+    item_encoder = ModelEncoder(EventResponse, include=fields)
+    return item_encoder, ModelEncoder(EventListResponse, items=List[item_encoder.row_type], links=List[PaginationLinkRow])
+
+EVENT_ENCODER, EVENT_LIST_ENCODER = event_encoders()
+
+@lru_cache(maxsize=64)
+def event_batch_encoder(fields: Optional[Tuple[str, ...]] = None) -> ModelEncoder:
+    return ModelEncoder(EventBatchResponse, items=List[event_encoders(fields)[0].row_type])
+
+def parse_event_fields(fields: Optional[str], *extra: str) -> Optional[Tuple[str, ...]]:
+    try:
+        return parse_fieldset(fields, EVENT_ENCODER.fields + extra)
+    except InvalidFieldset as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown fields: {e}")
+
 @router.get("/events/{event_id}", response_model=EventResponse, name="get_event", tags=["Event Management (Requires Admin or Manager Roles)"])
-async def get_event(event_id: UUID, request: Request, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def get_event(event_id: UUID, request: Request, db: AsyncSession = Depends(get_read_db), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"])),
+                    if_none_match: Optional[str] = Header(None, description="ETag of a copy the client holds; 304 if the event is unchanged"),
+                    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
     """
     Endpoint to fetch an event by its unique identifier (UUID).
 
     Utilizes the EventService to query the database asynchronously for the event and constructs a response
     model that includes the events's details.
 
+    With If-None-Match, only the event's version is read first, and an unchanged event is
+    answered with 304 without loading or serializing it.
+
     Args:
         eventr_id: UUID of the event to fetch.
         request: The request object, used to generate full URLs in the response.
         db: Dependency that provides an AsyncSession for database access.
-        token: The OAuth2 access token obtained through OAuth2PasswordBearer dependency.
     """
-    event = await EventService.get_by_id(db, event_id)
+    requested = parse_event_fields(fields)
+    if if_none_match is not None:
+        version = await EventService.get_version(db, event_id)
+        if version is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+        if none_match(if_none_match, version):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": make_etag(version)})
+    event = await EventService.get_row(db, event_id, requested)
     if not event:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-    return EventResponse.model_construct(
-        id=event.id,
-        title=event.title,
-        createdby=event.createdby,
-        startdate=event.startdate,
-        enddate=event.enddate
-    )
+    item_encoder, _ = event_encoders(requested)
+    return RawJSONResponse(item_encoder.encode(event), headers={"ETag": make_etag(event.version)})
 
 
 @router.post("/events/", response_model=EventResponse, tags=["Event Management (Requires Admin or Manager Roles)"])
-async def create(event_data: EventCreate, request: Request, db: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def create(event_data: EventCreate, request: Request, db: AsyncSession = Depends(get_db, scope="function"), email_service: EmailService = Depends(get_email_service), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
 
     event = await EventService.create(db, event_data.model_dump(), email_service)
     if event:
-        return event
+        return RawJSONResponse(EVENT_ENCODER.encode(event), headers={"ETag": make_etag(event.version)})
     raise HTTPException(status_code=400, detail="event already exists")
 
 @router.put("/events/{event_id}", response_model=EventResponse, name="update_event", tags=["Event Management (Requires Admin or Manager Roles)"])
-async def update_event(event_id: UUID, event_update: EventUpdate, request: Request, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def update_event(event_id: UUID, event_update: EventUpdate, request: Request,
+                       if_match: Optional[str] = Header(None, description="ETag of the version being edited; 412 if the event changed since"),
+                       db: AsyncSession = Depends(get_db, scope="function"), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
     """
     Update event information.
 
     - **event_id**: UUID of the event to update.
     - **event_update**: eventUpdate model with updated event information.
+    - **If-Match**: optional ETag from a previous read. The update only applies if the event
+      is still at that version, otherwise it fails with 412.
     """
     event_data = event_update.model_dump(exclude_unset=True)
     
-    updated_event = await EventService.update(db, event_id, event_data)
+    updated_event = await EventService.update(db, event_id, event_data, parse_if_match(if_match))
     if not updated_event:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="event not found")
-
-    return EventResponse.model_construct(
-        id=updated_event.id,
-        title=updated_event.title,
-        createdby=updated_event.createdby,
-        startdate=updated_event.startdate,
-        enddate=updated_event.enddate
-    )
+    return RawJSONResponse(EVENT_ENCODER.encode(updated_event), headers={"ETag": make_etag(updated_event.version)})
 
 @router.delete("/events/{event_id}", status_code=status.HTTP_204_NO_CONTENT, name="delete_event", tags=["Event Management (Requires Admin or Manager Roles)"])
-async def delete_event(event_id: UUID, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def delete_event(event_id: UUID, db: AsyncSession = Depends(get_db, scope="function"), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
     """
     Delete a event by its ID.
 
@@ -81,26 +112,85 @@ async def delete_event(event_id: UUID, db: AsyncSession = Depends(get_db), token
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
+@router.post("/events/batch-get", response_model=EventBatchResponse, name="batch_get_events", tags=["Event Management (Requires Admin or Manager Roles)"])
+async def batch_get_events(batch: BatchGetRequest, db: AsyncSession = Depends(get_read_db),
+                           current_user: dict = Depends(require_role(["ADMIN", "MANAGER"])),
+                           fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
+    """
+    Fetch up to `batch_get_max_ids` events by id with a single SELECT. Items keep the
+    order of `ids`, and ids with no event are listed in `missing`.
+    """
+    if len(batch.ids) > settings.batch_get_max_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {settings.batch_get_max_ids} ids per request")
+    requested = parse_event_fields(fields)
+    event_ids = batch.unique_ids()
+    events = await EventService.get_rows(db, event_ids, requested)
+    item_encoder, _ = event_encoders(requested)
+    return RawJSONResponse(event_batch_encoder(requested).encode(
+        items=[item_encoder.values(events[event_id]) for event_id in event_ids if event_id in events],
+        missing=[event_id for event_id in event_ids if event_id not in events],
+    ))
+
+
 @router.get("/events/", response_model=EventListResponse, tags=["Event Management (Requires Admin or Manager Roles)"])
 async def list_events(
     request: Request,
     skip: int = 0,
     limit: int = 10,
-    db: AsyncSession = Depends(get_db),
-    token: str = Depends(oauth2_scheme),
+    cursor: Optional[str] = None,
+    count: CountMode = Query(CountMode(settings.list_count_mode)),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION + "; add links for pagination links"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
 ):
-    total_events = await EventService.count(db)
-    events = await EventService.list_events(db, skip, limit)
-    print(events)
-    event_responses = [
-        EventResponse.model_validate(event) for event in events
-    ]
-       
+    """
+    List events ordered by creation time.
+
+    Pages by skip/limit by default, or by keyset when `cursor` is set to the next_cursor
+    or prev_cursor of a previous response. `count` picks how the total is obtained:
+    exact, cached, estimated or none.
+
+    `fields` narrows the items, and the columns selected for them, to the named fields.
+    Pagination links are only built when `links` is among them.
+
+    Responses are cached as serialized bodies until an event is written (see ListCache).
+    """
+    requested = parse_event_fields(fields, "links")
+    item_fields = None if requested is None else tuple(name for name in requested if name != "links")
+    cache_key = ListCache.key(Event, current_user["role"], request, skip=skip, limit=limit, cursor=cursor, count=count.value,
+                              fields=None if requested is None else ",".join(requested))
+    cached = await ListCache.get(db, cache_key)
+    if cached is not None:
+        return RawJSONResponse(cached)
+    total_events = await RowCountService.count(db, Event, count)
+    has_next = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+        events, next_cursor, prev_cursor = await EventService.list_event_rows_by_cursor(db, limit, position, item_fields)
+    else:
+        events = await EventService.list_event_rows(db, skip, limit + 1, item_fields)
+        has_next = len(events) > limit
+        events = events[:limit]
+        next_cursor, prev_cursor = offset_page_cursors(events, skip, has_next)
+    pagination_links = []
+    if requested is None or "links" in requested:
+        pagination_links = pagination_link_rows(
+            request, skip, limit, total_events.total, next_cursor, prev_cursor, cursor_mode=bool(cursor), has_next=has_next
+        )
     # Construct the final response with pagination details
-    return EventListResponse(
-        items=event_responses,
-        total=total_events,
-        page=skip // limit + 1,
-        size=len(event_responses)
-    )
\ No newline at end of file
+    item_encoder, list_encoder = event_encoders(item_fields)
+    body = list_encoder.encode(
+        items=[item_encoder.values(event) for event in events],
+        total=total_events.total,
+        total_estimated=total_events.estimated,
+        page=None if cursor else skip // limit + 1,
+        size=len(events),
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        links=pagination_links
+    )
+    await ListCache.store(db, cache_key, body)
+    return RawJSONResponse(body)
\ No newline at end of file
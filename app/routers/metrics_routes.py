@@ -0,0 +1,92 @@
+from builtins import dict
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Database
+from app.dependencies import get_read_db, require_role
+from app.services.email_filter import EmailFilter
+from app.services.jwt_service import VerifiedTokenCache
+from app.services.list_cache import ListCache
+from app.services.nickname_service import NicknameService
+from app.services.password_service import PasswordService
+from app.services.revocation_service import RevocationService
+from app.services.user_cache import UserCache
+from app.utils.query_metrics import QueryMetrics
+router = APIRouter()
+
+@router.get("/metrics/password-hashing", name="password_hashing_metrics", tags=["Metrics (Requires Admin Role)"])
+async def password_hashing_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Report the state of the password hashing pool: in-flight and queued jobs, rejected
+    requests and latency histograms for hashing and verification.
+    """
+    return PasswordService.metrics()
+
+@router.get("/metrics/queries", name="query_metrics", tags=["Metrics (Requires Admin Role)"])
+async def query_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Report SQL statements and commits per endpoint, as totals and per-request averages.
+    """
+    return QueryMetrics.snapshot()
+
+@router.get("/metrics/db-pool", name="db_pool_metrics", tags=["Metrics (Requires Admin Role)"])
+async def db_pool_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Report connection pool occupancy (checked out, overflow), checkout timeouts and a
+    histogram of how long requests waited for a connection.
+    """
+    return Database.pool_stats()
+
+@router.get("/metrics/user-cache", name="user_cache_metrics", tags=["Metrics (Requires Admin Role)"])
+async def user_cache_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Report user cache hits, misses and invalidations (local and from other workers),
+    its size and LRU evictions, and whether the invalidation listener is connected.
+    """
+    return UserCache.metrics()
+
+@router.get("/metrics/list-cache", name="list_cache_metrics", tags=["Metrics (Requires Admin Role)"])
+async def list_cache_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Report list response cache hits, misses, stores and evictions, the bytes held, each
+    table's generation and whether the listener for other workers' writes is connected.
+    """
+    return ListCache.metrics()
+
+@router.get("/metrics/token-cache", name="token_cache_metrics", tags=["Metrics (Requires Admin Role)"])
+async def token_cache_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Report the verified-token cache: size, hits, misses, LRU evictions and entries
+    dropped because the token expired.
+    """
+    return VerifiedTokenCache.metrics()
+
+@router.get("/metrics/revocations", name="revocation_metrics", tags=["Metrics (Requires Admin Role)"])
+async def revocation_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Report the in-memory revocation index: users with revoked token versions, revoked
+    token ids, when it was last refreshed and whether the NOTIFY listener is connected.
+    """
+    return RevocationService.metrics()
+
+@router.get("/metrics/nicknames", name="nickname_metrics", tags=["Metrics (Requires Admin Role)"])
+async def nickname_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Report generated nicknames and reserved sequence blocks, and how availability checks
+    were answered: by the filter alone, by a lookup, and lookups the filter caused needlessly.
+    """
+    return NicknameService.metrics()
+
+@router.get("/metrics/email-filter", name="email_filter_metrics", tags=["Metrics (Requires Admin Role)"])
+async def email_filter_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Report the registered email filter: logins it answered without a query, lookups it let
+    through and how many found no user, its memory use and expected error rate, and how
+    many deleted or replaced emails it still holds.
+    """
+    return EmailFilter.metrics()
+
+@router.post("/metrics/email-filter/rebuild", name="rebuild_email_filter", tags=["Metrics (Requires Admin Role)"])
+async def rebuild_email_filter(db: AsyncSession = Depends(get_read_db), current_user: dict = Depends(require_role(["ADMIN"]))):
+    """Rebuild this worker's registered email filter from the users table."""
+    await EmailFilter.rebuild(db)
+    return EmailFilter.metrics()
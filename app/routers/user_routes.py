@@ -18,58 +18,141 @@ Key Highlights:
 - Utilizes OAuth2PasswordBearer for securing API endpoints, requiring valid access tokens for operations.
 """
 
-from builtins import dict, int, len, str
+from builtins import bool, dict, int, len, str
+from functools import lru_cache
 from datetime import timedelta
+from typing import List, Optional, Tuple
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Response, status, Request
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Response, status, Request
+from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.dependencies import get_current_user, get_db, get_email_service, require_role
+from app.dependencies import get_current_user, get_db, get_read_db, get_email_service, require_role
+from app.schemas.batch_schema import BatchGetRequest
 from app.schemas.pagination_schema import EnhancedPagination
-from app.schemas.token_schema import TokenResponse
-from app.schemas.user_schemas import LoginRequest, UserBase, UserCreate, UserListResponse, UserResponse, UserUpdate
-from app.services.user_service import UserService
+from app.schemas.token_schema import RefreshTokenRequest, TokenResponse
+from app.schemas.user_schemas import (
+    LoginRequest, NicknameAvailability, UserBase, UserBatchResponse, UserCreate, UserListResponse, UserResponse,
+    UserSearchResponse, UserSearchResult, UserUpdate,
+)
+from app.models.user_model import User, UserRole
+from app.services.count_service import CountMode, RowCountService
+from app.services.nickname_service import NicknameService
+from app.services.refresh_token_service import RefreshStatus, RefreshTokenService
+from app.services.revocation_service import RevocationService
+from app.services.user_service import CreateStatus, LoginStatus, SearchMatch, UserService
 from app.services.jwt_service import create_access_token
-from app.utils.link_generation import create_user_links, generate_pagination_links
+from app.services.list_cache import ListCache
+from app.utils.etag import make_etag, none_match, parse_if_match
+from app.utils.link_generation import PaginationLinkRow, pagination_link_rows, search_link_rows
+from app.utils.pagination import InvalidCursor, decode_cursor, decode_rank_cursor, offset_page_cursors
+from app.utils.serialization import InvalidFieldset, ModelEncoder, RawJSONResponse, parse_fieldset
 from app.dependencies import get_settings
 from app.services.email_service import EmailService
 router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 settings = get_settings()
+
+FIELDS_DESCRIPTION = "Comma-separated response fields to include, e.g. id,nickname,role"
+
+# The response for each reason UserService.add_user can give for not creating a user.
+CREATE_FAILURES = {
+    CreateStatus.EMAIL_TAKEN: (status.HTTP_400_BAD_REQUEST, "Email already exists"),
+    CreateStatus.NO_FREE_NICKNAME: (status.HTTP_409_CONFLICT, "No free nickname could be allocated, please retry"),
+    CreateStatus.INVALID: (status.HTTP_400_BAD_REQUEST, "Invalid user data"),
+}
+
+def raise_create_failure(result):
+    status_code, detail = CREATE_FAILURES[result.status]
+    raise HTTPException(status_code=status_code, detail=detail)
+
+# Responses are encoded straight from rows; see ModelEncoder.
+@lru_cache(maxsize=64)
+def user_encoders(fields: Optional[Tuple[str, ...]] = None) -> Tuple[ModelEncoder, ModelEncoder]:
+    """The user and user list encoders for a sparse fieldset, or for every field."""
+    item_encoder = ModelEncoder(UserResponse, include=fields)
+    return item_encoder, ModelEncoder(UserListResponse, items=List[item_encoder.row_type], links=List[PaginationLinkRow])
+
+USER_ENCODER, USER_LIST_ENCODER = user_encoders()
+
+@lru_cache(maxsize=64)
+def user_batch_encoder(fields: Optional[Tuple[str, ...]] = None) -> ModelEncoder:
+    return ModelEncoder(UserBatchResponse, items=List[user_encoders(fields)[0].row_type])
+
+USER_SEARCH_ENCODER = ModelEncoder(UserSearchResult)
+USER_SEARCH_LIST_ENCODER = ModelEncoder(UserSearchResponse, items=List[USER_SEARCH_ENCODER.row_type], links=List[PaginationLinkRow])
+
+def parse_user_fields(fields: Optional[str], *extra: str) -> Optional[Tuple[str, ...]]:
+    try:
+        return parse_fieldset(fields, USER_ENCODER.fields + extra)
+    except InvalidFieldset as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown fields: {e}")
+
+# Declared before /users/{user_id}, which would otherwise take "search" for a user id.
+@router.get("/users/search", response_model=UserSearchResponse, name="search_users", tags=["User Management Requires (Admin or Manager Roles)"])
+async def search_users(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=255, description='Words to find in bios, e.g. python fastapi; supports "phrases", or and -word'),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
+):
+    """
+    Full-text search over user bios, best match first.
+
+    Each result carries its rank and a snippet of the bio with the matches highlighted.
+    Passing the next_cursor of a response as `cursor` continues with the lower ranked
+    results. Responses are cached like user lists until a user is written.
+    """
+    cache_key = ListCache.key(User, current_user["role"], request, endpoint="search", q=q, limit=limit, cursor=cursor)
+    cached = await ListCache.get(db, cache_key)
+    if cached is not None:
+        return RawJSONResponse(cached)
+    try:
+        position = decode_rank_cursor(cursor) if cursor else None
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+    results, next_cursor, _ = await UserService.search_bios(db, q, limit, position)
+    body = USER_SEARCH_LIST_ENCODER.encode(
+        items=[USER_SEARCH_ENCODER.values(**result) for result in results],
+        size=len(results),
+        next_cursor=next_cursor,
+        links=search_link_rows(request, limit, next_cursor, {"q": q}),
+    )
+    await ListCache.store(db, cache_key, body)
+    return RawJSONResponse(body)
+
 @router.get("/users/{user_id}", response_model=UserResponse, name="get_user", tags=["User Management Requires (Admin or Manager Roles)"])
-async def get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(get_read_db), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"])),
+                   if_none_match: Optional[str] = Header(None, description="ETag of a copy the client holds; 304 if the user is unchanged"),
+                   fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
     """
     Endpoint to fetch a user by their unique identifier (UUID).
 
     Utilizes the UserService to query the database asynchronously for the user and constructs a response
     model that includes the user's details along with HATEOAS links for possible next actions.
 
+    With If-None-Match, the user's version is read first (from the user cache, or a one-column
+    SELECT), and an unchanged user is answered with 304 without loading or serializing it.
+
+    `fields` narrows the response, and on a user cache miss the SELECT, to the named fields.
+
     Args:
         user_id: UUID of the user to fetch.
         request: The request object, used to generate full URLs in the response.
         db: Dependency that provides an AsyncSession for database access.
-        token: The OAuth2 access token obtained through OAuth2PasswordBearer dependency.
     """
-    user = await UserService.get_by_id(db, user_id)
+    requested = parse_user_fields(fields)
+    if if_none_match is not None:
+        version = await UserService.get_version(db, user_id)
+        if version is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        if none_match(if_none_match, version):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": make_etag(version)})
+    user = await UserService.get_row(db, user_id, requested)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-    return UserResponse.model_construct(
-        id=user.id,
-        nickname=user.nickname,
-        first_name=user.first_name,
-        last_name=user.last_name,
-        bio=user.bio,
-        profile_picture_url=user.profile_picture_url,
-        github_profile_url=user.github_profile_url,
-        linkedin_profile_url=user.linkedin_profile_url,
-        role=user.role,
-        email=user.email,
-        last_login_at=user.last_login_at,
-        created_at=user.created_at,
-        updated_at=user.updated_at,
-        links=create_user_links(user.id, request)  
-    )
+    item_encoder, _ = user_encoders(requested)
+    return RawJSONResponse(item_encoder.encode(**user), headers={"ETag": make_etag(user["version"])})
 
 # Additional endpoints for update, delete, create, and list users follow a similar pattern, using
 # asynchronous database operations, handling security with OAuth2PasswordBearer, and enhancing response
@@ -79,12 +162,16 @@ async def get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(g
 # experience by adhering to REST principles and providing self-discoverable operations.
 
 @router.put("/users/{user_id}", response_model=UserResponse, name="update_user", tags=["User Management Requires (Admin or Manager Roles)"])
-async def update_user(user_id: UUID, user_update: UserUpdate, request: Request, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def update_user(user_id: UUID, user_update: UserUpdate, request: Request,
+                      if_match: Optional[str] = Header(None, description="ETag of the version being edited; 412 if the user changed since"),
+                      db: AsyncSession = Depends(get_db, scope="function"), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
     """
     Update user information.
 
     - **user_id**: UUID of the user to update.
     - **user_update**: UserUpdate model with updated user information.
+    - **If-Match**: optional ETag from a previous read. The update only applies if the user
+      is still at that version, otherwise it fails with 412.
     """
     user_data = user_update.model_dump(exclude_unset=True)
 
@@ -97,30 +184,14 @@ async def update_user(user_id: UUID, user_update: UserUpdate, request: Request,
             if userwithNickName.id != user_id:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nick Name already exists")
     
-    updated_user = await UserService.update(db, user_id, user_data)
+    updated_user = await UserService.update(db, user_id, user_data, parse_if_match(if_match))
     if not updated_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-    return UserResponse.model_construct(
-        id=updated_user.id,
-        bio=updated_user.bio,
-        first_name=updated_user.first_name,
-        last_name=updated_user.last_name,
-        nickname=updated_user.nickname,
-        email=updated_user.email,
-        role=updated_user.role,
-        last_login_at=updated_user.last_login_at,
-        profile_picture_url=updated_user.profile_picture_url,
-        github_profile_url=updated_user.github_profile_url,
-        linkedin_profile_url=updated_user.linkedin_profile_url,
-        created_at=updated_user.created_at,
-        updated_at=updated_user.updated_at,
-        links=create_user_links(updated_user.id, request)
-    )
+    return RawJSONResponse(USER_ENCODER.encode(updated_user), headers={"ETag": make_etag(updated_user.version)})
 
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT, name="delete_user", tags=["User Management Requires (Admin or Manager Roles)"])
-async def delete_user(user_id: UUID, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def delete_user(user_id: UUID, db: AsyncSession = Depends(get_db, scope="function"), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
     """
     Delete a user by their ID.
 
@@ -134,12 +205,13 @@ async def delete_user(user_id: UUID, db: AsyncSession = Depends(get_db), token:
 
 
 @router.post("/users/", response_model=UserResponse, status_code=status.HTTP_201_CREATED, tags=["User Management Requires (Admin or Manager Roles)"], name="create_user")
-async def create_user(user: UserCreate, request: Request, db: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def create_user(user: UserCreate, request: Request, db: AsyncSession = Depends(get_db, scope="function"), email_service: EmailService = Depends(get_email_service), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
     """
     Create a new user.
 
     This endpoint creates a new user with the provided information. If the email
-    already exists, it returns a 400 error. On successful creation, it returns the
+    already exists, it returns a 400 error, and if no free nickname could be allocated
+    a 409 error. On successful creation, it returns the
     newly created user's information along with links to related actions.
 
     Parameters:
@@ -150,102 +222,195 @@ async def create_user(user: UserCreate, request: Request, db: AsyncSession = Dep
     Returns:
     - UserResponse: The newly created user's information along with navigation links.
     """
-    existing_user = await UserService.get_by_email(db, user.email)
-    if existing_user:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
-    
-    created_user = await UserService.create(db, user.model_dump(), email_service)
-    if not created_user:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create user")
-        
-    return UserResponse.model_construct(
-        id=created_user.id,
-        bio=created_user.bio,
-        first_name=created_user.first_name,
-        last_name=created_user.last_name,
-        profile_picture_url=created_user.profile_picture_url,
-        nickname=created_user.nickname,
-        email=created_user.email,
-        linkedin_profile_url=created_user.linkedin_profile_url,
-        github_profile_url=created_user.github_profile_url,
-        role=created_user.role,
-        last_login_at=created_user.last_login_at,
-        created_at=created_user.created_at,
-        updated_at=created_user.updated_at,
-        links=create_user_links(created_user.id, request)
-    )
+    # The insert itself detects a taken email, so there is no lookup beforehand.
+    result = await UserService.add_user(db, user.model_dump(), email_service)
+    created_user = result.user
+    if created_user is None:
+        raise_create_failure(result)
+    return RawJSONResponse(USER_ENCODER.encode(created_user), status_code=status.HTTP_201_CREATED,
+                           headers={"ETag": make_etag(created_user.version)})
 
 @router.get("/users/", response_model=UserListResponse, tags=["User Management Requires (Admin or Manager Roles)"])
 async def list_users(
     request: Request,
     skip: int = 0,
     limit: int = 10,
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = None,
+    count: CountMode = Query(CountMode(settings.list_count_mode)),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION + "; add links for pagination links"),
+    q: Optional[str] = Query(None, min_length=1, max_length=255, description="Case-insensitive search over email, nickname, first and last name"),
+    match: SearchMatch = Query(SearchMatch.PREFIX, description="Whether q must start a field (prefix) or may occur anywhere in it (substring)"),
+    role: Optional[UserRole] = Query(None, description="Only users with this role"),
+    is_locked: Optional[bool] = Query(None, description="Only locked, or only unlocked, users"),
+    email_verified: Optional[bool] = Query(None, description="Only users whose email is, or is not, verified"),
+    is_professional: Optional[bool] = Query(None, description="Only professionals, or only non-professionals"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
 ):
-    total_users = await UserService.count(db)
-    users = await UserService.list_users(db, skip, limit)
+    """
+    List users ordered by creation time, optionally searched and filtered.
 
-    user_responses = [
-        UserResponse.model_validate(user) for user in users
-    ]
-    
-    pagination_links = generate_pagination_links(request, skip, limit, total_users)
+    Pages by skip/limit by default. Passing the next_cursor or prev_cursor of a previous
+    response as `cursor` pages by keyset instead, which costs the same at any depth and
+    is not disturbed by concurrent inserts.
+
+    `count` picks how the total is obtained: exact, cached, estimated (planner statistics,
+    flagged by total_estimated) or none to skip the total altogether.
+
+    `fields` narrows the items, and the columns selected for them, to the named fields.
+    Pagination links are only built when `links` is among them.
+
+    `q` searches email, nickname, first and last name by prefix, or with match=substring
+    anywhere in them; `role`, `is_locked`, `email_verified` and `is_professional` filter.
+    Each is answered from an index (see the User model). The total of a filtered list is
+    counted exactly unless count=none, and pagination links keep the search and filters.
+
+    Responses are cached as serialized bodies until a user is written (see ListCache).
+    """
+    requested = parse_user_fields(fields, "links")
+    item_fields = None if requested is None else tuple(name for name in requested if name != "links")
+    filters = {"q": q, "match": match.value if q else None, "role": role.value if role else None,
+               "is_locked": is_locked, "email_verified": email_verified, "is_professional": is_professional}
+    cache_key = ListCache.key(User, current_user["role"], request, skip=skip, limit=limit, cursor=cursor, count=count.value,
+                              fields=None if requested is None else ",".join(requested), **filters)
+    cached = await ListCache.get(db, cache_key)
+    if cached is not None:
+        return RawJSONResponse(cached)
+    criteria = UserService.filter_criteria(q, match, role, is_locked, email_verified, is_professional)
+    total_users = await RowCountService.count(db, User, count, criteria)
+    has_next = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+        users, next_cursor, prev_cursor = await UserService.list_user_rows_by_cursor(db, limit, position, item_fields, criteria)
+    else:
+        # One extra row tells us whether a next page exists without relying on the total.
+        users = await UserService.list_user_rows(db, skip, limit + 1, item_fields, criteria)
+        has_next = len(users) > limit
+        users = users[:limit]
+        next_cursor, prev_cursor = offset_page_cursors(users, skip, has_next)
+
+    pagination_links = []
+    if requested is None or "links" in requested:
+        pagination_links = pagination_link_rows(
+            request, skip, limit, total_users.total, next_cursor, prev_cursor, cursor_mode=bool(cursor), has_next=has_next,
+            params=filters
+        )
     
     # Construct the final response with pagination details
-    return UserListResponse(
-        items=user_responses,
-        total=total_users,
-        page=skip // limit + 1,
-        size=len(user_responses),
-        links=pagination_links  # Ensure you have appropriate logic to create these links
+    item_encoder, list_encoder = user_encoders(item_fields)
+    body = list_encoder.encode(
+        items=[item_encoder.values(user) for user in users],
+        total=total_users.total,
+        total_estimated=total_users.estimated,
+        page=None if cursor else skip // limit + 1,
+        size=len(users),
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        links=pagination_links
     )
+    await ListCache.store(db, cache_key, body)
+    return RawJSONResponse(body)
+
+
+@router.post("/users/batch-get", response_model=UserBatchResponse, name="batch_get_users", tags=["User Management Requires (Admin or Manager Roles)"])
+async def batch_get_users(batch: BatchGetRequest, db: AsyncSession = Depends(get_read_db),
+                          current_user: dict = Depends(require_role(["ADMIN", "MANAGER"])),
+                          fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
+    """
+    Fetch up to `batch_get_max_ids` users by id in one request.
+
+    Users in the user cache are served from it and the rest are read with a single
+    SELECT. Items keep the order of `ids`, and ids with no user are listed in `missing`.
+    """
+    if len(batch.ids) > settings.batch_get_max_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {settings.batch_get_max_ids} ids per request")
+    requested = parse_user_fields(fields)
+    user_ids = batch.unique_ids()
+    users = await UserService.get_rows(db, user_ids, requested)
+    item_encoder, _ = user_encoders(requested)
+    return RawJSONResponse(user_batch_encoder(requested).encode(
+        items=[item_encoder.values(**users[user_id]) for user_id in user_ids if user_id in users],
+        missing=[user_id for user_id in user_ids if user_id not in users],
+    ))
 
 
 @router.post("/register/", response_model=UserResponse, tags=["Login and Registration"])
-async def register(user_data: UserCreate, session: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service)):
-    user = await UserService.register_user(session, user_data.model_dump(), email_service)
-    if user:
-        return user
-    raise HTTPException(status_code=400, detail="Email already exists")
+async def register(user_data: UserCreate, session: AsyncSession = Depends(get_db, scope="function"), email_service: EmailService = Depends(get_email_service)):
+    result = await UserService.add_user(session, user_data.model_dump(), email_service)
+    if result.user is None:
+        raise_create_failure(result)
+    return RawJSONResponse(USER_ENCODER.encode(result.user))
+
+async def _issue_tokens(session: AsyncSession, user, refresh_token: Optional[str] = None) -> dict:
+    """Build the token response for an authenticated (id, email, role) row, issuing a refresh token if none is given."""
+    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+
+    access_token = create_access_token(
+        data={"sub": user.email, "role": str(user.role.name), "uid": str(user.id), "ver": user.token_version},
+        expires_delta=access_token_expires
+    )
+    if refresh_token is None:
+        refresh_token = await RefreshTokenService.issue(session, user.id)
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
 
 @router.post("/login/", response_model=TokenResponse, tags=["Login and Registration"])
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db)):
-    if await UserService.is_account_locked(session, form_data.username):
-        raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
-
-    user = await UserService.login_user(session, form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db, scope="function")):
+    result = await UserService.authenticate(session, form_data.username, form_data.password)
+    user = result.user
     if user:
-        access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-
-        access_token = create_access_token(
-            data={"sub": user.email, "role": str(user.role.name)},
-            expires_delta=access_token_expires
-        )
+        return await _issue_tokens(session, user)
 
-        return {"access_token": access_token, "token_type": "bearer"}
+    # The failed-attempt count, the lock and the revocation it triggers must outlive the error response.
+    await session.commit()
+    if result.status is LoginStatus.LOCKED:
+        raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
     raise HTTPException(status_code=401, detail="Incorrect email or password.")
 
 @router.post("/login/", include_in_schema=False, response_model=TokenResponse, tags=["Login and Registration"])
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db)):
-    if await UserService.is_account_locked(session, form_data.username):
-        raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
-
-    user = await UserService.login_user(session, form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db, scope="function")):
+    result = await UserService.authenticate(session, form_data.username, form_data.password)
+    user = result.user
     if user:
-        access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+        return await _issue_tokens(session, user)
 
-        access_token = create_access_token(
-            data={"sub": user.email, "role": str(user.role.name)},
-            expires_delta=access_token_expires
-        )
-
-        return {"access_token": access_token, "token_type": "bearer"}
+    # The failed-attempt count, the lock and the revocation it triggers must outlive the error response.
+    await session.commit()
+    if result.status is LoginStatus.LOCKED:
+        raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
     raise HTTPException(status_code=401, detail="Incorrect email or password.")
 
 
+@router.post("/token/refresh", response_model=TokenResponse, name="refresh_token", tags=["Login and Registration"])
+async def refresh_token(refresh_request: RefreshTokenRequest, session: AsyncSession = Depends(get_db, scope="function")):
+    """
+    Exchange a refresh token for a new access token and the next refresh token.
+
+    Refresh tokens are single use. Presenting one that was already used revokes every
+    token issued from the same login, so a stolen token stops working for both parties.
+    """
+    result = await RefreshTokenService.rotate(session, refresh_request.refresh_token)
+    if result.status is not RefreshStatus.SUCCESS:
+        # A detected reuse revoked the token family, which must outlive the error response.
+        await session.commit()
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token.", headers={"WWW-Authenticate": "Bearer"})
+    return await _issue_tokens(session, result.user, refresh_token=result.refresh_token)
+
+@router.post("/logout/", status_code=status.HTTP_204_NO_CONTENT, name="logout", tags=["Login and Registration"])
+async def logout(refresh_request: Optional[RefreshTokenRequest] = None, session: AsyncSession = Depends(get_db, scope="function"), current_user: dict = Depends(get_current_user)):
+    """
+    Revoke the presented access token on every worker and, when given, the refresh token
+    together with every other refresh token from the same login.
+    """
+    await RevocationService.revoke_token(session, current_user["jti"], current_user["exp"])
+    if refresh_request is not None:
+        await RefreshTokenService.revoke(session, refresh_request.refresh_token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
 @router.get("/verify-email/{user_id}/{token}", status_code=status.HTTP_200_OK, name="verify_email", tags=["Login and Registration"])
-async def verify_email(user_id: UUID, token: str, db: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service)):
+async def verify_email(user_id: UUID, token: str, db: AsyncSession = Depends(get_db, scope="function"), email_service: EmailService = Depends(get_email_service)):
     """
     Verify user's email with a provided token.
     
@@ -254,4 +419,15 @@ async def verify_email(user_id: UUID, token: str, db: AsyncSession = Depends(get
     """
     if await UserService.verify_email_with_token(db, user_id, token):
         return {"message": "Email verified successfully"}
-    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired verification token")
\ No newline at end of file
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired verification token")
+
+
+@router.get("/nicknames/{nickname}/availability", response_model=NicknameAvailability, name="nickname_availability", tags=["Login and Registration"])
+async def nickname_availability(nickname: str = Path(..., min_length=3, max_length=50, pattern=r'^[\w-]+$'), db: AsyncSession = Depends(get_read_db)):
+    """
+    Check whether a nickname is still free.
+
+    Most free nicknames are answered from an in-memory filter without a database query.
+    The answer is advisory: the nickname is only reserved once an update sets it.
+    """
+    return NicknameAvailability(nickname=nickname, available=await NicknameService.is_available(db, nickname))
@@ -0,0 +1,12 @@
+from builtins import dict, list
+from typing import List
+from uuid import UUID
+from pydantic import BaseModel, Field
+
+class BatchGetRequest(BaseModel):
+    ids: List[UUID] = Field(..., min_length=1, description="Ids to look up; results keep this order and repeated ids are returned once.",
+                            example=["5b6a8f4e-2c1d-4e0f-9a7b-3d2c1e0f9a8b"])
+
+    def unique_ids(self) -> List[UUID]:
+        """The requested ids in order, without repeats."""
+        return list(dict.fromkeys(self.ids))
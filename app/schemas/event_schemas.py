@@ -5,6 +5,7 @@ from datetime import datetime
 from enum import Enum
 import uuid
 import re
+from app.schemas.pagination_schema import PaginationLink
 
 class EventCreate(BaseModel):
 
@@ -27,6 +28,7 @@ class EventResponse(BaseModel):
     createdby: str = Field(None, example="John Doe")
     startdate: datetime = Field(None, example="2024-12-16")
     enddate: datetime = Field(None, example="2024-12-17")
+    version: Optional[int] = Field(None, exclude=True, description="Row version, sent as the ETag header rather than in the body.")
 
     model_config = {"from_attributes": True}
 
@@ -38,6 +40,14 @@ class EventListResponse(BaseModel):
         "startdate": "2024-12-16",
         "enddate": "2024-12-17",
     }])
-    total: int = Field(..., example=100)
-    page: int = Field(..., example=1)
+    total: Optional[int] = Field(None, example=100, description="Total matching items, omitted when the client asked for count=none.")
+    total_estimated: bool = Field(False, description="True when total comes from planner statistics rather than an exact count.")
+    page: Optional[int] = Field(None, example=1, description="Page number in offset mode, omitted when paging by cursor.")
     size: int = Field(..., example=10)
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for the following page.")
+    prev_cursor: Optional[str] = Field(None, description="Opaque cursor for the preceding page.")
+    links: List[PaginationLink] = Field(default_factory=list)
+
+class EventBatchResponse(BaseModel):
+    items: List[EventResponse] = Field(..., description="The events found, in the order their ids were asked for.")
+    missing: List[uuid.UUID] = Field(default_factory=list, description="Requested ids with no event.")
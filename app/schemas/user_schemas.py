@@ -1,4 +1,4 @@
-from builtins import ValueError, any, bool, str
+from builtins import ValueError, any, bool, float, str
 from pydantic import BaseModel, EmailStr, Field, validator, root_validator
 from typing import Optional, List
 from datetime import datetime
@@ -6,6 +6,7 @@ from enum import Enum
 import uuid
 import re
 from app.models.user_model import UserRole
+from app.schemas.pagination_schema import PaginationLink
 from app.utils.nickname_gen import generate_nickname
 
 
@@ -86,6 +87,28 @@ class UserListResponse(BaseModel):
         "linkedin_profile_url": "https://linkedin.com/in/johndoe",
         "github_profile_url": "https://github.com/johndoe"
     }])
-    total: int = Field(..., example=100)
-    page: int = Field(..., example=1)
+    total: Optional[int] = Field(None, example=100, description="Total matching items, omitted when the client asked for count=none.")
+    total_estimated: bool = Field(False, description="True when total comes from planner statistics rather than an exact count.")
+    page: Optional[int] = Field(None, example=1, description="Page number in offset mode, omitted when paging by cursor.")
     size: int = Field(..., example=10)
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for the following page.")
+    prev_cursor: Optional[str] = Field(None, description="Opaque cursor for the preceding page.")
+    links: List[PaginationLink] = Field(default_factory=list)
+
+class UserBatchResponse(BaseModel):
+    items: List[UserResponse] = Field(..., description="The users found, in the order their ids were asked for.")
+    missing: List[uuid.UUID] = Field(default_factory=list, description="Requested ids with no user.")
+
+class UserSearchResult(UserResponse):
+    rank: float = Field(..., example=0.1, description="How well the bio matches the query; results come best first.")
+    snippet: Optional[str] = Field(None, example="Senior <mark>Python</mark> developer", description="Bio excerpt with matches in <mark> tags; the rest is HTML-escaped.")
+
+class UserSearchResponse(BaseModel):
+    items: List[UserSearchResult]
+    size: int = Field(..., example=10)
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for the following, lower ranked, results.")
+    links: List[PaginationLink] = Field(default_factory=list)
+
+class NicknameAvailability(BaseModel):
+    nickname: str = Field(..., example=generate_nickname())
+    available: bool = Field(..., example=True, description="False when another user already has this nickname.")
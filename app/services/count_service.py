@@ -0,0 +1,101 @@
+from builtins import bool, classmethod, dict, int, str
+import time
+from enum import Enum
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dependencies import get_settings
+import logging
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# The planner's own row estimate: reltuples scaled by how much the table has grown since
+# the last VACUUM/ANALYZE. reltuples is -1 for tables that were never analyzed.
+ESTIMATE_QUERY = text(
+    """
+    SELECT CASE
+        WHEN c.reltuples < 0 THEN NULL
+        WHEN c.relpages = 0 THEN 0
+        ELSE (c.reltuples / c.relpages
+              * (pg_relation_size(c.oid) / current_setting('block_size')::int))::bigint
+    END
+    FROM pg_class c
+    WHERE c.oid = to_regclass(:table_name)
+    """
+)
+
+
+class CountMode(str, Enum):
+    """How a list endpoint should obtain its total."""
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATED = "estimated"
+    NONE = "none"
+
+
+class CountResult(NamedTuple):
+    total: Optional[int]
+    estimated: bool = False
+
+
+class RowCountService:
+    """
+    Counts rows for list endpoints without always paying for a full `count(*)`.
+
+    - exact: `SELECT count(*)`, a scan of the whole table.
+    - cached: the exact count kept per table for `count_cache_ttl_seconds`, dropped
+      whenever this worker inserts or deletes rows through the services.
+    - estimated: the planner statistics in pg_class. Small tables (below
+      `count_estimate_min_rows`) are still counted exactly, since that is cheap and
+      the statistics are least reliable there.
+    - none: no total at all.
+
+    Totals of filtered lists are always counted exactly. The filters are backed by
+    indexes, there is no statistic to estimate them from, and a per-filter cache would
+    mostly hold counts nobody asks for again.
+    """
+    _cache: Dict[str, Tuple[int, float]] = {}
+
+    @classmethod
+    async def count(cls, session: AsyncSession, model, mode: CountMode = CountMode.EXACT, criteria: Sequence = ()) -> CountResult:
+        if mode is CountMode.NONE:
+            return CountResult(None)
+        if criteria:
+            return CountResult(await session.scalar(select(func.count()).select_from(model).where(*criteria)))
+        if mode is CountMode.CACHED:
+            return CountResult(await cls._cached_count(session, model))
+        if mode is CountMode.ESTIMATED:
+            estimate = await cls._estimated_count(session, model)
+            if estimate is not None and estimate >= settings.count_estimate_min_rows:
+                return CountResult(estimate, estimated=True)
+        return CountResult(await cls._exact_count(session, model))
+
+    @classmethod
+    async def _exact_count(cls, session: AsyncSession, model) -> int:
+        return await session.scalar(select(func.count()).select_from(model))
+
+    @classmethod
+    async def _cached_count(cls, session: AsyncSession, model) -> int:
+        table_name = model.__tablename__
+        cached = cls._cache.get(table_name)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        total = await cls._exact_count(session, model)
+        cls._cache[table_name] = (total, time.monotonic() + settings.count_cache_ttl_seconds)
+        return total
+
+    @classmethod
+    async def _estimated_count(cls, session: AsyncSession, model) -> Optional[int]:
+        if session.bind.dialect.name != "postgresql":
+            return None
+        return await session.scalar(ESTIMATE_QUERY, {"table_name": model.__tablename__})
+
+    @classmethod
+    def invalidate(cls, model):
+        """Drop the cached count for a model's table after rows were inserted or deleted."""
+        cls._cache.pop(model.__tablename__, None)
+
+    @classmethod
+    def clear(cls):
+        cls._cache.clear()
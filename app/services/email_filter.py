@@ -0,0 +1,189 @@
+from builtins import Exception, bool, bytes, classmethod, dict, int, max, round, str
+import asyncio
+import time
+from typing import Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Database
+from app.dependencies import get_settings
+from app.models.user_model import User
+from app.utils.bloom_filter import BloomFilter
+from app.utils.pg_notify import PgNotifier, notify, notify_expression
+import logging
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+LOAD_BATCH = 10000
+
+
+class EmailFilter:
+    """
+    Knows which emails are certainly not registered, so logins for them need no query.
+
+    Each worker holds a Bloom filter of registered emails. It never forgets an email, so it
+    can only err towards "maybe registered", which costs the usual lookup:
+
+    - It is built at startup, and rebuilt on demand or once deleted and replaced emails
+      make up more than `email_filter_max_stale_ratio` of it.
+    - Emails written by this worker are added straight away. The writing transaction also
+      NOTIFYs their keys (a hash, not the address), so other workers add them on commit.
+    - A negative answer is only trusted while the NOTIFY listener is connected. After a
+      reconnect the filter is rebuilt, because keys sent in the meantime were lost.
+    """
+    _filter: Optional[BloomFilter] = None
+    _building: Optional[BloomFilter] = None
+    _capacity: int = 0
+    _stale: int = 0
+    _started: bool = False
+    _notifier: Optional[PgNotifier] = None
+    _rebuild_task: Optional[asyncio.Task] = None
+    _last_rebuild: Optional[float] = None
+    _stats: Dict[str, int] = dict.fromkeys(("skipped", "lookups", "false_positives", "remote_keys", "rebuilds"), 0)
+
+    @classmethod
+    def _trusted(cls) -> bool:
+        return (settings.email_filter_enabled and cls._filter is not None
+                and (cls._notifier is None or cls._notifier.listening))
+
+    @classmethod
+    def may_exist(cls, email: str) -> bool:
+        """False only if no user has this email."""
+        if not cls._trusted():
+            return True
+        if cls._filter.contains_key(BloomFilter.key(email)):
+            cls._stats["lookups"] += 1
+            return True
+        cls._stats["skipped"] += 1
+        return False
+
+    @classmethod
+    def false_positive(cls):
+        """Record that a lookup the filter let through found no user."""
+        if cls._trusted():
+            cls._stats["false_positives"] += 1
+
+    @classmethod
+    def _add_key(cls, key: bytes):
+        for bloom in (cls._filter, cls._building):
+            if bloom is not None:
+                bloom.add_key(key)
+
+    @classmethod
+    def remember(cls, email: str):
+        """Add an email this worker wrote. Other workers learn of it from `announce` or `add`."""
+        cls._add_key(BloomFilter.key(email))
+
+    @classmethod
+    def announce(cls, email: str):
+        """
+        A SQL expression that NOTIFYs every worker of `email`, for writes that want to
+        announce it from within their own statement rather than with a separate one.
+        """
+        return notify_expression(settings.email_filter_channel, BloomFilter.key(email).hex())
+
+    @classmethod
+    async def add(cls, session: AsyncSession, email: str):
+        """Add an email written by `session` here now, and on every worker once the session commits."""
+        cls.remember(email)
+        if session.bind.dialect.name == "postgresql":
+            await notify(session, settings.email_filter_channel, BloomFilter.key(email).hex())
+
+    @classmethod
+    def mark_stale(cls):
+        """Note that an email in the filter was deleted or replaced, rebuilding once too many are."""
+        cls._stale += 1
+        if (cls._started and cls._filter is not None and cls._rebuild_task is None
+                and cls._stale > settings.email_filter_max_stale_ratio * cls._filter.count):
+            cls._rebuild_task = asyncio.get_running_loop().create_task(cls._background_rebuild())
+
+    @classmethod
+    async def rebuild(cls, session: AsyncSession):
+        """Re-read every registered email into a fresh filter and swap it in."""
+        if cls._building is not None:
+            return  # Already rebuilding.
+        previous = cls._filter.count if cls._filter is not None else 0
+        cls._capacity = max(settings.email_filter_capacity, cls._capacity, 2 * previous)
+        # Keys announced while the table is read go into both filters, so none are lost.
+        building = cls._building = BloomFilter(cls._capacity, settings.email_filter_error_rate)
+        try:
+            result = await session.stream(select(User.email).execution_options(yield_per=LOAD_BATCH))
+            async for emails in result.scalars().partitions():
+                for email in emails:
+                    building.add(email)
+        finally:
+            cls._building = None
+        cls._filter = building
+        cls._stale = 0
+        cls._stats["rebuilds"] += 1
+        cls._last_rebuild = time.time()
+
+    @classmethod
+    async def _reload(cls):
+        async with Database.get_session_factory()() as session:
+            await cls.rebuild(session)
+
+    @classmethod
+    async def _background_rebuild(cls):
+        try:
+            await cls._reload()
+        except Exception as e:
+            logger.warning(f"Rebuilding the email filter failed: {e}")
+        finally:
+            cls._rebuild_task = None
+
+    @classmethod
+    async def _on_reconnect(cls):
+        cls._filter = None  # Distrust the old filter until the rebuild finishes.
+        await cls._reload()
+
+    @classmethod
+    async def _on_notification(cls, connection, pid: int, channel: str, payload: str):
+        cls._add_key(bytes.fromhex(payload))
+        cls._stats["remote_keys"] += 1
+
+    @classmethod
+    async def start(cls, database_url: str):
+        """Start listening for emails added by other workers, then build the filter."""
+        if not settings.email_filter_enabled or cls._started:
+            return
+        if database_url.startswith("postgresql"):
+            cls._notifier = PgNotifier(database_url, settings.email_filter_channel, cls._on_notification,
+                                       on_reconnect=cls._on_reconnect)
+            await cls._notifier.start()
+        await cls._reload()
+        cls._started = True
+
+    @classmethod
+    async def stop(cls):
+        cls._started = False
+        if cls._rebuild_task is not None:
+            cls._rebuild_task.cancel()
+            cls._rebuild_task = None
+        if cls._notifier is not None:
+            await cls._notifier.stop()
+            cls._notifier = None
+
+    @classmethod
+    def reset(cls):
+        cls._filter = None
+        cls._building = None
+        cls._capacity = 0
+        cls._stale = 0
+        cls._last_rebuild = None
+        cls._stats = dict.fromkeys(cls._stats, 0)
+
+    @classmethod
+    def metrics(cls) -> Dict[str, object]:
+        absent = cls._stats["skipped"] + cls._stats["false_positives"]
+        return {
+            "enabled": settings.email_filter_enabled,
+            "trusted": cls._trusted(),
+            "listening": cls._notifier is not None and cls._notifier.listening,
+            **cls._stats,
+            # Share of unregistered emails the filter failed to rule out.
+            "observed_error_rate": round(cls._stats["false_positives"] / absent, 6) if absent else None,
+            "stale": cls._stale,
+            "last_rebuild": cls._last_rebuild,
+            **({"filter": cls._filter.stats()} if cls._filter is not None else {}),
+        }
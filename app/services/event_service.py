@@ -1,29 +1,37 @@
-from builtins import Exception, bool, classmethod, int, str
+from builtins import Exception, bool, classmethod, getattr, int, list, str
 from datetime import datetime, timezone
 import secrets
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Sequence
 from pydantic import ValidationError
-from sqlalchemy import func, null, update, select
+from sqlalchemy import Row, any_, bindparam, delete, exists, func, insert, null, update, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.dependencies import get_email_service, get_settings
 from app.models.event_model import Event
 from app.schemas.event_schemas import EventCreate, EventUpdate, EventResponse
 from uuid import UUID
+from app.services.count_service import RowCountService
 from app.services.email_service import EmailService
+from app.services.list_cache import ListCache
+from app.utils.etag import PreconditionFailed
+from app.utils.pagination import Cursor, KeysetPage, fetch_keyset_page
 import logging
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Columns writes RETURN, which are exactly what EventResponse needs.
+RESPONSE_COLUMNS = (Event.id, Event.title, Event.createdby, Event.startdate, Event.enddate, Event.version)
+# Lists also need created_at, for keyset cursors.
+LIST_COLUMNS = RESPONSE_COLUMNS + (Event.created_at,)
+
 class EventService:
     
     @classmethod
     async def _execute_query(cls, session: AsyncSession, query):
         try:
-            result = await session.execute(query)
-            await session.commit()
-            return result
+            return await session.execute(query)
         except SQLAlchemyError as e:
             logger.error(f"Database error: {e}")
             await session.rollback()
@@ -35,10 +43,39 @@ class EventService:
         result = await cls._execute_query(session, query)
         return result.scalars().first() if result else None
     
+    @classmethod
+    async def _exists(cls, session: AsyncSession, event_id: UUID) -> bool:
+        return bool((await session.execute(select(exists().where(Event.id == event_id)))).scalar())
+
     @classmethod
     async def get_by_id(cls, session: AsyncSession, event_id: UUID) -> Optional[Event]:
         return await cls._fetch_event(session, id=event_id)
     
+    @classmethod
+    async def get_row(cls, session: AsyncSession, event_id: UUID, fields: Optional[Sequence[str]] = None) -> Optional[Row]:
+        """
+        The event's RESPONSE_COLUMNS, or the columns of `fields` and the version, as a row
+        for rendering without an Event instance.
+        """
+        columns = RESPONSE_COLUMNS if fields is None else (Event.version, *(getattr(Event, name) for name in fields))
+        result = await cls._execute_query(session, select(*columns).where(Event.id == event_id))
+        return result.first() if result else None
+
+    @classmethod
+    async def get_rows(cls, session: AsyncSession, event_ids: Sequence[UUID],
+                       fields: Optional[Sequence[str]] = None) -> Dict[UUID, Row]:
+        """get_row for many events with one `id = ANY(:ids)` SELECT; missing events are left out."""
+        columns = RESPONSE_COLUMNS if fields is None else (Event.id, *(getattr(Event, name) for name in fields if name != "id"))
+        query = select(*columns).where(Event.id == any_(bindparam("ids", list(event_ids), type_=ARRAY(Event.id.type))))
+        result = await cls._execute_query(session, query)
+        return {row.id: row for row in result.all()} if result else {}
+
+    @classmethod
+    async def get_version(cls, session: AsyncSession, event_id: UUID) -> Optional[int]:
+        """The event's row version, read without loading the rest of the row."""
+        result = await cls._execute_query(session, select(Event.version).where(Event.id == event_id))
+        return result.scalar() if result else None
+
     @classmethod
     async def count(cls, session: AsyncSession) -> int:
         """
@@ -56,58 +93,94 @@ class EventService:
     async def create(cls, session: AsyncSession, event_data: Dict[str, str], email_service: EmailService) -> Optional[EventResponse]:
         try:
             validated_data = EventCreate(**event_data).model_dump()
-            new_event = Event(**validated_data)
-            session.add(new_event)
-            await session.commit()
-    
-            return EventResponse(
-                id=new_event.id,
-                title=new_event.title,
-                createdby=new_event.createdby,
-                startdate=new_event.startdate,
-                enddate=new_event.enddate
-            )
-    
+            query = insert(Event).values(**validated_data).returning(*RESPONSE_COLUMNS)
+            result = await cls._execute_query(session, query)
+            row = result.first() if result else None
+            if row is None:
+                return None
+            RowCountService.invalidate(Event)
+            ListCache.invalidate(session, Event)
+            return EventResponse.model_validate(row)
         except ValidationError as e:
             logger.error(f"Validation error during event creation: {e}")
             return None
-    
+
     @classmethod
-    async def update(cls, session: AsyncSession, event_id: UUID, update_data: Dict[str, str]) -> Optional[EventResponse]:
+    async def update(cls, session: AsyncSession, event_id: UUID, update_data: Dict[str, str],
+                     expected_versions: Optional[List[int]] = None) -> Optional[EventResponse]:
+        """
+        Write only the fields set in `update_data`, returning the event from the same UPDATE.
+        With `expected_versions` (from If-Match) the UPDATE only applies while the row is at
+        one of them; otherwise PreconditionFailed is raised.
+        """
         try:
-            validated_data = EventUpdate(**update_data).model_dump()
-            query = update(Event).where(Event.id == event_id).values(**validated_data).execution_options(synchronize_session="fetch")
-            await cls._execute_query(session, query)
-            updated_event = await cls.get_by_id(session, event_id)
-            if updated_event:
-                session.refresh(updated_event)  # Explicitly refresh the updated ueventser object
-                logger.info(f"Event {event_id} updated successfully.")
-                return EventResponse(
-                    id=updated_event.id,
-                    title=updated_event.title,
-                    createdby=updated_event.createdby,
-                    startdate=updated_event.startdate,
-                    enddate=updated_event.enddate
-                )
-            else:
-                logger.error(f"Event {event_id} not found after update attempt.")
-            return None
+            validated_data = EventUpdate(**update_data).model_dump(exclude_unset=True)
+            if not validated_data:
+                event = await cls.get_by_id(session, event_id)
+                if event is not None and expected_versions is not None and event.version not in expected_versions:
+                    raise PreconditionFailed("Event was modified since it was read")
+                return EventResponse.model_validate(event) if event else None
+            query = update(Event).where(Event.id == event_id).values(**validated_data).returning(*RESPONSE_COLUMNS)
+            if expected_versions is not None:
+                query = query.where(Event.version.in_(expected_versions))
+            result = await cls._execute_query(session, query)
+            row = result.first() if result else None
+            if row is None:
+                if expected_versions is not None and await cls._exists(session, event_id):
+                    raise PreconditionFailed("Event was modified since it was read")
+                logger.error(f"Event {event_id} not found for update.")
+                return None
+            ListCache.invalidate(session, Event)
+            logger.info(f"Event {event_id} updated successfully.")
+            return EventResponse.model_validate(row)
+        except PreconditionFailed:
+            raise
         except Exception as e:  # Broad exception handling for debugging
             logger.error(f"Error during event update: {e}")
             return None
-        
+
     @classmethod
     async def delete(cls, session: AsyncSession, event_id: UUID) -> bool:
-        event = await cls.get_by_id(session, event_id)
-        if not event:
+        result = await cls._execute_query(session, delete(Event).where(Event.id == event_id).returning(Event.id))
+        if result is None or result.first() is None:
             logger.info(f"Event with ID {event_id} not found.")
             return False
-        await session.delete(event)
-        await session.commit()
+        RowCountService.invalidate(Event)
+        ListCache.invalidate(session, Event)
         return True
-    
+
     @classmethod
     async def list_events(cls, session: AsyncSession, skip: int = 0, limit: int = 10) -> List[Event]:
-        query = select(Event).offset(skip).limit(limit)
+        query = select(Event).order_by(Event.created_at, Event.id).offset(skip).limit(limit)
+        result = await cls._execute_query(session, query)
+        return result.scalars().all() if result else []
+
+    @classmethod
+    async def list_events_by_cursor(cls, session: AsyncSession, limit: int = 10, cursor: Optional[Cursor] = None) -> KeysetPage:
+        """List events in (created_at, id) order starting from a keyset cursor."""
+        return await fetch_keyset_page(session, select(Event), Event.created_at, Event.id, limit, cursor)
+
+    @classmethod
+    def _list_columns(cls, fields: Optional[Sequence[str]]):
+        """LIST_COLUMNS narrowed to `fields`, keeping id and created_at for keyset cursors."""
+        if fields is None:
+            return LIST_COLUMNS
+        return (Event.id, Event.created_at, *(getattr(Event, name) for name in fields if name != "id"))
+
+    @classmethod
+    async def list_event_rows(cls, session: AsyncSession, skip: int = 0, limit: int = 10,
+                              fields: Optional[Sequence[str]] = None) -> Sequence[Row]:
+        """
+        list_events for read-only pages: just LIST_COLUMNS, or the columns of `fields`, as
+        rows rather than Event instances, so nothing is added to the identity map or
+        instrumented for change tracking.
+        """
+        query = select(*cls._list_columns(fields)).order_by(Event.created_at, Event.id).offset(skip).limit(limit)
         result = await cls._execute_query(session, query)
-        return result.scalars().all() if result else []
\ No newline at end of file
+        return result.all() if result else []
+
+    @classmethod
+    async def list_event_rows_by_cursor(cls, session: AsyncSession, limit: int = 10, cursor: Optional[Cursor] = None,
+                                        fields: Optional[Sequence[str]] = None) -> KeysetPage:
+        """list_events_by_cursor as rows, like list_event_rows."""
+        return await fetch_keyset_page(session, select(*cls._list_columns(fields)), Event.created_at, Event.id, limit, cursor)
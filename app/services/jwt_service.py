@@ -1,7 +1,12 @@
 # app/services/jwt_service.py
-from builtins import dict, str
+from builtins import classmethod, dict, float, int, isinstance, len, round, str
+import hashlib
+import secrets
+import time
+from collections import OrderedDict
 import jwt
 from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
 from settings.config import settings
 
 def create_access_token(*, data: dict, expires_delta: timedelta = None):
@@ -11,12 +16,76 @@ def create_access_token(*, data: dict, expires_delta: timedelta = None):
         to_encode['role'] = to_encode['role'].upper()
     expire = datetime.utcnow() + (expires_delta if expires_delta else timedelta(minutes=settings.access_token_expire_minutes))
     to_encode.update({"exp": expire})
+    # A unique id lets a single token be revoked before it expires.
+    to_encode.setdefault("jti", secrets.token_hex(8))
     encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
+class VerifiedTokenCache:
+    """
+    Bounded LRU of token payloads that already passed signature and claim validation.
+
+    Entries are keyed by the SHA-256 digest of the token, so raw bearer tokens are never
+    held in memory, and each entry is dropped once its `exp` passes, exactly when
+    jwt.decode would start rejecting the token. Tokens without `exp` and tokens that fail
+    validation are never cached.
+    """
+    _entries: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+    _stats: Dict[str, int] = dict.fromkeys(("hits", "misses", "evictions", "expirations"), 0)
+
+    @classmethod
+    def _key(cls, token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    @classmethod
+    def get(cls, token: str) -> Optional[dict]:
+        key = cls._key(token)
+        entry = cls._entries.get(key)
+        if entry is not None and entry[1] <= time.time():
+            del cls._entries[key]
+            cls._stats["expirations"] += 1
+            entry = None
+        if entry is None:
+            cls._stats["misses"] += 1
+            return None
+        cls._entries.move_to_end(key)
+        cls._stats["hits"] += 1
+        return dict(entry[0])
+
+    @classmethod
+    def put(cls, token: str, payload: dict):
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)) or settings.token_cache_max_entries <= 0:
+            return
+        key = cls._key(token)
+        cls._entries[key] = (dict(payload), expires_at)
+        cls._entries.move_to_end(key)
+        while len(cls._entries) > settings.token_cache_max_entries:
+            cls._entries.popitem(last=False)
+            cls._stats["evictions"] += 1
+
+    @classmethod
+    def clear(cls):
+        cls._entries.clear()
+        cls._stats = dict.fromkeys(cls._stats, 0)
+
+    @classmethod
+    def metrics(cls) -> Dict[str, object]:
+        lookups = cls._stats["hits"] + cls._stats["misses"]
+        return {
+            "size": len(cls._entries),
+            "max_entries": settings.token_cache_max_entries,
+            **cls._stats,
+            "hit_ratio": round(cls._stats["hits"] / lookups, 3) if lookups else None,
+        }
+
 def decode_token(token: str):
+    cached = VerifiedTokenCache.get(token)
+    if cached is not None:
+        return cached
     try:
         decoded = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
-        return decoded
     except jwt.PyJWTError:
         return None
+    VerifiedTokenCache.put(token, decoded)
+    return decoded
@@ -0,0 +1,178 @@
+from builtins import bool, bytes, classmethod, dict, int, len, round, sorted, str
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.dependencies import get_settings
+from app.utils.pg_notify import PgNotifier, notify
+import logging
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Session.info key holding the tables written by the session's open transaction.
+PENDING_TABLES = "list_cache_pending"
+
+
+class ListCache:
+    """
+    Serialized list endpoint responses, keyed by table, generation, role and normalized query.
+
+    Every table has a generation counter that is part of its keys. A write through the
+    services bumps the generation, so all cached pages of that table miss from then on and
+    the old entries age out. It is bumped once when the write runs and again when its
+    transaction commits, because a page read in between still shows the old rows. On
+    Postgres the commit also NOTIFYs the table name, so other workers bump theirs.
+
+    A key is taken before the page is read and the page stored under it, so a page read
+    while a write commits lands under the old generation and is never served. Entries
+    expire after `list_cache_ttl_seconds` and the least recently used are evicted to
+    stay within `list_cache_max_bytes`.
+    """
+    _entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+    _size: int = 0
+    _generations: Dict[str, int] = {}
+    _notifier: Optional[PgNotifier] = None
+    _installed: bool = False
+    _stats: Dict[str, int] = dict.fromkeys(("hits", "misses", "stores", "evictions", "invalidations", "remote_invalidations"), 0)
+
+    @classmethod
+    def install(cls):
+        if cls._installed:
+            return
+        event.listen(Session, "before_commit", cls._before_commit)
+        event.listen(Session, "after_commit", cls._after_commit)
+        event.listen(Session, "after_rollback", cls._after_rollback)
+        cls._installed = True
+
+    @classmethod
+    def key(cls, model, viewer_role: str, request: Request, **params) -> Optional[str]:
+        """
+        The cache key for a list of `model` rows requested with `params`, or None when the
+        cache is disabled. Links in the body are absolute, so the base URL is part of it.
+        Values are quoted, so a search term cannot pass for other parameters.
+        """
+        if not settings.list_cache_enabled:
+            return None
+        table = model.__tablename__
+        query = "&".join(f"{name}={quote(str(params[name]), safe='')}" for name in sorted(params) if params[name] is not None)
+        return f"{table}:{cls._generations.get(table, 0)}:{viewer_role}:{request.base_url}?{query}"
+
+    @classmethod
+    def _has_pending_writes(cls, session: AsyncSession) -> bool:
+        return bool(session.info.get(PENDING_TABLES))
+
+    @classmethod
+    async def get(cls, session: AsyncSession, key: Optional[str]) -> Optional[bytes]:
+        if key is None or cls._has_pending_writes(session):
+            return None
+        entry = cls._entries.get(key)
+        if entry is not None and entry[1] <= time.monotonic():
+            cls._drop(key)
+            entry = None
+        if entry is None:
+            cls._stats["misses"] += 1
+            return None
+        cls._entries.move_to_end(key)
+        cls._stats["hits"] += 1
+        return entry[0]
+
+    @classmethod
+    async def store(cls, session: AsyncSession, key: Optional[str], body: bytes):
+        # A session that wrote the table may be reading rows that still roll back.
+        if key is None or cls._has_pending_writes(session) or len(body) > settings.list_cache_max_bytes:
+            return
+        cls._drop(key)
+        cls._entries[key] = (body, time.monotonic() + settings.list_cache_ttl_seconds)
+        cls._size += len(body)
+        cls._stats["stores"] += 1
+        while cls._size > settings.list_cache_max_bytes:
+            cls._drop(next(iter(cls._entries)))
+            cls._stats["evictions"] += 1
+
+    @classmethod
+    def _drop(cls, key: str):
+        entry = cls._entries.pop(key, None)
+        if entry is not None:
+            cls._size -= len(entry[0])
+
+    @classmethod
+    def _bump(cls, table: str):
+        cls._generations[table] = cls._generations.get(table, 0) + 1
+
+    @classmethod
+    def invalidate(cls, session: AsyncSession, model):
+        """Stop serving cached lists of a model's table written by `session`, here and on every worker once it commits."""
+        table = model.__tablename__
+        session.info.setdefault(PENDING_TABLES, set()).add(table)
+        cls._bump(table)
+        cls._stats["invalidations"] += 1
+
+    @classmethod
+    def _before_commit(cls, session: Session):
+        tables = sorted(session.info.get(PENDING_TABLES) or ())
+        if not tables or not settings.list_cache_enabled or session.get_bind().dialect.name != "postgresql":
+            return
+        notify(session, settings.list_cache_channel, ",".join(tables))
+
+    @classmethod
+    def _after_commit(cls, session: Session):
+        for table in session.info.pop(PENDING_TABLES, None) or ():
+            cls._bump(table)
+
+    @classmethod
+    def _after_rollback(cls, session: Session):
+        session.info.pop(PENDING_TABLES, None)
+
+    @classmethod
+    async def _on_notification(cls, connection, pid: int, channel: str, payload: str):
+        tables = payload.split(",")
+        for table in tables:
+            cls._bump(table)
+        cls._stats["remote_invalidations"] += len(tables)
+
+    @classmethod
+    async def start_listener(cls, database_url: str):
+        """Subscribe to writes from other workers. Only Postgres databases support this."""
+        if not settings.list_cache_enabled or cls._notifier is not None or not database_url.startswith("postgresql"):
+            return
+        cls._notifier = PgNotifier(database_url, settings.list_cache_channel, cls._on_notification,
+                                   on_reconnect=cls.clear)
+        await cls._notifier.start()
+
+    @classmethod
+    async def stop_listener(cls):
+        if cls._notifier is not None:
+            await cls._notifier.stop()
+            cls._notifier = None
+
+    @classmethod
+    async def clear(cls):
+        cls._entries.clear()
+        cls._size = 0
+
+    @classmethod
+    def reset(cls):
+        """Forget every entry, generation and counter."""
+        cls._entries.clear()
+        cls._size = 0
+        cls._generations.clear()
+        cls._stats = dict.fromkeys(cls._stats, 0)
+
+    @classmethod
+    def metrics(cls) -> Dict[str, object]:
+        lookups = cls._stats["hits"] + cls._stats["misses"]
+        return {
+            "enabled": settings.list_cache_enabled,
+            "listening": cls._notifier is not None and cls._notifier.listening,
+            **cls._stats,
+            "hit_ratio": round(cls._stats["hits"] / lookups, 3) if lookups else None,
+            "entries": len(cls._entries),
+            "bytes": cls._size,
+            "max_bytes": settings.list_cache_max_bytes,
+            "generations": dict(cls._generations),
+        }
@@ -0,0 +1,145 @@
+from builtins import Exception, bool, classmethod, dict, int, str
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Database
+from app.dependencies import get_settings
+from app.models.user_model import User, nickname_sequence
+from app.utils.bloom_filter import BloomFilter
+from app.utils.nickname_gen import NicknamePermutation
+import logging
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# updated_at is the writing transaction's start time, so a refresh reaches this far back
+# to catch transactions that committed after a later one was already read.
+REFRESH_OVERLAP = timedelta(seconds=30)
+LOAD_BATCH = 10000
+
+
+class NicknameService:
+    """
+    Allocates generated nicknames and answers whether a nickname is still free.
+
+    Allocation: each worker reserves `nickname_block_size` counter values per nextval() on
+    nickname_seq and maps every value through a keyed permutation of the nickname space,
+    so generated nicknames never repeat and registration almost never needs a lookup. Only
+    nicknames users picked themselves can collide, and the insert retries past them.
+
+    Availability: a Bloom filter per worker holds every nickname in use. A nickname the
+    filter has never seen is free without touching the database; anything else is checked
+    with one indexed EXISTS. The filter is loaded at startup, fed by this worker's writes and
+    topped up every `nickname_filter_refresh_seconds` with rows other workers changed.
+    """
+    _permutation = NicknamePermutation(settings.secret_key.encode())
+    _next: int = 0
+    _end: int = 0
+    _filter: Optional[BloomFilter] = None
+    _loaded: bool = False
+    _watermark: Optional[datetime] = None
+    _last_refresh: Optional[float] = None
+    _poller: Optional[asyncio.Task] = None
+    _stats: Dict[str, int] = dict.fromkeys(("allocated", "blocks", "filter_negatives", "lookups", "false_positives"), 0)
+
+    @classmethod
+    async def allocate(cls, session: AsyncSession) -> str:
+        """Return a generated nickname no other call, in any worker, has returned."""
+        if cls._next >= cls._end:
+            block = (await session.execute(select(nickname_sequence.next_value()))).scalar_one()
+            # Another coroutine may have refilled the block while this one waited.
+            if cls._next >= cls._end:
+                cls._next, cls._end = (block - 1) * settings.nickname_block_size, block * settings.nickname_block_size
+                cls._stats["blocks"] += 1
+        counter = cls._next
+        cls._next += 1
+        cls._stats["allocated"] += 1
+        return cls._permutation.nickname(counter)
+
+    @classmethod
+    def filter(cls) -> BloomFilter:
+        if cls._filter is None:
+            cls._filter = BloomFilter(settings.nickname_filter_capacity, settings.nickname_filter_error_rate)
+        return cls._filter
+
+    @classmethod
+    def remember(cls, nickname: str):
+        """Record a nickname this worker just wrote."""
+        cls.filter().add(nickname)
+
+    @classmethod
+    async def is_available(cls, session: AsyncSession, nickname: str) -> bool:
+        if cls._loaded and nickname not in cls.filter():
+            cls._stats["filter_negatives"] += 1
+            return True
+        cls._stats["lookups"] += 1
+        taken = (await session.execute(select(exists().where(User.nickname == nickname)))).scalar()
+        if not taken and cls._loaded:
+            cls._stats["false_positives"] += 1
+        return not taken
+
+    @classmethod
+    async def refresh(cls, session: AsyncSession):
+        """Add nicknames written since the last refresh, or all of them on the first call."""
+        query = select(User.nickname, User.updated_at)
+        if cls._watermark is not None:
+            query = query.where(User.updated_at > cls._watermark - REFRESH_OVERLAP)
+        result = await session.stream(query.execution_options(yield_per=LOAD_BATCH))
+        bloom = cls.filter()
+        async for rows in result.partitions():
+            for row in rows:
+                bloom.add(row.nickname)
+                if cls._watermark is None or row.updated_at > cls._watermark:
+                    cls._watermark = row.updated_at
+        cls._loaded = True
+        cls._last_refresh = time.time()
+
+    @classmethod
+    async def _reload(cls):
+        async with Database.get_session_factory()() as session:
+            await cls.refresh(session)
+
+    @classmethod
+    async def _poll(cls):
+        while True:
+            await asyncio.sleep(settings.nickname_filter_refresh_seconds)
+            try:
+                await cls._reload()
+            except Exception as e:
+                logger.warning(f"Refreshing the nickname filter failed: {e}")
+
+    @classmethod
+    async def start(cls):
+        """Load the filter, then keep adding nicknames written by other workers."""
+        if cls._poller is not None:
+            return
+        await cls._reload()
+        cls._poller = asyncio.get_running_loop().create_task(cls._poll())
+
+    @classmethod
+    async def stop(cls):
+        if cls._poller is not None:
+            cls._poller.cancel()
+            cls._poller = None
+
+    @classmethod
+    def reset(cls):
+        """Forget the filter and reserved block; the filter answers nothing until refreshed again."""
+        cls._next = cls._end = 0
+        cls._filter = None
+        cls._loaded = False
+        cls._watermark = None
+        cls._last_refresh = None
+        cls._stats = dict.fromkeys(cls._stats, 0)
+
+    @classmethod
+    def metrics(cls) -> Dict[str, object]:
+        return {
+            **cls._stats,
+            "loaded": cls._loaded,
+            "last_refresh": cls._last_refresh,
+            "filter": cls.filter().stats(),
+        }
@@ -0,0 +1,89 @@
+from builtins import Exception, bool, classmethod, int, max, str
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Optional
+from app.dependencies import get_settings
+from app.utils.metrics import LatencyHistogram
+from app.utils.security import hash_password, verify_password
+import logging
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool already holds the maximum number of pending jobs."""
+
+
+class PasswordService:
+    """
+    Runs bcrypt hashing and verification off the event loop.
+
+    bcrypt is deliberately slow (~250ms at 12 rounds), so calling it inline from async code
+    stalls every other request on the worker. Jobs are submitted to a process pool sized by
+    `password_hash_workers` (0 uses the default thread pool, bcrypt releases the GIL), and
+    admission is bounded by `password_hash_max_pending`: once that many jobs are in flight,
+    new ones fail fast with PasswordHashingBusy, which the API maps to 503.
+    """
+    _executor: Optional[Executor] = None
+    _pending: int = 0
+    _rejected: int = 0
+    _hash_latency = LatencyHistogram()
+    _verify_latency = LatencyHistogram()
+
+    @classmethod
+    def _get_executor(cls) -> Optional[Executor]:
+        if cls._executor is None and settings.password_hash_workers > 0:
+            # spawn rather than fork: forking a process that already runs an event loop and
+            # a thread pool can deadlock the child.
+            cls._executor = ProcessPoolExecutor(
+                max_workers=settings.password_hash_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return cls._executor
+
+    @classmethod
+    async def _run(cls, histogram: LatencyHistogram, func, *args):
+        if cls._pending >= settings.password_hash_max_pending:
+            cls._rejected += 1
+            logger.warning("Password hashing pool saturated, rejecting request.")
+            raise PasswordHashingBusy("Password hashing capacity exhausted, retry later.")
+        cls._pending += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(cls._get_executor(), func, *args)
+        finally:
+            cls._pending -= 1
+            histogram.observe((time.perf_counter() - started) * 1000)
+
+    @classmethod
+    async def hash(cls, password: str) -> str:
+        """Hash a password with bcrypt without blocking the event loop."""
+        return await cls._run(cls._hash_latency, hash_password, password)
+
+    @classmethod
+    async def verify(cls, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against a bcrypt hash without blocking the event loop."""
+        return await cls._run(cls._verify_latency, verify_password, plain_password, hashed_password)
+
+    @classmethod
+    def metrics(cls) -> Dict[str, object]:
+        workers = settings.password_hash_workers
+        return {
+            "workers": workers,
+            "max_pending": settings.password_hash_max_pending,
+            "in_flight": cls._pending,
+            "queue_depth": max(0, cls._pending - workers) if workers > 0 else cls._pending,
+            "rejected": cls._rejected,
+            "hash_latency": cls._hash_latency.snapshot(),
+            "verify_latency": cls._verify_latency.snapshot(),
+        }
+
+    @classmethod
+    def shutdown(cls):
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
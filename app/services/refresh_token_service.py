@@ -0,0 +1,124 @@
+from builtins import classmethod, str
+import hashlib
+import hmac
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import NamedTuple, Optional
+from uuid import UUID
+from sqlalchemy import Row, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dependencies import get_settings
+from app.models.refresh_token_model import RefreshToken
+from app.models.user_model import User
+import logging
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class RefreshStatus(Enum):
+    SUCCESS = "success"
+    INVALID = "invalid"
+    REUSED = "reused"
+
+class RefreshResult(NamedTuple):
+    status: RefreshStatus
+    user: Optional[Row] = None
+    refresh_token: Optional[str] = None
+
+class RefreshTokenService:
+    """
+    Issues and rotates opaque refresh tokens so clients can renew access tokens without
+    logging in again.
+
+    A refresh costs one HMAC and two indexed statements instead of a bcrypt verify: an
+    UPDATE ... RETURNING that consumes the presented token and reads the user, and the
+    INSERT of its successor.
+    """
+
+    @classmethod
+    def _digest(cls, token: str) -> str:
+        return hmac.new(settings.jwt_secret_key.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+    @classmethod
+    async def issue(cls, session: AsyncSession, user_id: UUID, family_id: Optional[UUID] = None) -> str:
+        """Create a refresh token for the user, starting a new family unless one is given."""
+        token = secrets.token_urlsafe(32)
+        await session.execute(
+            insert(RefreshToken).values(
+                id=uuid.uuid4(),
+                user_id=user_id,
+                family_id=family_id or uuid.uuid4(),
+                token_hash=cls._digest(token),
+                expires_at=datetime.now(timezone.utc) + timedelta(minutes=settings.refresh_token_expire_minutes),
+            )
+        )
+        return token
+
+    @classmethod
+    async def rotate(cls, session: AsyncSession, token: str) -> RefreshResult:
+        """
+        Exchange a refresh token for its successor.
+
+        The token is consumed atomically, so of two concurrent refreshes with the same token
+        only one succeeds. Locked users cannot refresh. Presenting an already used token
+        means it leaked, so its whole family is revoked and REUSED is returned.
+        """
+        token_hash = cls._digest(token)
+        # Core UPDATE ... FROM users: the ORM cannot map RETURNING columns of the FROM table.
+        tokens, users = RefreshToken.__table__, User.__table__
+        query = (
+            update(tokens)
+            .where(
+                tokens.c.token_hash == token_hash,
+                tokens.c.used_at.is_(None),
+                tokens.c.revoked_at.is_(None),
+                tokens.c.expires_at > func.now(),
+                users.c.id == tokens.c.user_id,
+                users.c.is_locked.isnot(True),
+            )
+            .values(used_at=func.now())
+            .returning(tokens.c.family_id, users.c.id, users.c.email, users.c.role, users.c.token_version)
+        )
+        user = (await session.execute(query)).first()
+        if user is None:
+            return await cls._reject(session, token_hash)
+        new_token = await cls.issue(session, user.id, user.family_id)
+        return RefreshResult(RefreshStatus.SUCCESS, user, new_token)
+
+    @classmethod
+    async def _reject(cls, session: AsyncSession, token_hash: str) -> RefreshResult:
+        reused_family = select(RefreshToken.family_id).where(
+            RefreshToken.token_hash == token_hash, RefreshToken.used_at.isnot(None)
+        )
+        query = (
+            update(RefreshToken)
+            .where(RefreshToken.family_id.in_(reused_family), RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+            .returning(RefreshToken.user_id)
+        )
+        revoked = (await session.execute(query)).first()
+        if revoked is None:
+            return RefreshResult(RefreshStatus.INVALID)
+        logger.warning(f"Refresh token reuse detected for user {revoked.user_id}; revoked its token family.")
+        return RefreshResult(RefreshStatus.REUSED)
+
+    @classmethod
+    async def revoke_user(cls, session: AsyncSession, user_id: UUID):
+        """Revoke every outstanding refresh token of the user, e.g. after a password reset."""
+        await session.execute(
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+        )
+
+    @classmethod
+    async def revoke(cls, session: AsyncSession, token: str):
+        """Revoke a refresh token together with every other token from the same login."""
+        family = select(RefreshToken.family_id).where(RefreshToken.token_hash == cls._digest(token))
+        await session.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id.in_(family), RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+        )
@@ -0,0 +1,214 @@
+from builtins import Exception, bool, classmethod, dict, float, int, len, max, str
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Database
+from app.models.token_revocation_model import TokenRevocation
+from app.models.user_model import User
+from app.utils.pg_notify import PgNotifier, notify, notify_expression
+from settings.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+
+class RevocationService:
+    """
+    Revokes access tokens before their `exp` and answers, per request, whether a token
+    was revoked.
+
+    - Per user: users.token_version is bumped and tokens carrying an older `ver` claim are
+      rejected. Used when a user's role or email changes, or the user is deleted, locked
+      or resets their password.
+    - Per token: a single `jti` is rejected, e.g. after logout.
+
+    Every revocation is also recorded in token_revocations. Each worker holds the
+    unexpired rows in two dicts (user id -> lowest accepted version, jti -> expiry), so
+    checking a token is two dict lookups with no database round trip. The dicts are
+    updated right away from NOTIFY messages sent on commit and re-read incrementally every
+    `revocation_refresh_seconds` in case a message was missed.
+    """
+    _versions: Dict[str, Tuple[int, float]] = {}
+    _jtis: Dict[str, float] = {}
+    _watermark: Optional[datetime] = None
+    _last_refresh: Optional[float] = None
+    _poller: Optional[asyncio.Task] = None
+    _notifier: Optional[PgNotifier] = None
+
+    @classmethod
+    def is_revoked(cls, payload: dict) -> bool:
+        jti = payload.get("jti")
+        if jti is not None and jti in cls._jtis:
+            return True
+        entry = cls._versions.get(payload.get("uid"))
+        return entry is not None and payload.get("ver", 0) < entry[0]
+
+    @classmethod
+    def _apply_version(cls, user_id: str, version: int, expires_at: float):
+        current = cls._versions.get(user_id)
+        if current is None or version > current[0] or (version == current[0] and expires_at > current[1]):
+            cls._versions[user_id] = (version, expires_at)
+
+    @classmethod
+    def _apply_jti(cls, jti: str, expires_at: float):
+        cls._jtis[jti] = max(expires_at, cls._jtis.get(jti, 0.0))
+
+    @classmethod
+    def _prune(cls):
+        now = time.time()
+        cls._versions = {user_id: entry for user_id, entry in cls._versions.items() if entry[1] > now}
+        cls._jtis = {jti: expires_at for jti, expires_at in cls._jtis.items() if expires_at > now}
+
+    @classmethod
+    async def refresh(cls, session: AsyncSession):
+        """
+        Read revocations recorded since the last refresh.
+
+        Rows are selected by created_at, which is the writing transaction's start time, so
+        the window reaches `revocation_overlap_seconds` back to catch transactions that
+        committed after a later one was already read. Re-applying a row is harmless.
+        """
+        query = select(
+            TokenRevocation.user_id, TokenRevocation.token_version, TokenRevocation.jti,
+            TokenRevocation.expires_at, TokenRevocation.created_at,
+        ).where(TokenRevocation.expires_at > func.now())
+        if cls._watermark is not None:
+            query = query.where(TokenRevocation.created_at > cls._watermark - timedelta(seconds=settings.revocation_overlap_seconds))
+        rows = (await session.execute(query)).all()
+        for row in rows:
+            if row.jti is not None:
+                cls._apply_jti(row.jti, row.expires_at.timestamp())
+            else:
+                cls._apply_version(str(row.user_id), row.token_version, row.expires_at.timestamp())
+            if cls._watermark is None or row.created_at > cls._watermark:
+                cls._watermark = row.created_at
+        cls._prune()
+        cls._last_refresh = time.time()
+
+    @classmethod
+    def _clear_expired(cls):
+        """
+        A DELETE of the revocations that no longer revoke anything. Revocations are rare, so
+        whoever writes one also clears these, instead of a periodic job.
+        """
+        revocations = TokenRevocation.__table__
+        return delete(revocations).where(revocations.c.expires_at < func.now())
+
+    @classmethod
+    def record_versions(cls, revoked, session: AsyncSession):
+        """
+        A SELECT over `revoked`, a CTE of a data-modifying statement returning at least `id`
+        and the new `token_version` of each revoked user, that also records the revocations.
+
+        Recording them takes no further round trips: the INSERT into token_revocations, the
+        DELETE of expired rows and the NOTIFY to other workers all run in the same
+        statement. The rows selected are those of `revoked`, plus `revocation_expires_at`.
+        """
+        revocations = TokenRevocation.__table__
+        # Older tokens can outlive the bump by at most one access token lifetime.
+        expires_at = func.now() + timedelta(minutes=settings.access_token_expire_minutes)
+        recorded = (
+            insert(revocations)
+            .from_select(["user_id", "token_version", "expires_at"], select(revoked.c.id, revoked.c.token_version, expires_at))
+            .returning(revocations.c.user_id, revocations.c.expires_at)
+            .cte("recorded")
+        )
+        cleared = cls._clear_expired().cte("cleared")
+        query = (
+            select(*revoked.c, recorded.c.expires_at.label("revocation_expires_at"))
+            .join_from(revoked, recorded, revoked.c.id == recorded.c.user_id)
+            .add_cte(cleared)
+        )
+        if session.bind.dialect.name == "postgresql":
+            payload = func.concat("v:", revoked.c.id, ":", revoked.c.token_version, ":", func.extract("epoch", recorded.c.expires_at))
+            query = query.add_columns(notify_expression(settings.revocation_channel, payload).label("notified"))
+        return query
+
+    @classmethod
+    async def revoke_user(cls, session: AsyncSession, user_id: UUID) -> Optional[int]:
+        """Reject every access token issued to the user so far. Returns the new token version."""
+        users = User.__table__
+        bumped = (
+            update(users)
+            .where(users.c.id == user_id)
+            .values(token_version=users.c.token_version + 1)
+            .returning(users.c.id, users.c.token_version)
+            .cte("bumped")
+        )
+        row = (await session.execute(cls.record_versions(bumped, session))).first()
+        return row.token_version if row is not None else None
+
+    @classmethod
+    async def revoke_token(cls, session: AsyncSession, jti: str, expires_at: float):
+        """Reject a single access token until its `exp`."""
+        query = insert(TokenRevocation).values(jti=jti, expires_at=datetime.fromtimestamp(expires_at, timezone.utc))
+        await session.execute(query)
+        await session.execute(cls._clear_expired())
+        if session.bind.dialect.name == "postgresql":
+            await notify(session, settings.revocation_channel, f"j:{jti}:{expires_at}")
+
+    @classmethod
+    async def _on_notification(cls, connection, pid: int, channel: str, payload: str):
+        kind, *fields = payload.split(":")
+        if kind == "v":
+            user_id, version, expires_at = fields
+            cls._apply_version(user_id, int(version), float(expires_at))
+        elif kind == "j":
+            jti, expires_at = fields
+            cls._apply_jti(jti, float(expires_at))
+
+    @classmethod
+    async def _reload(cls):
+        async with Database.get_session_factory()() as session:
+            await cls.refresh(session)
+
+    @classmethod
+    async def _poll(cls):
+        while True:
+            await asyncio.sleep(settings.revocation_refresh_seconds)
+            try:
+                await cls._reload()
+            except Exception as e:
+                logger.warning(f"Refreshing token revocations failed: {e}")
+
+    @classmethod
+    async def start(cls, database_url: str):
+        """Load current revocations, then keep them fresh from NOTIFY and periodic refreshes."""
+        if cls._poller is not None:
+            return
+        await cls._reload()
+        cls._poller = asyncio.get_running_loop().create_task(cls._poll())
+        if database_url.startswith("postgresql"):
+            cls._notifier = PgNotifier(database_url, settings.revocation_channel, cls._on_notification,
+                                       on_reconnect=cls._reload)
+            await cls._notifier.start()
+
+    @classmethod
+    async def stop(cls):
+        if cls._poller is not None:
+            cls._poller.cancel()
+            cls._poller = None
+        if cls._notifier is not None:
+            await cls._notifier.stop()
+            cls._notifier = None
+
+    @classmethod
+    def reset(cls):
+        cls._versions = {}
+        cls._jtis = {}
+        cls._watermark = None
+        cls._last_refresh = None
+
+    @classmethod
+    def metrics(cls) -> Dict[str, object]:
+        return {
+            "revoked_users": len(cls._versions),
+            "revoked_tokens": len(cls._jtis),
+            "last_refresh": cls._last_refresh,
+            "listening": cls._notifier is not None and cls._notifier.listening,
+        }
@@ -0,0 +1,253 @@
+from builtins import NotImplementedError, bool, classmethod, dict, float, int, len, range, round, str
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.dependencies import get_settings
+from app.models.user_model import User
+from app.utils.pg_notify import PgNotifier, notify
+import logging
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Session.info key holding the ids of users written by the session's open transaction.
+PENDING_INVALIDATIONS = "user_cache_pending"
+# NOTIFY payloads are capped at 8000 bytes; 200 comma separated UUIDs stay well below that.
+NOTIFY_BATCH = 200
+
+
+class UserCacheBackend:
+    """
+    Storage for cached users. Values are plain dicts of column values, so a backend only has
+    to store and expire them; lookups, aliases and invalidation live in UserCache.
+
+    Only MemoryUserCacheBackend ships. A store shared between workers (e.g. Redis, which this
+    project does not depend on) would implement this interface and be passed to
+    UserCache.configure(); until then each worker warms its own cache, and the workers' caches
+    are kept coherent by LISTEN/NOTIFY invalidation.
+    """
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    async def delete(self, *keys: str):
+        raise NotImplementedError
+
+    async def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+class MemoryUserCacheBackend(UserCacheBackend):
+    """A per-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "max_entries": self.max_entries, "evictions": self.evictions}
+
+
+class UserCache:
+    """
+    Read-through cache for single-user lookups by id, email or nickname.
+
+    A user is stored once under its id, with email and nickname keys pointing at the id.
+    Writes invalidate the id locally straight away and remember it on the session; when the
+    transaction commits, the ids are broadcast with NOTIFY so every worker listening on the
+    channel drops them too. Until then the writing session bypasses the cache, so data that
+    may still roll back is never cached.
+    """
+    _backend: Optional[UserCacheBackend] = None
+    _notifier: Optional[PgNotifier] = None
+    _installed: bool = False
+    _stats: Dict[str, int] = dict.fromkeys(("hits", "misses", "invalidations", "remote_invalidations"), 0)
+
+    @classmethod
+    def backend(cls) -> Optional[UserCacheBackend]:
+        """The configured backend, or None when the cache is disabled."""
+        if cls._backend is None and settings.user_cache_backend == "memory":
+            cls._backend = MemoryUserCacheBackend(settings.user_cache_max_entries)
+        return cls._backend
+
+    @classmethod
+    def configure(cls, backend: Optional[UserCacheBackend]):
+        """Use `backend` instead of the one chosen by the user_cache_backend setting."""
+        cls._backend = backend
+
+    @classmethod
+    def install(cls):
+        if cls._installed:
+            return
+        event.listen(Session, "before_commit", cls._before_commit)
+        event.listen(Session, "after_commit", cls._after_transaction)
+        event.listen(Session, "after_rollback", cls._after_transaction)
+        cls._installed = True
+
+    @classmethod
+    def column_keys(cls) -> List[str]:
+        return [attr.key for attr in User.__mapper__.column_attrs]
+
+    @classmethod
+    def _has_pending_writes(cls, session: AsyncSession) -> bool:
+        return bool(session.info.get(PENDING_INVALIDATIONS))
+
+    @classmethod
+    async def peek(cls, session: AsyncSession, field: str, value) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached column values of the user whose `field` (id, email or nickname)
+        equals `value`, for callers that need a column or two rather than a User.
+        """
+        backend = cls.backend()
+        if backend is None or cls._has_pending_writes(session):
+            return None
+        if field == "id":
+            snapshot = await backend.get(f"id:{value}")
+        else:
+            user_id = await backend.get(f"{field}:{value}")
+            snapshot = await backend.get(f"id:{user_id}") if user_id else None
+            # The alias may outlive a change of email or nickname.
+            if snapshot is not None and snapshot[field] != value:
+                snapshot = None
+        cls._stats["misses" if snapshot is None else "hits"] += 1
+        return snapshot
+
+    @classmethod
+    async def get(cls, session: AsyncSession, field: str, value) -> Optional[User]:
+        """Return the cached user whose `field` (id, email or nickname) equals `value`, attached to `session`."""
+        snapshot = await cls.peek(session, field, value)
+        if snapshot is None:
+            return None
+        user = User()
+        for key, column_value in snapshot.items():
+            setattr(user, key, column_value)
+        make_transient_to_detached(user)
+        return await session.merge(user, load=False)
+
+    @classmethod
+    async def store(cls, session: AsyncSession, user: User):
+        backend = cls.backend()
+        if backend is None or cls._has_pending_writes(session):
+            return
+        loaded = inspect(user).dict
+        keys = cls.column_keys()
+        if any(key not in loaded for key in keys):
+            return  # Expired attributes would need another query to snapshot.
+        await cls.store_snapshot(session, {key: loaded[key] for key in keys})
+
+    @classmethod
+    async def store_snapshot(cls, session: AsyncSession, snapshot: Dict[str, Any]):
+        """Cache a user given as the values of all its columns, e.g. read without the ORM."""
+        backend = cls.backend()
+        if backend is None or cls._has_pending_writes(session):
+            return
+        ttl = settings.user_cache_ttl_seconds
+        user_id = str(snapshot["id"])
+        await backend.set(f"id:{user_id}", snapshot, ttl)
+        await backend.set(f"email:{snapshot['email']}", user_id, ttl)
+        await backend.set(f"nickname:{snapshot['nickname']}", user_id, ttl)
+
+    @classmethod
+    async def invalidate(cls, session: AsyncSession, user_id):
+        """Drop a user written by `session` here now, and on every worker once the session commits."""
+        user_id = str(user_id)
+        session.info.setdefault(PENDING_INVALIDATIONS, set()).add(user_id)
+        backend = cls.backend()
+        if backend is not None:
+            await backend.delete(f"id:{user_id}")
+            cls._stats["invalidations"] += 1
+
+    @classmethod
+    def _before_commit(cls, session: Session):
+        user_ids = sorted(session.info.get(PENDING_INVALIDATIONS) or ())
+        if not user_ids or cls.backend() is None or session.get_bind().dialect.name != "postgresql":
+            return
+        for start in range(0, len(user_ids), NOTIFY_BATCH):
+            notify(session, settings.user_cache_channel, ",".join(user_ids[start:start + NOTIFY_BATCH]))
+
+    @classmethod
+    def _after_transaction(cls, session: Session):
+        session.info.pop(PENDING_INVALIDATIONS, None)
+
+    @classmethod
+    async def _on_notification(cls, connection, pid: int, channel: str, payload: str):
+        backend = cls.backend()
+        if backend is None:
+            return
+        user_ids = payload.split(",")
+        await backend.delete(*(f"id:{user_id}" for user_id in user_ids))
+        cls._stats["remote_invalidations"] += len(user_ids)
+
+    @classmethod
+    async def start_listener(cls, database_url: str):
+        """Subscribe to invalidations from other workers. Only Postgres databases support this."""
+        if cls.backend() is None or cls._notifier is not None or not database_url.startswith("postgresql"):
+            return
+        cls._notifier = PgNotifier(database_url, settings.user_cache_channel, cls._on_notification,
+                                   on_reconnect=cls.clear)
+        await cls._notifier.start()
+
+    @classmethod
+    async def stop_listener(cls):
+        if cls._notifier is not None:
+            await cls._notifier.stop()
+            cls._notifier = None
+
+    @classmethod
+    async def clear(cls):
+        backend = cls.backend()
+        if backend is not None:
+            await backend.clear()
+
+    @classmethod
+    def reset(cls):
+        """Forget the backend and counters; the next lookup starts from an empty cache."""
+        cls._backend = None
+        cls._stats = dict.fromkeys(cls._stats, 0)
+
+    @classmethod
+    def metrics(cls) -> Dict[str, object]:
+        backend = cls.backend()
+        lookups = cls._stats["hits"] + cls._stats["misses"]
+        return {
+            "enabled": backend is not None,
+            "listening": cls._notifier is not None and cls._notifier.listening,
+            **cls._stats,
+            "hit_ratio": round(cls._stats["hits"] / lookups, 3) if lookups else None,
+            **(backend.stats() if backend is not None else {}),
+        }
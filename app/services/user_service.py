@@ -1,31 +1,88 @@
-from builtins import Exception, bool, classmethod, int, str
+from builtins import Exception, bool, classmethod, dict, getattr, int, len, range, str
 from datetime import datetime, timezone
+import html
 import secrets
-from typing import Optional, Dict, List
+from enum import Enum
+from typing import Any, NamedTuple, Optional, Dict, List, Sequence
 from pydantic import ValidationError
-from sqlalchemy import func, null, update, select
+from sqlalchemy import Float, Row, any_, bindparam, case, cast, delete, exists, func, literal, null, or_, true, tuple_, update, select
+from sqlalchemy.dialects.postgresql import ARRAY, REGCONFIG, insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 from app.dependencies import get_email_service, get_settings
-from app.models.user_model import User
+from app.models.user_model import BIO_SEARCH_CONFIG, User
 from app.schemas.user_schemas import UserCreate, UserUpdate
-from app.utils.nickname_gen import generate_nickname
-from app.utils.security import generate_verification_token, hash_password, verify_password
-from uuid import UUID
+from app.utils.etag import PreconditionFailed
+from app.utils.pagination import Cursor, KeysetPage, RankCursor, encode_rank_cursor, fetch_keyset_page
+from app.utils.security import generate_verification_token
+from uuid import UUID, uuid4
+from app.services.count_service import RowCountService
+from app.services.email_filter import EmailFilter
 from app.services.email_service import EmailService
+from app.services.list_cache import ListCache
+from app.services.nickname_service import NicknameService
+from app.services.password_service import PasswordHashingBusy, PasswordService
+from app.services.refresh_token_service import RefreshTokenService
+from app.services.revocation_service import RevocationService
+from app.services.user_cache import UserCache
 from app.models.user_model import UserRole
 import logging
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Generated nicknames only collide with ones users picked themselves.
+NICKNAME_ATTEMPTS = 10
+
+# Changing any of these invalidates the claims of access tokens already issued.
+TOKEN_CLAIM_FIELDS = {"email", "role", "hashed_password"}
+
+# What a user list renders: the UserResponse fields, plus created_at for keyset cursors.
+LIST_COLUMNS = (
+    User.id, User.email, User.nickname, User.first_name, User.last_name, User.bio, User.profile_picture_url,
+    User.linkedin_profile_url, User.github_profile_url, User.role, User.is_professional, User.created_at,
+)
+# A whole user row: every mapped column, leaving out the bio search vector.
+ROW_COLUMNS = tuple(User.__mapper__.columns)
+
+# Bio search snippets wrap matches in these; everything else in them is escaped.
+HIGHLIGHT_START, HIGHLIGHT_STOP = "<mark>", "</mark>"
+HEADLINE_OPTIONS = f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxFragments=2, MinWords=5, MaxWords=20"
+
+class LoginStatus(Enum):
+    SUCCESS = "success"
+    INVALID_CREDENTIALS = "invalid_credentials"
+    LOCKED = "locked"
+
+class LoginResult(NamedTuple):
+    status: LoginStatus
+    user: Optional[Row] = None
+
+class CreateStatus(Enum):
+    CREATED = "created"
+    EMAIL_TAKEN = "email_taken"
+    NO_FREE_NICKNAME = "no_free_nickname"
+    INVALID = "invalid"
+
+class CreateResult(NamedTuple):
+    status: CreateStatus
+    user: Optional[User] = None
+
+class SearchMatch(str, Enum):
+    """Where a user search term may occur in the searched columns."""
+    PREFIX = "prefix"
+    SUBSTRING = "substring"
+
+# Searched case-insensitively. Each has a lower(column) pattern index for prefix search,
+# and a trigram index for substring search where pg_trgm is installed.
+SEARCH_COLUMNS = (User.email, User.nickname, User.first_name, User.last_name)
+
 class UserService:
     @classmethod
     async def _execute_query(cls, session: AsyncSession, query):
         try:
-            result = await session.execute(query)
-            await session.commit()
-            return result
+            return await session.execute(query)
         except SQLAlchemyError as e:
             logger.error(f"Database error: {e}")
             await session.rollback()
@@ -37,144 +94,460 @@ class UserService:
         result = await cls._execute_query(session, query)
         return result.scalars().first() if result else None
 
+    @classmethod
+    async def _fetch_cached_user(cls, session: AsyncSession, field: str, value) -> Optional[User]:
+        user = await UserCache.get(session, field, value)
+        if user is None:
+            user = await cls._fetch_user(session, **{field: value})
+            if user is not None:
+                await UserCache.store(session, user)
+        return user
+
+    @classmethod
+    async def _attach(cls, session: AsyncSession, row: Row) -> User:
+        """Turn a row RETURNed by a write into a User in the session, without loading it again."""
+        user = User(**{key: row._mapping[key] for key in UserCache.column_keys()})
+        make_transient_to_detached(user)
+        return await session.merge(user, load=False)
+
+    @classmethod
+    async def _exists(cls, session: AsyncSession, user_id: UUID) -> bool:
+        return bool((await session.execute(select(exists().where(User.id == user_id)))).scalar())
+
     @classmethod
     async def get_by_id(cls, session: AsyncSession, user_id: UUID) -> Optional[User]:
-        return await cls._fetch_user(session, id=user_id)
+        return await cls._fetch_cached_user(session, "id", user_id)
+
+    @classmethod
+    async def get_row(cls, session: AsyncSession, user_id: UUID, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        The user's column values as a dict, for rendering rather than changing it: from the
+        cache if it holds the user, else with a Core SELECT that builds no User instance.
+
+        With `fields`, a cache miss selects only those columns and the version, and leaves
+        the cache alone since it only holds whole rows.
+        """
+        snapshot = await UserCache.peek(session, "id", user_id)
+        if snapshot is not None:
+            return snapshot
+        columns = ROW_COLUMNS if fields is None else (User.version, *(getattr(User, name) for name in fields))
+        result = await cls._execute_query(session, select(*columns).where(User.id == user_id))
+        row = result.first() if result else None
+        if row is None:
+            return None
+        snapshot = dict(row._mapping)
+        if fields is None:
+            await UserCache.store_snapshot(session, snapshot)
+        return snapshot
+
+    @classmethod
+    async def get_rows(cls, session: AsyncSession, user_ids: Sequence[UUID],
+                       fields: Optional[Sequence[str]] = None) -> Dict[UUID, Dict[str, Any]]:
+        """
+        get_row for many users: cached users first, then one `id = ANY(:ids)` SELECT for the
+        rest. Users that do not exist are left out of the result.
+        """
+        rows = {}
+        for user_id in user_ids:
+            snapshot = await UserCache.peek(session, "id", user_id)
+            if snapshot is not None:
+                rows[user_id] = snapshot
+        misses = [user_id for user_id in user_ids if user_id not in rows]
+        if not misses:
+            return rows
+        columns = ROW_COLUMNS if fields is None else (User.id, *(getattr(User, name) for name in fields if name != "id"))
+        query = select(*columns).where(User.id == any_(bindparam("ids", misses, type_=ARRAY(User.id.type))))
+        result = await cls._execute_query(session, query)
+        for row in result.all() if result else ():
+            snapshot = dict(row._mapping)
+            if fields is None:
+                await UserCache.store_snapshot(session, snapshot)
+            rows[row.id] = snapshot
+        return rows
+
+    @classmethod
+    async def get_version(cls, session: AsyncSession, user_id: UUID) -> Optional[int]:
+        """The user's row version, from the cache if it holds the user, else with a one-column SELECT."""
+        snapshot = await UserCache.peek(session, "id", user_id)
+        if snapshot is not None:
+            return snapshot["version"]
+        result = await cls._execute_query(session, select(User.version).where(User.id == user_id))
+        return result.scalar() if result else None
 
     @classmethod
     async def get_by_nickname(cls, session: AsyncSession, nickname: str) -> Optional[User]:
-        return await cls._fetch_user(session, nickname=nickname)
+        return await cls._fetch_cached_user(session, "nickname", nickname)
 
     @classmethod
     async def get_by_email(cls, session: AsyncSession, email: str) -> Optional[User]:
-        return await cls._fetch_user(session, email=email)
+        return await cls._fetch_cached_user(session, "email", email)
 
     @classmethod
-    async def create(cls, session: AsyncSession, user_data: Dict[str, str], email_service: EmailService) -> Optional[User]:
+    def _insert_user_query(cls, user_data: Dict[str, str], nickname: str, verification_token: str):
+        """
+        One statement that inserts the user unless the email or nickname is taken, and reports
+        whether the email was already registered. A successful insert also NOTIFYs other
+        workers' email filters.
+
+        The email check runs in the same snapshot as the INSERT's CTE, so it only sees rows
+        that existed before it. The first user is recognised by an EXISTS probe, which stops
+        at the first row instead of counting the table.
+        """
+        users = User.__table__
+        is_first_user = ~exists(select(users.c.id))
+        role_type = users.c.role.type
+        values = {
+            **user_data,
+            "id": uuid4(),
+            "nickname": nickname,
+            "role": case((is_first_user, literal(UserRole.ADMIN, role_type)), else_=literal(UserRole.ANONYMOUS, role_type)),
+            "email_verified": is_first_user,
+            "verification_token": case((is_first_user, null()), else_=literal(verification_token)),
+        }
+        inserted = (
+            pg_insert(users).values(**values)
+            .on_conflict_do_nothing()
+            .returning(*ROW_COLUMNS)
+            .cte("inserted")
+        )
+        email_taken = exists(select(users.c.id).where(users.c.email == user_data["email"]))
+        # Outer join against a one-row subquery, so a skipped insert still yields a row.
+        one_row = select(literal(1)).subquery("one_row")
+        columns = [email_taken.label("email_taken"), *inserted.c]
+        if settings.email_filter_enabled:
+            columns.append(case((inserted.c.id.isnot(None), EmailFilter.announce(user_data["email"]))).label("announced"))
+        return select(*columns).select_from(one_row.outerjoin(inserted, true()))
+
+    @classmethod
+    async def add_user(cls, session: AsyncSession, user_data: Dict[str, str], email_service: EmailService) -> CreateResult:
+        """
+        Register a user in a single INSERT round trip, reporting why when it is not created.
+
+        Unique indexes enforce email and nickname uniqueness through ON CONFLICT DO NOTHING
+        instead of lookups beforehand. A duplicate email is reported as EMAIL_TAKEN without a
+        further query. Nicknames come from NicknameService.allocate, and one a user already
+        picked is retried with the next, up to NICKNAME_ATTEMPTS times (NO_FREE_NICKNAME).
+        """
         try:
             validated_data = UserCreate(**user_data).model_dump()
-            existing_user = await cls.get_by_email(session, validated_data['email'])
-            if existing_user:
-                logger.error("User with given email already exists.")
-                return None
-            validated_data['hashed_password'] = hash_password(validated_data.pop('password'))
-            new_user = User(**validated_data)
-            new_nickname = generate_nickname()
-            while await cls.get_by_nickname(session, new_nickname):
-                new_nickname = generate_nickname()
-            new_user.nickname = new_nickname
-            logger.info(f"User Role: {new_user.role}")
-            user_count = await cls.count(session)
-            new_user.role = UserRole.ADMIN if user_count == 0 else UserRole.ANONYMOUS            
-            if new_user.role == UserRole.ADMIN:
-                new_user.email_verified = True
+            validated_data['hashed_password'] = await PasswordService.hash(validated_data.pop('password'))
+            verification_token = generate_verification_token()
+            for _ in range(NICKNAME_ATTEMPTS):
+                query = cls._insert_user_query(validated_data, await NicknameService.allocate(session), verification_token)
+                row = (await session.execute(query)).first()
+                if row.id is not None:
+                    break
+                if row.email_taken:
+                    logger.error("User with given email already exists.")
+                    return CreateResult(CreateStatus.EMAIL_TAKEN)
             else:
-                new_user.verification_token = generate_verification_token()
-            session.add(new_user)
-            await session.commit()
+                logger.error(f"No free nickname found in {NICKNAME_ATTEMPTS} attempts.")
+                return CreateResult(CreateStatus.NO_FREE_NICKNAME)
+            new_user = await cls._attach(session, row)
+            RowCountService.invalidate(User)
+            ListCache.invalidate(session, User)
+            NicknameService.remember(new_user.nickname)
+            EmailFilter.remember(new_user.email)
             # Send verification email after creting the user only if the user is not yet verified.
             if new_user.email_verified == False:
                 await email_service.send_verification_email(new_user)
-            return new_user
+            return CreateResult(CreateStatus.CREATED, new_user)
         except ValidationError as e:
             logger.error(f"Validation error during user creation: {e}")
-            return None
+            return CreateResult(CreateStatus.INVALID)
+
+    @classmethod
+    async def create(cls, session: AsyncSession, user_data: Dict[str, str], email_service: EmailService) -> Optional[User]:
+        """Register a user and return it, or None if it was not created (see add_user for why)."""
+        return (await cls.add_user(session, user_data, email_service)).user
 
     @classmethod
-    async def update(cls, session: AsyncSession, user_id: UUID, update_data: Dict[str, str]) -> Optional[User]:
+    async def update(cls, session: AsyncSession, user_id: UUID, update_data: Dict[str, str],
+                     expected_versions: Optional[List[int]] = None) -> Optional[User]:
+        """
+        Apply the fields set in `update_data` with one UPDATE ... RETURNING.
+
+        Changing a token claim also bumps token_version and records the revocation, and a
+        new email is announced to other workers' email filters, all in the same statement.
+        With `expected_versions` (from If-Match) the UPDATE only applies while the row is at
+        one of them; otherwise PreconditionFailed is raised.
+        """
         try:
-            # validated_data = UserUpdate(**update_data).dict(exclude_unset=True)
             validated_data = UserUpdate(**update_data).model_dump(exclude_unset=True)
 
             if 'password' in validated_data:
-                validated_data['hashed_password'] = hash_password(validated_data.pop('password'))
-            query = update(User).where(User.id == user_id).values(**validated_data).execution_options(synchronize_session="fetch")
-            await cls._execute_query(session, query)
-            updated_user = await cls.get_by_id(session, user_id)
-            if updated_user:
-                session.refresh(updated_user)  # Explicitly refresh the updated user object
-                logger.info(f"User {user_id} updated successfully.")
-                return updated_user
-            else:
-                logger.error(f"User {user_id} not found after update attempt.")
-            return None
+                validated_data['hashed_password'] = await PasswordService.hash(validated_data.pop('password'))
+            users = User.__table__
+            statement = update(users).where(users.c.id == user_id).values(**validated_data)
+            if expected_versions is not None:
+                statement = statement.where(users.c.version.in_(expected_versions))
+            revoke = bool(validated_data.keys() & TOKEN_CLAIM_FIELDS)
+            if revoke:
+                # Outstanding access tokens carry the old identity or role.
+                statement = statement.values(token_version=users.c.token_version + 1)
+            updated = statement.returning(*ROW_COLUMNS).cte("updated")
+            query = RevocationService.record_versions(updated, session) if revoke else select(updated)
+            if 'email' in validated_data and settings.email_filter_enabled:
+                query = query.add_columns(EmailFilter.announce(validated_data['email']).label("announced"))
+            result = await cls._execute_query(session, query)
+            row = result.first() if result else None
+            if row is None:
+                if expected_versions is not None and await cls._exists(session, user_id):
+                    raise PreconditionFailed("User was modified since it was read")
+                logger.error(f"User {user_id} not found for update.")
+                return None
+            await UserCache.invalidate(session, user_id)
+            ListCache.invalidate(session, User)
+            if 'nickname' in validated_data:
+                NicknameService.remember(validated_data['nickname'])
+            if 'email' in validated_data:
+                EmailFilter.remember(validated_data['email'])
+                EmailFilter.mark_stale()  # the replaced email stays in the filter
+            logger.info(f"User {user_id} updated successfully.")
+            return await cls._attach(session, row)
+        except (PasswordHashingBusy, PreconditionFailed):
+            raise
         except Exception as e:  # Broad exception handling for debugging
             logger.error(f"Error during user update: {e}")
             return None
 
     @classmethod
     async def delete(cls, session: AsyncSession, user_id: UUID) -> bool:
-        user = await cls.get_by_id(session, user_id)
-        if not user:
+        """Delete the user and revoke their tokens in one statement."""
+        users = User.__table__
+        deleted = (
+            delete(users)
+            .where(users.c.id == user_id)
+            .returning(users.c.id, (users.c.token_version + 1).label("token_version"))
+            .cte("deleted")
+        )
+        result = await cls._execute_query(session, RevocationService.record_versions(deleted, session))
+        if result is None or result.first() is None:
             logger.info(f"User with ID {user_id} not found.")
             return False
-        await session.delete(user)
-        await session.commit()
+        await UserCache.invalidate(session, user_id)
+        RowCountService.invalidate(User)
+        ListCache.invalidate(session, User)
+        EmailFilter.mark_stale()
         return True
 
     @classmethod
     async def list_users(cls, session: AsyncSession, skip: int = 0, limit: int = 10) -> List[User]:
-        query = select(User).offset(skip).limit(limit)
+        query = select(User).order_by(User.created_at, User.id).offset(skip).limit(limit)
         result = await cls._execute_query(session, query)
         return result.scalars().all() if result else []
 
+    @classmethod
+    async def list_users_by_cursor(cls, session: AsyncSession, limit: int = 10, cursor: Optional[Cursor] = None) -> KeysetPage:
+        """List users in (created_at, id) order starting from a keyset cursor."""
+        return await fetch_keyset_page(session, select(User), User.created_at, User.id, limit, cursor)
+
+    @classmethod
+    def filter_criteria(cls, search: Optional[str] = None, match: SearchMatch = SearchMatch.PREFIX,
+                        role: Optional[UserRole] = None, is_locked: Optional[bool] = None,
+                        email_verified: Optional[bool] = None, is_professional: Optional[bool] = None) -> List:
+        """
+        WHERE criteria for a user search and the given filters, each left out when None.
+
+        `search` matches the start (or with SearchMatch.SUBSTRING, any part) of any of
+        SEARCH_COLUMNS, ignoring case. The state filters compare with `=`, so Postgres
+        matches them to the partial indexes on is_locked, NOT email_verified and
+        is_professional.
+        """
+        criteria = []
+        if search:
+            pattern = search.lower().replace("/", "//").replace("%", "/%").replace("_", "/_")
+            pattern = f"{pattern}%" if match is SearchMatch.PREFIX else f"%{pattern}%"
+            criteria.append(or_(*(func.lower(column).like(pattern, escape="/") for column in SEARCH_COLUMNS)))
+        if role is not None:
+            criteria.append(User.role == role)
+        for column, value in ((User.is_locked, is_locked), (User.email_verified, email_verified), (User.is_professional, is_professional)):
+            if value is not None:
+                criteria.append(column == value)
+        return criteria
+
+    @classmethod
+    async def search_bios(cls, session: AsyncSession, terms: str, limit: int = 10,
+                          cursor: Optional[RankCursor] = None) -> KeysetPage:
+        """
+        Users whose bio matches `terms`, in web search syntax ("quoted phrases", or, -word),
+        best match first, with a highlighted snippet of each bio.
+
+        The match is answered by the GIN index on the generated bio_tsv column, and ranks
+        and snippets are computed by Postgres; Postgres defers the costly ts_headline to
+        the rows left after the sort and limit. Pages continue from a (rank, id) cursor, so
+        the next page only ranks the matches below it.
+        """
+        config = cast(BIO_SEARCH_CONFIG, REGCONFIG)
+        bio_tsv = User.__table__.c.bio_tsv
+        tsquery = func.websearch_to_tsquery(config, terms)
+        rank = func.ts_rank_cd(bio_tsv, tsquery, type_=Float)
+        query = select(*LIST_COLUMNS, rank.label("rank"), func.ts_headline(config, User.bio, tsquery, HEADLINE_OPTIONS).label("snippet"))
+        query = query.where(bio_tsv.op("@@")(tsquery))
+        if cursor is not None:
+            query = query.where(tuple_(rank, User.id) < tuple_(cursor.rank, cursor.id))
+        result = await cls._execute_query(session, query.order_by(rank.desc(), User.id.desc()).limit(limit + 1))
+        rows = result.all() if result else []
+        items = [{**row._mapping, "snippet": cls._safe_snippet(row.snippet)} for row in rows[:limit]]
+        next_cursor = encode_rank_cursor(items[-1]["rank"], items[-1]["id"]) if len(rows) > limit else None
+        return KeysetPage(items, next_cursor, None)
+
+    @classmethod
+    def _safe_snippet(cls, snippet: Optional[str]) -> Optional[str]:
+        """Escape a ts_headline snippet of user-written text, keeping only its highlight tags."""
+        if snippet is None:
+            return None
+        escaped = html.escape(snippet, quote=False)
+        return escaped.replace(html.escape(HIGHLIGHT_START), HIGHLIGHT_START).replace(html.escape(HIGHLIGHT_STOP), HIGHLIGHT_STOP)
+
+    @classmethod
+    def _list_columns(cls, fields: Optional[Sequence[str]]):
+        """LIST_COLUMNS narrowed to `fields`, keeping id and created_at for keyset cursors."""
+        if fields is None:
+            return LIST_COLUMNS
+        return (User.id, User.created_at, *(getattr(User, name) for name in fields if name != "id"))
+
+    @classmethod
+    async def list_user_rows(cls, session: AsyncSession, skip: int = 0, limit: int = 10,
+                             fields: Optional[Sequence[str]] = None, criteria: Sequence = ()) -> Sequence[Row]:
+        """
+        list_users for read-only pages: just LIST_COLUMNS, or the columns of `fields`, as rows
+        rather than User instances, so nothing is added to the identity map or instrumented
+        for change tracking. `criteria` (see filter_criteria) narrows the users listed.
+        """
+        query = select(*cls._list_columns(fields)).where(*criteria).order_by(User.created_at, User.id).offset(skip).limit(limit)
+        result = await cls._execute_query(session, query)
+        return result.all() if result else []
+
+    @classmethod
+    async def list_user_rows_by_cursor(cls, session: AsyncSession, limit: int = 10, cursor: Optional[Cursor] = None,
+                                       fields: Optional[Sequence[str]] = None, criteria: Sequence = ()) -> KeysetPage:
+        """list_users_by_cursor as rows, like list_user_rows."""
+        query = select(*cls._list_columns(fields)).where(*criteria)
+        return await fetch_keyset_page(session, query, User.created_at, User.id, limit, cursor)
+
     @classmethod
     async def register_user(cls, session: AsyncSession, user_data: Dict[str, str], get_email_service) -> Optional[User]:
         return await cls.create(session, user_data, get_email_service)
     
 
     @classmethod
-    async def login_user(cls, session: AsyncSession, email: str, password: str) -> Optional[User]:
-        user = await cls.get_by_email(session, email)
-        if user:
-            if user.email_verified is False:
-                return None
-            if user.is_locked:
-                return None
-            if verify_password(password, user.hashed_password):
-                user.failed_login_attempts = 0
-                user.last_login_at = datetime.now(timezone.utc)
-                session.add(user)
-                await session.commit()
-                return user
-            else:
-                user.failed_login_attempts += 1
-                if user.failed_login_attempts >= settings.max_login_attempts:
-                    user.is_locked = True
-                session.add(user)
-                await session.commit()
-        return None
+    async def authenticate(cls, session: AsyncSession, email: str, password: str) -> LoginResult:
+        """
+        Check credentials and record the outcome in two statements.
+
+        A single SELECT fetches only the columns the decision needs. The failed-attempt counter
+        and lock flag are then updated with one atomic UPDATE ... RETURNING, so concurrent bad
+        password attempts cannot lose increments or skip the lock transition. Emails the
+        email filter rules out are rejected without any statement.
+        """
+        if not EmailFilter.may_exist(email):
+            return LoginResult(LoginStatus.INVALID_CREDENTIALS)
+        query = select(
+            User.id, User.hashed_password, User.email_verified, User.is_locked
+        ).where(User.email == email)
+        row = (await session.execute(query)).first()
+        if row is None:
+            EmailFilter.false_positive()
+            return LoginResult(LoginStatus.INVALID_CREDENTIALS)
+        if row.is_locked:
+            return LoginResult(LoginStatus.LOCKED)
+        if not row.email_verified:
+            return LoginResult(LoginStatus.INVALID_CREDENTIALS)
+
+        if await PasswordService.verify(password, row.hashed_password):
+            query = (
+                update(User)
+                .where(User.id == row.id, User.is_locked.isnot(True))
+                .values(failed_login_attempts=0, last_login_at=func.now())
+                .returning(User.id, User.email, User.role, User.token_version)
+            )
+            result = await cls._execute_query(session, query)
+            user = result.first() if result else None
+            await UserCache.invalidate(session, row.id)
+            if user is None:
+                # Locked by a concurrent failed attempt between the SELECT and the UPDATE.
+                return LoginResult(LoginStatus.LOCKED)
+            return LoginResult(LoginStatus.SUCCESS, user)
+
+        attempts = func.coalesce(User.failed_login_attempts, 0) + 1
+        query = (
+            update(User)
+            .where(User.id == row.id)
+            .values(
+                failed_login_attempts=attempts,
+                is_locked=or_(User.is_locked.is_(True), attempts >= settings.max_login_attempts),
+            )
+            .returning(User.failed_login_attempts, User.is_locked)
+        )
+        result = await cls._execute_query(session, query)
+        outcome = result.first() if result else None
+        await UserCache.invalidate(session, row.id)
+        if outcome and outcome.is_locked:
+            ListCache.invalidate(session, User)  # lists filter on is_locked
+            logger.info(f"User {row.id} locked after {outcome.failed_login_attempts} failed login attempts.")
+            await RevocationService.revoke_user(session, row.id)
+        return LoginResult(LoginStatus.INVALID_CREDENTIALS)
+
+    @classmethod
+    async def login_user(cls, session: AsyncSession, email: str, password: str) -> Optional[Row]:
+        """Return the (id, email, role) row of the authenticated user, or None."""
+        result = await cls.authenticate(session, email, password)
+        return result.user
 
     @classmethod
     async def is_account_locked(cls, session: AsyncSession, email: str) -> bool:
-        user = await cls.get_by_email(session, email)
-        return user.is_locked if user else False
+        query = select(User.is_locked).where(User.email == email)
+        result = await cls._execute_query(session, query)
+        return bool(result.scalar()) if result else False
 
 
     @classmethod
     async def reset_password(cls, session: AsyncSession, user_id: UUID, new_password: str) -> bool:
-        hashed_password = hash_password(new_password)
-        user = await cls.get_by_id(session, user_id)
-        if user:
-            user.hashed_password = hashed_password
-            user.failed_login_attempts = 0  # Resetting failed login attempts
-            user.is_locked = False  # Unlocking the user account, if locked
-            session.add(user)
-            await session.commit()
-            return True
-        return False
+        """
+        Set a new password and unlock the account, revoking every token issued before.
+
+        Access tokens are revoked in the same statement, which bumps the token version as
+        RevocationService.revoke_user does; refresh tokens are revoked by a second one, so a
+        refresh token stolen before the reset cannot mint new access tokens.
+        """
+        hashed_password = await PasswordService.hash(new_password)
+        users = User.__table__
+        updated = (
+            update(users)
+            .where(users.c.id == user_id)
+            .values(
+                hashed_password=hashed_password,
+                failed_login_attempts=0,
+                is_locked=False,
+                token_version=users.c.token_version + 1,
+            )
+            .returning(users.c.id, users.c.token_version)
+            .cte("updated")
+        )
+        result = await cls._execute_query(session, RevocationService.record_versions(updated, session))
+        if result is None or result.first() is None:
+            return False
+        await RefreshTokenService.revoke_user(session, user_id)
+        await UserCache.invalidate(session, user_id)
+        ListCache.invalidate(session, User)  # lists filter on is_locked
+        return True
 
     @classmethod
     async def verify_email_with_token(cls, session: AsyncSession, user_id: UUID, token: str) -> bool:
-        user = await cls.get_by_id(session, user_id)
-        if user and user.verification_token == token:
-            user.email_verified = True
-            user.verification_token = None  # Clear the token once used
-            user.role = UserRole.AUTHENTICATED
-            session.add(user)
-            await session.commit()
-            return True
-        return False
+        """Mark the email verified if `token` matches, comparing it in the UPDATE itself."""
+        query = (
+            update(User)
+            .where(User.id == user_id, User.verification_token == token)
+            .values(email_verified=True, verification_token=None, role=UserRole.AUTHENTICATED)
+            .returning(User.id)
+        )
+        result = await cls._execute_query(session, query)
+        if result is None or result.first() is None:
+            return False
+        await UserCache.invalidate(session, user_id)
+        ListCache.invalidate(session, User)  # the role shows in user lists
+        return True
 
     @classmethod
     async def count(cls, session: AsyncSession) -> int:
@@ -191,11 +564,15 @@ class UserService:
     
     @classmethod
     async def unlock_user_account(cls, session: AsyncSession, user_id: UUID) -> bool:
-        user = await cls.get_by_id(session, user_id)
-        if user and user.is_locked:
-            user.is_locked = False
-            user.failed_login_attempts = 0  # Optionally reset failed login attempts
-            session.add(user)
-            await session.commit()
-            return True
-        return False
+        query = (
+            update(User)
+            .where(User.id == user_id, User.is_locked.is_(True))
+            .values(is_locked=False, failed_login_attempts=0)
+            .returning(User.id)
+        )
+        result = await cls._execute_query(session, query)
+        if result is None or result.first() is None:
+            return False
+        await UserCache.invalidate(session, user_id)
+        ListCache.invalidate(session, User)  # lists filter on is_locked
+        return True
@@ -0,0 +1,74 @@
+from builtins import all, bool, bytearray, bytes, float, int, len, max, range, round, staticmethod, str
+import hashlib
+import math
+from typing import Dict, Iterable, List
+
+KEY_SIZE = 16
+
+
+class BloomFilter:
+    """
+    A set membership filter that may answer "maybe" for absent items but never misses an
+    added one. Sized for `capacity` items at a false positive rate of `error_rate`.
+
+    Items are reduced to a 16-byte key first. Keys can be shared instead of the items
+    themselves, e.g. so other processes can update their filters without seeing the items.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    @staticmethod
+    def key(item: str) -> bytes:
+        return hashlib.blake2b(item.encode(), digest_size=KEY_SIZE).digest()
+
+    def _positions(self, key: bytes) -> List[int]:
+        # Double hashing: k positions from the two halves of the key.
+        first, second = int.from_bytes(key[:8], "little"), int.from_bytes(key[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add_key(self, key: bytes) -> bool:
+        """Add an item by its key, returning False if it was (probably) present already."""
+        added = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self._bits[position >> 3] & mask:
+                self._bits[position >> 3] |= mask
+                added = True
+        # Re-adding a present item is a no-op, so `count` approximates distinct items.
+        if added:
+            self.count += 1
+        return added
+
+    def add(self, item: str) -> bool:
+        return self.add_key(self.key(item))
+
+    def update(self, items: Iterable[str]):
+        for item in items:
+            self.add(item)
+
+    def contains_key(self, key: bytes) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __contains__(self, item: str) -> bool:
+        return self.contains_key(self.key(item))
+
+    def estimated_error_rate(self) -> float:
+        """False positive rate expected at the current number of items."""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "capacity": self.capacity,
+            "items": self.count,
+            "bits": self.size,
+            "memory_bytes": len(self._bits),
+            "hashes": self.hash_count,
+            "target_error_rate": self.error_rate,
+            "estimated_error_rate": round(self.estimated_error_rate(), 6),
+        }
@@ -0,0 +1,39 @@
+from builtins import Exception, bool, int, len, str
+from typing import List, Optional
+
+
+class PreconditionFailed(Exception):
+    """The resource changed since the client read it. Answered with 412."""
+
+
+def make_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def parse_if_match(header: Optional[str]) -> Optional[List[int]]:
+    """
+    The versions an If-Match header accepts, or None when any version will do (no header,
+    or `*`). If-Match uses strong comparison, so weak or unparseable tags match nothing.
+    """
+    if header is None or header.strip() == "*":
+        return None
+    return _versions(header, weak=False)
+
+
+def none_match(header: str, version: int) -> bool:
+    """
+    Whether an If-None-Match header names `version`, i.e. whether a GET should answer 304.
+    If-None-Match uses weak comparison, so W/ tags count too, and `*` names any version.
+    """
+    return header.strip() == "*" or version in _versions(header, weak=True)
+
+
+def _versions(header: str, weak: bool) -> List[int]:
+    versions = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if weak and tag.startswith("W/"):
+            tag = tag[2:]
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+    return versions
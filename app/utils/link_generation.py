@@ -1,48 +1,143 @@
-from builtins import dict, int, max, str
-from typing import List, Callable
+from builtins import bool, dict, getattr, int, max, str
+from functools import lru_cache
+from typing import Any, Dict, List, Callable, Optional
 from urllib.parse import urlencode
 from uuid import UUID
 
 from fastapi import Request
+from pydantic import HttpUrl, TypeAdapter
+from typing_extensions import TypedDict
 from app.schemas.link_schema import Link
 from app.schemas.pagination_schema import PaginationLink
 
+# Path templates of named routes, e.g. "/users/{user_id}", recorded once by compile_route_templates.
+ROUTE_TEMPLATES: Dict[str, str] = {}
+
+USER_LINK_ACTIONS = (
+    ("self", "get_user", "GET", "view"),
+    ("update", "update_user", "PUT", "update"),
+    ("delete", "delete_user", "DELETE", "delete"),
+)
+
+_http_url = TypeAdapter(HttpUrl)
+
+
+class PaginationLinkRow(TypedDict):
+    """A PaginationLink as plain values, for encoding with a ModelEncoder."""
+    rel: str
+    href: str
+    method: str
+
+
+def compile_route_templates(routes):
+    """Record the path template of every named route, so links need no url_for lookup."""
+    for route in routes:
+        path_format = getattr(route, "path_format", None)
+        if path_format is not None:
+            ROUTE_TEMPLATES[route.name] = path_format
+
+def _canonical_url(url: str) -> str:
+    """`url` as HttpUrl validation renders it, e.g. without a default port."""
+    return str(_http_url.validate_python(url))
+
+# Requests share a handful of base URLs, so each is parsed once. Substituting URL-safe
+# values (ints, UUIDs, cursors) into a canonical URL keeps it canonical.
+_canonical_base = lru_cache(maxsize=256)(_canonical_url)
+
+def route_url(request: Request, name: str, **path_params) -> str:
+    """The absolute URL of a named route, as request.url_for would give it."""
+    return _canonical_base(str(request.base_url)).rstrip("/") + ROUTE_TEMPLATES[name].format(**path_params)
+
 # Utility function to create a link
 def create_link(rel: str, href: str, method: str = "GET", action: str = None) -> Link:
     return Link(rel=rel, href=href, method=method, action=action)
 
 def create_pagination_link(rel: str, base_url: str, params: dict) -> PaginationLink:
     # Ensure parameters are added in a specific order
-    query_string = f"skip={params['skip']}&limit={params['limit']}"
+    if 'cursor' in params:
+        query_string = f"cursor={params['cursor']}&limit={params['limit']}"
+    else:
+        query_string = f"skip={params['skip']}&limit={params['limit']}"
     return PaginationLink(rel=rel, href=f"{base_url}?{query_string}")
 
 def create_user_links(user_id: UUID, request: Request) -> List[Link]:
     """
     Generate navigation links for user actions.
     """
-    actions = [
-        ("self", "get_user", "GET", "view"),
-        ("update", "update_user", "PUT", "update"),
-        ("delete", "delete_user", "DELETE", "delete")
-    ]
     return [
-        create_link(rel, str(request.url_for(action, user_id=str(user_id))), method, action_desc)
-        for rel, action, method, action_desc in actions
+        create_link(rel, route_url(request, action, user_id=user_id), method, action_desc)
+        for rel, action, method, action_desc in USER_LINK_ACTIONS
     ]
 
-def generate_pagination_links(request: Request, skip: int, limit: int, total_items: int) -> List[PaginationLink]:
-    base_url = str(request.url)
-    total_pages = (total_items + limit - 1) // limit
+def _offset_link(rel: str, base_url: str, skip: int, limit: int, query: str = "") -> PaginationLinkRow:
+    return {"rel": rel, "href": f"{base_url}?skip={skip}&limit={limit}{query}", "method": "GET"}
+
+def _cursor_link(rel: str, base_url: str, cursor: str, limit: int, query: str = "") -> PaginationLinkRow:
+    return {"rel": rel, "href": f"{base_url}?cursor={cursor}&limit={limit}{query}", "method": "GET"}
+
+def pagination_link_rows(request: Request, skip: int, limit: int, total_items: Optional[int],
+                         next_cursor: Optional[str] = None, prev_cursor: Optional[str] = None,
+                         cursor_mode: bool = False, has_next: Optional[bool] = None,
+                         params: Optional[Dict[str, Any]] = None) -> List[PaginationLinkRow]:
+    """
+    Build navigation links for a list page.
+
+    Offset pages link by skip/limit. In cursor mode the next/prev links carry the opaque
+    keyset cursors instead, and there is no "last" link since keyset pages are not numbered.
+    Without a total there is no "last" link either, and `has_next` decides the "next" link.
+    `params` (e.g. search filters) are kept on every link; None values are left out.
+
+    The hrefs are filled into the request's canonical base URL, so they match what
+    PaginationLink validation would produce without validating each of them.
+    """
+    url = str(request.url)
+    base_url = _canonical_base(url.split("?")[0])
+    params = {name: value for name, value in (params or {}).items() if value is not None}
+    query = "&" + urlencode(params) if params else ""
+    if cursor_mode:
+        links = [
+            {"rel": "self", "href": _canonical_url(url), "method": "GET"},
+            _offset_link("first", base_url, 0, limit, query),
+        ]
+        if next_cursor:
+            links.append(_cursor_link("next", base_url, next_cursor, limit, query))
+        if prev_cursor:
+            links.append(_cursor_link("prev", base_url, prev_cursor, limit, query))
+        return links
+
     links = [
-        create_pagination_link("self", base_url, {'skip': skip, 'limit': limit}),
-        create_pagination_link("first", base_url, {'skip': 0, 'limit': limit}),
-        create_pagination_link("last", base_url, {'skip': max(0, (total_pages - 1) * limit), 'limit': limit})
+        _offset_link("self", base_url, skip, limit, query),
+        _offset_link("first", base_url, 0, limit, query),
     ]
+    if total_items is not None:
+        total_pages = (total_items + limit - 1) // limit
+        links.append(_offset_link("last", base_url, max(0, (total_pages - 1) * limit), limit, query))
 
-    if skip + limit < total_items:
-        links.append(create_pagination_link("next", base_url, {'skip': skip + limit, 'limit': limit}))
+    if has_next is None:
+        has_next = total_items is not None and skip + limit < total_items
+    if has_next:
+        links.append(_offset_link("next", base_url, skip + limit, limit, query))
 
     if skip > 0:
-        links.append(create_pagination_link("prev", base_url, {'skip': max(skip - limit, 0), 'limit': limit}))
+        links.append(_offset_link("prev", base_url, max(skip - limit, 0), limit, query))
 
     return links
+
+def search_link_rows(request: Request, limit: int, next_cursor: Optional[str],
+                     params: Optional[Dict[str, Any]] = None) -> List[PaginationLinkRow]:
+    """Links for results that only page forwards by cursor, such as ranked search results."""
+    url = str(request.url)
+    query = "&" + urlencode(params) if params else ""
+    links = [{"rel": "self", "href": _canonical_url(url), "method": "GET"}]
+    if next_cursor:
+        links.append(_cursor_link("next", _canonical_base(url.split("?")[0]), next_cursor, limit, query))
+    return links
+
+def generate_pagination_links(request: Request, skip: int, limit: int, total_items: Optional[int],
+                              next_cursor: Optional[str] = None, prev_cursor: Optional[str] = None,
+                              cursor_mode: bool = False, has_next: Optional[bool] = None) -> List[PaginationLink]:
+    """The links of pagination_link_rows as PaginationLink models."""
+    return [
+        PaginationLink(**row)
+        for row in pagination_link_rows(request, skip, limit, total_items, next_cursor, prev_cursor, cursor_mode, has_next)
+    ]
@@ -0,0 +1,46 @@
+from builtins import dict, float, int, len, max, round, str, tuple, zip
+from bisect import bisect_left
+from typing import Dict, Sequence
+
+# Default latency buckets in milliseconds, roughly exponential so one histogram
+# covers both sub-millisecond cache hits and multi-second bcrypt queues.
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram used for in-process service metrics.
+
+    Observations are recorded in milliseconds. Each bucket counts the observations
+    less than or equal to its upper bound; anything above the last bound lands in "+Inf".
+    """
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.reset()
+
+    def reset(self):
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float):
+        self._counts[bisect_left(self.buckets_ms, value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def snapshot(self) -> Dict[str, object]:
+        buckets: Dict[str, int] = {}
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets_ms, self._counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "buckets_ms": buckets,
+        }
@@ -1,10 +1,80 @@
-from builtins import str
+from builtins import bytes, int, len, range, str
+import hashlib
 import random
 
+ADJECTIVES = (
+    "clever", "jolly", "brave", "sly", "gentle", "agile", "amber", "ancient", "arctic", "bold",
+    "bright", "brisk", "calm", "candid", "cheerful", "cosmic", "crimson", "curious", "daring", "dashing",
+    "dizzy", "eager", "early", "electric", "elegant", "fancy", "fearless", "fierce", "fluffy", "frosty",
+    "funky", "fuzzy", "giant", "glad", "golden", "graceful", "grand", "happy", "hardy", "honest",
+    "humble", "icy", "idle", "jazzy", "keen", "kind", "lively", "lucky", "lunar", "magic",
+    "mellow", "merry", "mighty", "misty", "modest", "noble", "nimble", "odd", "patient", "peppy",
+    "plucky", "polite", "proud", "quick", "quiet", "quirky", "rapid", "rare", "rosy", "royal",
+    "rustic", "rusty", "shiny", "silent", "silver", "sleepy", "smooth", "snappy", "snowy", "solar",
+    "sparkly", "speedy", "spicy", "steady", "stellar", "stormy", "sunny", "swift", "tidy", "tiny",
+    "trusty", "vivid", "wandering", "warm", "wild", "windy", "wise", "witty", "zany", "zesty",
+)
+ANIMALS = (
+    "panda", "fox", "raccoon", "koala", "lion", "alpaca", "badger", "beaver", "bison", "bobcat",
+    "camel", "caribou", "cheetah", "chipmunk", "cobra", "condor", "cougar", "coyote", "crane", "dingo",
+    "dolphin", "donkey", "eagle", "echidna", "falcon", "ferret", "finch", "flamingo", "gazelle", "gecko",
+    "gibbon", "giraffe", "gopher", "gorilla", "hamster", "hare", "hawk", "hedgehog", "heron", "hippo",
+    "hyena", "ibex", "iguana", "impala", "jackal", "jaguar", "kestrel", "kiwi", "lemur", "leopard",
+    "llama", "lobster", "lynx", "macaw", "magpie", "manatee", "marmot", "meerkat", "mink", "moose",
+    "narwhal", "newt", "ocelot", "octopus", "okapi", "orca", "osprey", "otter", "owl", "panther",
+    "parrot", "pelican", "penguin", "puffin", "puma", "quail", "quokka", "rabbit", "raven", "reindeer",
+    "robin", "salmon", "seal", "shark", "sloth", "sparrow", "squid", "stork", "swan", "tapir",
+    "tiger", "toucan", "turtle", "viper", "walrus", "weasel", "whale", "wolf", "wombat", "yak",
+)
+NUMBERS = 10000
+# Number of distinct nicknames: 100 adjectives x 100 animals x 10000 numbers = 100 million.
+NAMESPACE_SIZE = len(ADJECTIVES) * len(ANIMALS) * NUMBERS
+
+FEISTEL_ROUNDS = 4
+
+
+def format_nickname(index: int) -> str:
+    """Spell out the nickname at position `index` (0 <= index < NAMESPACE_SIZE) of the namespace."""
+    index, number = divmod(index, NUMBERS)
+    adjective, animal = divmod(index, len(ANIMALS))
+    return f"{ADJECTIVES[adjective]}_{ANIMALS[animal]}_{number}"
+
 
 def generate_nickname() -> str:
-    """Generate a URL-safe nickname using adjectives and animal names."""
-    adjectives = ["clever", "jolly", "brave", "sly", "gentle"]
-    animals = ["panda", "fox", "raccoon", "koala", "lion"]
-    number = random.randint(0, 999)
-    return f"{random.choice(adjectives)}_{random.choice(animals)}_{number}"
+    """Generate a random URL-safe nickname using adjectives and animal names."""
+    return format_nickname(random.randrange(NAMESPACE_SIZE))
+
+
+class NicknamePermutation:
+    """
+    A keyed, collision-free mapping from counter values to nicknames.
+
+    A small Feistel network over the next power of four above NAMESPACE_SIZE is a
+    bijection; re-encrypting until the value falls inside the namespace ("cycle walking")
+    keeps it one. Consecutive counter values therefore give distinct nicknames that do not
+    look sequential, and without the key the next one cannot be guessed.
+    """
+
+    def __init__(self, key: bytes):
+        self._key = hashlib.blake2b(key, digest_size=32).digest()
+        self._half_bits = (NAMESPACE_SIZE.bit_length() + 1) // 2
+        self._half_mask = (1 << self._half_bits) - 1
+
+    def _round(self, round_index: int, value: int) -> int:
+        data = round_index.to_bytes(1, "big") + value.to_bytes(8, "big")
+        return int.from_bytes(hashlib.blake2b(data, key=self._key, digest_size=8).digest(), "big") & self._half_mask
+
+    def _encrypt(self, value: int) -> int:
+        left, right = value >> self._half_bits, value & self._half_mask
+        for round_index in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ self._round(round_index, right)
+        return (left << self._half_bits) | right
+
+    def permute(self, counter: int) -> int:
+        value = self._encrypt(counter % NAMESPACE_SIZE)
+        while value >= NAMESPACE_SIZE:
+            value = self._encrypt(value)
+        return value
+
+    def nickname(self, counter: int) -> str:
+        return format_nickname(self.permute(counter))
@@ -0,0 +1,125 @@
+from builtins import TypeError, ValueError, float, int, len, list, str
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+class Cursor(NamedTuple):
+    """Position of a row in (created_at, id) order and the direction to page from it."""
+    created_at: datetime
+    id: UUID
+    direction: str = "next"
+
+
+class RankCursor(NamedTuple):
+    """Position of a search result in (rank, id) descending order."""
+    rank: float
+    id: UUID
+
+
+class KeysetPage(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+
+def _encode(values: List[Any]) -> str:
+    payload = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> Any:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def encode_cursor(created_at: datetime, id: UUID, direction: str = "next") -> str:
+    """Encode a row position as an opaque, URL-safe cursor."""
+    return _encode([created_at.isoformat(), str(id), direction])
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Decode a cursor produced by encode_cursor, raising InvalidCursor for anything else."""
+    try:
+        created_at, id, direction = _decode(cursor)
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return Cursor(datetime.fromisoformat(created_at), UUID(id), direction)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid pagination cursor") from e
+
+
+def encode_rank_cursor(rank: float, id: UUID) -> str:
+    """Encode a search result position. JSON keeps the rank exact, so no result is skipped or repeated."""
+    return _encode([rank, str(id)])
+
+
+def decode_rank_cursor(cursor: str) -> RankCursor:
+    """Decode a cursor produced by encode_rank_cursor, raising InvalidCursor for anything else."""
+    try:
+        rank, id = _decode(cursor)
+        return RankCursor(float(rank), UUID(id))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid pagination cursor") from e
+
+
+def row_cursor(row, direction: str = "next") -> str:
+    return encode_cursor(row.created_at, row.id, direction)
+
+
+async def fetch_keyset_page(session: AsyncSession, query: Select, created_at_column, id_column,
+                            limit: int, cursor: Optional[Cursor] = None) -> KeysetPage:
+    """
+    Fetch one page of `query` in (created_at, id) order, starting after or before `cursor`.
+    Rows must have created_at and id attributes, for the page cursors.
+
+    The row-value comparison `(created_at, id) > (:created_at, :id)` is answered by the
+    composite (created_at, id) index, so every page costs the same regardless of depth.
+    One extra row is fetched to learn whether another page exists in the paging direction.
+    """
+    key = tuple_(created_at_column, id_column)
+    backwards = cursor is not None and cursor.direction == "prev"
+    if cursor is not None:
+        position = tuple_(cursor.created_at, cursor.id)
+        query = query.where(key < position if backwards else key > position)
+    if backwards:
+        query = query.order_by(created_at_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(created_at_column, id_column)
+    result = await session.execute(query.limit(limit + 1))
+    # A query for one entity pages ORM instances, a query for columns pages plain rows.
+    rows: Sequence[Any] = result.all() if len(query.column_descriptions) > 1 else result.scalars().all()
+
+    has_more = len(rows) > limit
+    rows = list(rows[:limit])
+    if backwards:
+        rows.reverse()
+    if not rows:
+        return KeysetPage(rows, None, None)
+
+    # Paging backwards always leaves the rows we came from ahead of us, and paging forwards
+    # from a cursor always leaves rows behind.
+    has_next = backwards or has_more
+    has_prev = has_more if backwards else cursor is not None
+    return KeysetPage(
+        rows,
+        row_cursor(rows[-1]) if has_next else None,
+        row_cursor(rows[0], "prev") if has_prev else None,
+    )
+
+
+def offset_page_cursors(items: Sequence[Any], skip: int, has_next: bool) -> Tuple[Optional[str], Optional[str]]:
+    """Cursors for an offset page, so clients can switch to keyset paging from any page."""
+    if not items:
+        return None, None
+    next_cursor = row_cursor(items[-1]) if has_next else None
+    prev_cursor = row_cursor(items[0], "prev") if skip > 0 else None
+    return next_cursor, prev_cursor
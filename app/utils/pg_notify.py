@@ -0,0 +1,106 @@
+from builtins import Exception, OSError, bool, float, min, str
+import asyncio
+from typing import Awaitable, Callable, Optional
+import asyncpg
+from sqlalchemy import func, text
+from sqlalchemy.engine import make_url
+import logging
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_QUERY = text("SELECT pg_notify(:channel, :payload)")
+
+
+def notify(session, channel: str, payload: str):
+    """
+    NOTIFY `channel` from inside the session's open transaction.
+
+    Postgres queues the notification with the transaction and delivers it to listeners only
+    if the transaction commits, dropping it on rollback, so no worker ever acts on a write
+    that did not happen. That is why the caches send theirs from a before_commit hook rather
+    than after the commit. Works with Session and AsyncSession; await the result of the latter.
+    """
+    return session.execute(NOTIFY_QUERY, {"channel": channel, "payload": payload})
+
+
+def notify_expression(channel, payload):
+    """A pg_notify call for a write to embed in its own statement; delivered as by notify()."""
+    return func.pg_notify(channel, payload)
+
+
+def asyncpg_dsn(database_url: str) -> str:
+    """Turn a SQLAlchemy URL such as postgresql+asyncpg://... into a plain libpq DSN."""
+    return make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class PgNotifier:
+    """
+    Listens on a Postgres NOTIFY channel over a dedicated asyncpg connection.
+
+    Postgres delivers notifications only when the sending transaction commits, which makes
+    the channel a cheap invalidation bus between workers. If the connection drops it is
+    re-established with backoff and `on_reconnect` is awaited, because anything sent while
+    disconnected was lost.
+    """
+
+    def __init__(self, database_url: str, channel: str, callback: Callable[..., Awaitable[None]],
+                 on_reconnect: Optional[Callable[[], Awaitable[None]]] = None,
+                 retry_seconds: float = 1.0, max_retry_seconds: float = 30.0):
+        self.channel = channel
+        self._dsn = asyncpg_dsn(database_url)
+        self._callback = callback
+        self._on_reconnect = on_reconnect
+        self._retry_seconds = retry_seconds
+        self._max_retry_seconds = max_retry_seconds
+        self._connection: Optional[asyncpg.Connection] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def listening(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed()
+
+    async def start(self):
+        self._closing = False
+        await self._connect()
+
+    async def _connect(self):
+        connection = await asyncpg.connect(self._dsn)
+        connection.add_termination_listener(self._on_terminated)
+        await connection.add_listener(self.channel, self._callback)
+        self._connection = connection
+
+    def _on_terminated(self, connection):
+        if self._closing or self._reconnect_task is not None:
+            return
+        logger.warning(f"Lost the LISTEN connection for channel {self.channel}, reconnecting.")
+        self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = self._retry_seconds
+        try:
+            while not self._closing:
+                await asyncio.sleep(delay)
+                try:
+                    await self._connect()
+                except (OSError, asyncpg.PostgresError) as e:
+                    logger.warning(f"Reconnecting LISTEN for channel {self.channel} failed: {e}")
+                    delay = min(delay * 2, self._max_retry_seconds)
+                    continue
+                if self._on_reconnect is not None:
+                    await self._on_reconnect()
+                return
+        finally:
+            self._reconnect_task = None
+
+    async def stop(self):
+        self._closing = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self.listening:
+            try:
+                await self._connection.close()
+            except Exception as e:
+                logger.warning(f"Closing the LISTEN connection for channel {self.channel} failed: {e}")
+        self._connection = None
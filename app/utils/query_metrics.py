@@ -0,0 +1,96 @@
+from builtins import bool, classmethod, dict, int, round, str
+from contextvars import ContextVar
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+COUNTERS = ("queries", "commits")
+
+
+class QueryMetrics:
+    """
+    Counts SQL statements and commits per request and aggregates them per endpoint.
+
+    Listeners are attached to the SQLAlchemy Engine class, so every engine (including the
+    test engine) is covered. The current request's counters live in a context variable set
+    by QueryMetricsMiddleware.
+    """
+    _current: ContextVar[Optional[Dict[str, int]]] = ContextVar("query_metrics_current", default=None)
+    _endpoints: Dict[str, Dict[str, int]] = {}
+    _installed: bool = False
+
+    @classmethod
+    def install(cls):
+        if cls._installed:
+            return
+        event.listen(Engine, "before_cursor_execute", cls._on_execute)
+        event.listen(Engine, "commit", cls._on_commit)
+        cls._installed = True
+
+    @classmethod
+    def _increment(cls, counter: str):
+        counts = cls._current.get()
+        if counts is not None:
+            counts[counter] += 1
+
+    @classmethod
+    def _on_execute(cls, *args):
+        cls._increment("queries")
+
+    @classmethod
+    def _on_commit(cls, conn):
+        cls._increment("commits")
+
+    @classmethod
+    def start_request(cls) -> Dict[str, int]:
+        counts = dict.fromkeys(COUNTERS, 0)
+        cls._current.set(counts)
+        return counts
+
+    @classmethod
+    def finish_request(cls, endpoint: str, counts: Dict[str, int]):
+        totals = cls._endpoints.setdefault(endpoint, dict.fromkeys(("requests",) + COUNTERS, 0))
+        totals["requests"] += 1
+        for counter in COUNTERS:
+            totals[counter] += counts[counter]
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Dict[str, object]]:
+        report = {}
+        for endpoint, totals in cls._endpoints.items():
+            requests = totals["requests"]
+            report[endpoint] = dict(
+                totals,
+                queries_per_request=round(totals["queries"] / requests, 2),
+                commits_per_request=round(totals["commits"] / requests, 2),
+            )
+        return report
+
+    @classmethod
+    def reset(cls):
+        cls._endpoints.clear()
+
+
+class QueryMetricsMiddleware:
+    """
+    ASGI middleware that attributes each request's query counters to its endpoint.
+
+    It wraps the whole application call rather than using call_next, so the commit issued
+    when the request's session dependency is torn down is included in the counts.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        counts = QueryMetrics.start_request()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # The router stores the matched route in the scope, giving a templated path per endpoint.
+            route = scope.get("route")
+            path = route.path if route is not None else scope["path"]
+            QueryMetrics.finish_request(f"{scope['method']} {path}", counts)
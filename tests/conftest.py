@@ -31,10 +31,15 @@ from faker import Faker
 from app.main import app
 from app.database import Base, Database
 from app.models.user_model import User, UserRole
-from app.dependencies import get_db, get_settings
+from app.dependencies import get_db, get_email_service, get_read_db, get_settings
 from app.utils.security import hash_password
 from app.utils.template_manager import TemplateManager
 from app.services.email_service import EmailService
+from app.services.email_filter import EmailFilter
+from app.services.nickname_service import NicknameService
+from app.services.revocation_service import RevocationService
+from app.services.user_cache import UserCache
+from app.services.list_cache import ListCache
 from app.services.jwt_service import create_access_token
 
 fake = Faker()
@@ -59,6 +64,25 @@ def email_service():
 async def async_client(db_session):
     async with AsyncClient(app=app, base_url="http://testserver") as client:
         app.dependency_overrides[get_db] = lambda: db_session
+        app.dependency_overrides[get_read_db] = lambda: db_session
+        try:
+            yield client
+        finally:
+            app.dependency_overrides.clear()
+
+# for tests that use the application's own engine (get_db, listeners) rather than db_session.
+@pytest.fixture(scope="function")
+async def app_engine(setup_database):
+    yield Database._engine
+    # The application engine outlives each test's event loop, so drop its pooled connections.
+    await Database._engine.dispose()
+
+# an http client whose requests get their sessions from the real get_db/get_read_db, so the
+# request's own commit and rollback run; use it to check what a request actually persists.
+@pytest.fixture(scope="function")
+async def app_client(app_engine, email_service):
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        app.dependency_overrides[get_email_service] = lambda: email_service
         try:
             yield client
         finally:
@@ -74,6 +98,11 @@ def initialize_database():
 # this function setup and tears down (drops tales) for each test function, so you have a clean database for each test.
 @pytest.fixture(scope="function", autouse=True)
 async def setup_database():
+    UserCache.reset()
+    ListCache.reset()
+    RevocationService.reset()
+    NicknameService.reset()
+    EmailFilter.reset()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     yield
@@ -1,4 +1,4 @@
-from builtins import str
+from builtins import range, str
 import pytest
 from httpx import AsyncClient
 from app.main import app
@@ -110,6 +110,36 @@ async def test_update_event(async_client, admin_user, admin_token):
     assert isinstance(new_event_id, str), "Event ID should be a string (UUID)"
     assert updated_data["title"] == updated_event_data["title"]
 
+@pytest.mark.asyncio
+async def test_update_event_if_match(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    event_data = {"title": "Versioned Event", "createdby": "John Doe", "startdate": "2024-12-17", "enddate": "2024-12-17"}
+    response = await async_client.post("/events/", json=event_data, headers=headers)
+    etag = response.headers["ETag"]
+    assert "version" not in response.json()
+    event_id = response.json()["id"]
+    assert (await async_client.get(f"/events/{event_id}", headers=headers)).headers["ETag"] == etag
+
+    response = await async_client.put(f"/events/{event_id}", json={"title": "First"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    response = await async_client.put(f"/events/{event_id}", json={"title": "Second"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 412
+
+@pytest.mark.asyncio
+async def test_get_event_if_none_match(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    event_data = {"title": "Polled Event", "createdby": "John Doe", "startdate": "2024-12-17", "enddate": "2024-12-17"}
+    response = await async_client.post("/events/", json=event_data, headers=headers)
+    event_id, etag = response.json()["id"], response.headers["ETag"]
+    response = await async_client.get(f"/events/{event_id}", headers={**headers, "If-None-Match": f"W/{etag}"})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    await async_client.put(f"/events/{event_id}", json={"title": "Polled Event 2"}, headers=headers)
+    response = await async_client.get(f"/events/{event_id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Polled Event 2"
+
 @pytest.mark.asyncio
 async def test_event_delete(async_client, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
@@ -140,4 +170,48 @@ async def test_event_delete_does_not_exist(async_client, admin_token):
     non_existent_event_id = "00000000-0000-0000-0000-000000000000"  # Valid UUID format
     headers = {"Authorization": f"Bearer {admin_token}"}
     delete_response = await async_client.delete(f"/events/{non_existent_event_id}", headers=headers)
-    assert delete_response.status_code == 404
\ No newline at end of file
+    assert delete_response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_list_events_cursor_pagination(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    for i in range(5):
+        event_data = {"title": f"Event {i}", "createdby": "John Doe", "startdate": "2024-12-17", "enddate": "2024-12-17"}
+        await async_client.post("/events/", json=event_data, headers=headers)
+    response = await async_client.get("/events/?limit=3", headers=headers)
+    first_page = response.json()
+    assert first_page["next_cursor"] is not None
+    response = await async_client.get(f"/events/?limit=3&cursor={first_page['next_cursor']}", headers=headers)
+    second_page = response.json()
+    assert len(second_page["items"]) == 2
+    assert second_page["next_cursor"] is None
+    ids = {item["id"] for item in first_page["items"] + second_page["items"]}
+    assert len(ids) == 5
+
+@pytest.mark.asyncio
+async def test_event_sparse_fields(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    event_data = {"title": "Sparse", "createdby": "John Doe", "startdate": "2024-12-17", "enddate": "2024-12-17"}
+    event_id = (await async_client.post("/events/", json=event_data, headers=headers)).json()["id"]
+    response = await async_client.get(f"/events/{event_id}?fields=title", headers=headers)
+    assert response.json() == {"title": "Sparse"}
+    assert response.headers["ETag"] == '"0"'
+    data = (await async_client.get("/events/?fields=id,title", headers=headers)).json()
+    assert data["items"] == [{"id": event_id, "title": "Sparse"}]
+    assert data["links"] == []
+    response = await async_client.get("/events/?fields=location", headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_batch_get_events(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    event_ids = []
+    for title in ("First", "Second"):
+        event_data = {"title": title, "createdby": "John Doe", "startdate": "2024-12-17", "enddate": "2024-12-17"}
+        event_ids.append((await async_client.post("/events/", json=event_data, headers=headers)).json()["id"])
+    missing_id = "00000000-0000-0000-0000-000000000000"
+    response = await async_client.post("/events/batch-get", json={"ids": [event_ids[1], missing_id, event_ids[0]]}, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [event["title"] for event in data["items"]] == ["Second", "First"]
+    assert data["missing"] == [missing_id]
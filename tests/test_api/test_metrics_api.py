@@ -0,0 +1,57 @@
+from builtins import str
+import pytest
+from app.utils.query_metrics import QueryMetrics
+
+@pytest.mark.asyncio
+async def test_metrics_require_admin(async_client, manager_token):
+    headers = {"Authorization": f"Bearer {manager_token}"}
+    response = await async_client.get("/metrics/queries", headers=headers)
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_password_hashing_metrics(async_client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/metrics/password-hashing", headers=headers)
+    assert response.status_code == 200
+    assert "queue_depth" in response.json()
+    assert "hash_latency" in response.json()
+
+@pytest.mark.asyncio
+async def test_query_metrics_per_endpoint(async_client, admin_user, admin_token):
+    QueryMetrics.reset()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    await async_client.get(f"/users/{admin_user.id}", headers=headers)
+    response = await async_client.get("/metrics/queries", headers=headers)
+    assert response.status_code == 200
+    endpoint = response.json()["GET /users/{user_id}"]
+    assert endpoint["requests"] == 1
+    assert endpoint["queries"] >= 1
+    assert endpoint["commits"] == 0
+
+@pytest.mark.asyncio
+async def test_nickname_metrics(async_client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/metrics/nicknames", headers=headers)
+    assert response.status_code == 200
+    assert "filter" in response.json()
+
+@pytest.mark.asyncio
+async def test_email_filter_rebuild(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.post("/metrics/email-filter/rebuild", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["rebuilds"] == 1
+    assert response.json()["filter"]["items"] == 1
+    response = await async_client.get("/metrics/email-filter", headers=headers)
+    assert "memory_bytes" in response.json()["filter"]
+
+@pytest.mark.asyncio
+async def test_list_cache_metrics(async_client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    await async_client.get("/events/", headers=headers)
+    await async_client.get("/events/", headers=headers)
+    response = await async_client.get("/metrics/list-cache", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["hits"] == 1 and data["misses"] == 1
+    assert data["bytes"] > 0
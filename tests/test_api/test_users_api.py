@@ -1,11 +1,20 @@
-from builtins import str
+from builtins import range, str
 import pytest
+from uuid import UUID, uuid4
 from httpx import AsyncClient
+from sqlalchemy import select
+from app.dependencies import get_settings
 from app.main import app
 from app.models.user_model import User, UserRole
 from app.utils.nickname_gen import generate_nickname
 from app.utils.security import hash_password
 from app.services.jwt_service import decode_token  # Import your FastAPI app
+from app.services.jwt_service import VerifiedTokenCache, create_access_token
+from app.services import password_service
+from app.services.list_cache import ListCache
+from app.services.nickname_service import NicknameService
+from app.services.user_service import UserService
+from app.services.revocation_service import RevocationService
 
 # Example of a test function using the async_client fixture
 @pytest.mark.asyncio
@@ -52,6 +61,49 @@ async def test_update_user_email_access_allowed(async_client, admin_user, admin_
     assert response.json()["email"] == updated_data["email"]
 
 
+@pytest.mark.asyncio
+async def test_update_user_if_match(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    etag = (await async_client.get(f"/users/{admin_user.id}", headers=headers)).headers["ETag"]
+    response = await async_client.put(f"/users/{admin_user.id}", json={"bio": "Fresh"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    # A second writer still holding the old ETag must not overwrite the first one.
+    response = await async_client.put(f"/users/{admin_user.id}", json={"bio": "Stale"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 412
+    assert (await async_client.get(f"/users/{admin_user.id}", headers=headers)).json()["bio"] == "Fresh"
+
+@pytest.mark.asyncio
+async def test_update_user_if_match_through_request_session(app_client, admin_user, admin_token):
+    # Runs the real get_db, which must let PreconditionFailed reach its 412 handler.
+    headers = {"Authorization": f"Bearer {admin_token}", "If-Match": '"999"'}
+    response = await app_client.put(f"/users/{admin_user.id}", json={"bio": "Stale"}, headers=headers)
+    assert response.status_code == 412
+    response = await app_client.get(f"/users/{admin_user.id}", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.json()["bio"] == admin_user.bio
+
+@pytest.mark.asyncio
+async def test_get_user_if_none_match(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    etag = (await async_client.get(f"/users/{admin_user.id}", headers=headers)).headers["ETag"]
+    response = await async_client.get(f"/users/{admin_user.id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+    await async_client.put(f"/users/{admin_user.id}", json={"bio": "Changed"}, headers=headers)
+    response = await async_client.get(f"/users/{admin_user.id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["bio"] == "Changed"
+    assert response.headers["ETag"] != etag
+    response = await async_client.get("/users/00000000-0000-0000-0000-000000000000", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_update_missing_user_if_match(async_client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}", "If-Match": '"0"'}
+    response = await async_client.put("/users/00000000-0000-0000-0000-000000000000", json={"bio": "Nobody"}, headers=headers)
+    assert response.status_code == 404
+
 @pytest.mark.asyncio
 async def test_delete_user(async_client, admin_user, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
@@ -61,6 +113,27 @@ async def test_delete_user(async_client, admin_user, admin_token):
     fetch_response = await async_client.get(f"/users/{admin_user.id}", headers=headers)
     assert fetch_response.status_code == 404
 
+@pytest.mark.asyncio
+async def test_create_user_committed_before_response(app_client, db_session, admin_user, admin_token):
+    # Runs the real get_db. A client that sees 201 must be able to read the user back on any
+    # other connection, so the request has to commit before the response starts.
+    email = "committed@example.com"
+    visible_at_response = []
+
+    async def watching_app(scope, receive, send):
+        async def watching_send(message):
+            if message["type"] == "http.response.start":
+                visible_at_response.append(await db_session.scalar(select(User.id).where(User.email == email)))
+            await send(message)
+        await app(scope, receive, watching_send)
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    # Same application and dependencies as app_client, watched at the start of its response.
+    async with AsyncClient(app=watching_app, base_url="http://testserver") as client:
+        response = await client.post("/users/", json={"email": email, "password": "sS#fdasrongPassword123!", "role": UserRole.AUTHENTICATED.name}, headers=headers)
+    assert response.status_code == 201
+    assert visible_at_response == [UUID(response.json()["id"])]
+
 @pytest.mark.asyncio
 async def test_create_user_duplicate_email(async_client, verified_user):
     user_data = {
@@ -72,6 +145,15 @@ async def test_create_user_duplicate_email(async_client, verified_user):
     assert response.status_code == 400
     assert "Email already exists" in response.json().get("detail", "")
 
+@pytest.mark.asyncio
+async def test_register_without_free_nickname(async_client, verified_user, monkeypatch):
+    async def taken_nickname(session):
+        return verified_user.nickname
+    monkeypatch.setattr(NicknameService, "allocate", taken_nickname)
+    response = await async_client.post("/register/", json={"email": "unique@example.com", "password": "AnotherPassword123!", "role": UserRole.ANONYMOUS.name})
+    assert response.status_code == 409
+    assert "nickname" in response.json()["detail"]
+
 @pytest.mark.asyncio
 async def test_create_user_invalid_email(async_client):
     user_data = {
@@ -144,6 +226,33 @@ async def test_login_locked_user(async_client, locked_user):
     assert response.status_code == 400
     assert "Account locked due to too many failed login attempts." in response.json().get("detail", "")
 @pytest.mark.asyncio
+async def test_login_lockout_persists(app_client, db_session, verified_user):
+    # Runs the real get_db, which rolls back on errors, so the failed attempts must be committed before the 401.
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    bad_form = urlencode({"username": verified_user.email, "password": "IncorrectPassword123!"})
+    for _ in range(get_settings().max_login_attempts):
+        response = await app_client.post("/login/", data=bad_form, headers=headers)
+        assert response.status_code == 401
+    form_data = urlencode({"username": verified_user.email, "password": "MySuperPassword$1234"})
+    response = await app_client.post("/login/", data=form_data, headers=headers)
+    assert response.status_code == 400
+    stored = (await db_session.execute(
+        select(User.is_locked, User.failed_login_attempts, User.token_version).where(User.id == verified_user.id)
+    )).one()
+    assert stored.is_locked is True
+    assert stored.failed_login_attempts == get_settings().max_login_attempts
+    assert stored.token_version == verified_user.token_version + 1
+
+@pytest.mark.asyncio
+async def test_login_when_hashing_busy(app_client, verified_user, monkeypatch):
+    # Runs the real get_db, which must let PasswordHashingBusy reach its 503 handler.
+    monkeypatch.setattr(password_service.settings, "password_hash_max_pending", 0)
+    form_data = {"username": verified_user.email, "password": "MySuperPassword$1234"}
+    response = await app_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+@pytest.mark.asyncio
 async def test_delete_user_does_not_exist(async_client, admin_token):
     non_existent_user_id = "00000000-0000-0000-0000-000000000000"  # Valid UUID format
     headers = {"Authorization": f"Bearer {admin_token}"}
@@ -190,3 +299,243 @@ async def test_list_users_unauthorized(async_client, user_token):
         headers={"Authorization": f"Bearer {user_token}"}
     )
     assert response.status_code == 403  # Forbidden, as expected for regular user
+
+@pytest.mark.asyncio
+async def test_list_users_cursor_pagination(async_client, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/?limit=20", headers=headers)
+    data = response.json()
+    seen = [item["id"] for item in data["items"]]
+    while data["next_cursor"]:
+        response = await async_client.get(f"/users/?limit=20&cursor={data['next_cursor']}", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["page"] is None
+        assert any(link["rel"] == "next" for link in data["links"]) == bool(data["next_cursor"])
+        seen.extend(item["id"] for item in data["items"])
+    assert len(set(seen)) == 51  # 50 users plus the admin
+
+@pytest.mark.asyncio
+async def test_list_users_invalid_cursor(async_client, admin_token):
+    response = await async_client.get("/users/?cursor=garbage", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_list_users_cached_until_write(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    first = await async_client.get("/users/?skip=0&limit=10", headers=headers)
+    second = await async_client.get("/users/?limit=10&skip=0", headers=headers)
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert ListCache.metrics()["hits"] == 1
+    await async_client.put(f"/users/{admin_user.id}", json={"bio": "Listed"}, headers=headers)
+    third = await async_client.get("/users/?skip=0&limit=10", headers=headers)
+    assert [user["bio"] for user in third.json()["items"] if user["id"] == str(admin_user.id)] == ["Listed"]
+
+@pytest.mark.asyncio
+async def test_list_users_without_count(async_client, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/?skip=40&limit=10&count=none", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] is None
+    assert len(data["items"]) == 10
+    rels = {link["rel"] for link in data["links"]}
+    assert "next" in rels and "last" not in rels
+    response = await async_client.get("/users/?skip=50&limit=10&count=none", headers=headers)
+    assert all(link["rel"] != "next" for link in response.json()["links"])
+
+@pytest.mark.asyncio
+async def test_list_users_sparse_fields(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/?fields=role,id,nickname", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert list(data["items"][0]) == ["nickname", "role", "id"]
+    assert data["links"] == []
+    response = await async_client.get("/users/?fields=nickname,links", headers=headers)
+    assert list(response.json()["items"][0]) == ["nickname"]
+    assert {link["rel"] for link in response.json()["links"]} >= {"self", "first"}
+    response = await async_client.get("/users/?fields=nickname,hashed_password", headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_get_user_sparse_fields(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get(f"/users/{admin_user.id}?fields=id,email", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"email": admin_user.email, "id": str(admin_user.id)}
+    assert response.headers["ETag"] == (await async_client.get(f"/users/{admin_user.id}", headers=headers)).headers["ETag"]
+    response = await async_client.get(f"/users/{admin_user.id}?fields=links", headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_batch_get_users(async_client, admin_user, manager_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    missing_id = "00000000-0000-0000-0000-000000000000"
+    ids = [str(manager_user.id), missing_id, str(admin_user.id), str(manager_user.id)]
+    response = await async_client.post("/users/batch-get", json={"ids": ids}, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [user["id"] for user in data["items"]] == [str(manager_user.id), str(admin_user.id)]
+    assert data["items"][1]["email"] == admin_user.email
+    assert data["missing"] == [missing_id]
+    response = await async_client.post("/users/batch-get?fields=nickname", json={"ids": ids}, headers=headers)
+    assert response.json()["items"] == [{"nickname": manager_user.nickname}, {"nickname": admin_user.nickname}]
+
+@pytest.mark.asyncio
+async def test_batch_get_users_limits(async_client, admin_token, user_token):
+    ids = [str(uuid4()) for _ in range(get_settings().batch_get_max_ids + 1)]
+    response = await async_client.post("/users/batch-get", json={"ids": ids}, headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 400
+    response = await async_client.post("/users/batch-get", json={"ids": []}, headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 422
+    response = await async_client.post("/users/batch-get", json={"ids": ids[:1]}, headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_list_users_search_and_filters(async_client, admin_user, manager_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get(f"/users/?q={manager_user.email[:6].upper()}&limit=1", headers=headers)
+    data = response.json()
+    assert [user["id"] for user in data["items"]] == [str(manager_user.id)]
+    assert data["total"] == 1
+    assert all("q=" in link["href"] for link in data["links"])
+    response = await async_client.get("/users/?role=ADMIN", headers=headers)
+    assert [user["id"] for user in response.json()["items"]] == [str(admin_user.id)]
+    assert "role=ADMIN" in response.json()["links"][0]["href"]
+    response = await async_client.get("/users/?role=MANAGER", headers=headers)
+    assert [user["id"] for user in response.json()["items"]] == [str(manager_user.id)]
+    response = await async_client.get("/users/?is_locked=true", headers=headers)
+    assert response.json()["items"] == []
+    response = await async_client.get("/users/?match=anywhere&q=x", headers=headers)
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_list_users_sees_lockout_and_unlock(async_client, db_session, admin_user, verified_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/?is_locked=true", headers=headers)
+    assert response.json()["items"] == []
+    form_data = urlencode({"username": verified_user.email, "password": "IncorrectPassword123!"})
+    for _ in range(get_settings().max_login_attempts):
+        await async_client.post("/login/", data=form_data, headers={"Content-Type": "application/x-www-form-urlencoded"})
+    response = await async_client.get("/users/?is_locked=true", headers=headers)
+    assert [user["id"] for user in response.json()["items"]] == [str(verified_user.id)]
+    assert await UserService.unlock_user_account(db_session, verified_user.id) is True
+    await db_session.commit()
+    response = await async_client.get("/users/?is_locked=true", headers=headers)
+    assert response.json()["items"] == []
+
+@pytest.mark.asyncio
+async def test_search_users_by_bio(async_client, admin_user, manager_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    for user, bio in ((admin_user, "Python and FastAPI backend developer"), (manager_user, "Python data engineer")):
+        await async_client.put(f"/users/{user.id}", json={"bio": bio}, headers=headers)
+    response = await async_client.get("/users/search?q=python&limit=1", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["size"] == 1
+    assert "<mark>Python</mark>" in data["items"][0]["snippet"]
+    assert data["links"][1]["rel"] == "next" and "q=python" in data["links"][1]["href"]
+    response = await async_client.get(f"/users/search?q=python&limit=1&cursor={data['next_cursor']}", headers=headers)
+    following = response.json()
+    assert {data["items"][0]["id"], following["items"][0]["id"]} == {str(admin_user.id), str(manager_user.id)}
+    assert following["next_cursor"] is None
+    response = await async_client.get("/users/search?q=fastapi", headers=headers)
+    assert [user["id"] for user in response.json()["items"]] == [str(admin_user.id)]
+    response = await async_client.get("/users/search?q=python&cursor=bogus", headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_list_users_estimated_count(async_client, admin_token, users_with_same_role_50_users):
+    response = await async_client.get("/users/?count=estimated", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 51
+    assert data["total_estimated"] is False
+
+@pytest.mark.asyncio
+async def test_refresh_token_flow(async_client, verified_user):
+    form_data = {"username": verified_user.email, "password": "MySuperPassword$1234"}
+    response = await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
+    first_refresh = response.json()["refresh_token"]
+    assert first_refresh
+
+    response = await async_client.post("/token/refresh", json={"refresh_token": first_refresh})
+    assert response.status_code == 200
+    data = response.json()
+    assert decode_token(data["access_token"])["sub"] == verified_user.email
+    assert data["refresh_token"] != first_refresh
+
+    # Replaying the first token is treated as theft and revokes the rotated one too
+    response = await async_client.post("/token/refresh", json={"refresh_token": first_refresh})
+    assert response.status_code == 401
+    response = await async_client.post("/token/refresh", json={"refresh_token": data["refresh_token"]})
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_refresh_token_reuse_revocation_persists(app_client, verified_user):
+    # Runs the real get_db, which rolls back on errors, so the family revocation must be committed before the 401.
+    form_data = {"username": verified_user.email, "password": "MySuperPassword$1234"}
+    response = await app_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
+    first_refresh = response.json()["refresh_token"]
+    rotated = (await app_client.post("/token/refresh", json={"refresh_token": first_refresh})).json()["refresh_token"]
+    response = await app_client.post("/token/refresh", json={"refresh_token": first_refresh})
+    assert response.status_code == 401
+    response = await app_client.post("/token/refresh", json={"refresh_token": rotated})
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_reset_password_revokes_tokens(async_client, db_session, verified_user):
+    form_data = {"username": verified_user.email, "password": "MySuperPassword$1234"}
+    tokens = (await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})).json()
+    assert await UserService.reset_password(db_session, verified_user.id, "NewPassword123!") is True
+    await db_session.commit()
+    await RevocationService.refresh(db_session)
+    response = await async_client.post("/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+    response = await async_client.post("/logout/", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_logout_revokes_access_token(async_client, db_session, verified_user):
+    form_data = {"username": verified_user.email, "password": "MySuperPassword$1234"}
+    tokens = (await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    lookups = VerifiedTokenCache.metrics()
+    response = await async_client.post("/logout/", json={"refresh_token": tokens["refresh_token"]}, headers=headers)
+    assert response.status_code == 204
+    # The token is decoded once, by the auth dependency, and logout reuses its claims.
+    after = VerifiedTokenCache.metrics()
+    assert after["hits"] + after["misses"] == lookups["hits"] + lookups["misses"] + 1
+    await db_session.commit()
+    await RevocationService.refresh(db_session)
+    response = await async_client.post("/logout/", headers=headers)
+    assert response.status_code == 401
+    response = await async_client.post("/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_demoted_admin_token_rejected(async_client, db_session, admin_user, manager_user, manager_token):
+    admin_token = create_access_token(data={"sub": admin_user.email, "role": "ADMIN", "uid": str(admin_user.id), "ver": admin_user.token_version})
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+    assert (await async_client.get(f"/users/{manager_user.id}", headers=admin_headers)).status_code == 200
+
+    response = await async_client.put(f"/users/{admin_user.id}", json={"role": "AUTHENTICATED"}, headers={"Authorization": f"Bearer {manager_token}"})
+    assert response.status_code == 200
+    await db_session.commit()
+    await RevocationService.refresh(db_session)
+    assert (await async_client.get(f"/users/{manager_user.id}", headers=admin_headers)).status_code == 401
+
+@pytest.mark.asyncio
+async def test_nickname_availability(async_client, user):
+    response = await async_client.get(f"/nicknames/{user.nickname}/availability")
+    assert response.status_code == 200
+    assert response.json() == {"nickname": user.nickname, "available": False}
+    response = await async_client.get("/nicknames/unused_nickname/availability")
+    assert response.json()["available"] is True
+
+@pytest.mark.asyncio
+async def test_nickname_availability_rejects_invalid(async_client):
+    response = await async_client.get("/nicknames/no spaces/availability")
+    assert response.status_code == 422
@@ -0,0 +1,147 @@
+"""
+Latency benchmark for the authentication dependency chain on GET /users/{id}.
+
+Serves the same endpoint twice: behind the previous chain (a router-level
+OAuth2PasswordBearer plus sync get_current_user and role_checker, each run in the
+threadpool) and behind the current async chain, and records p50/p99 latency and
+throughput under concurrent load as test properties. A second benchmark checks that
+the event loop keeps serving GET /users/{id} while logins verify bcrypt hashes in the
+password pool, against the same load with verification run inline.
+"""
+from builtins import classmethod, dict, int, len, list, max, range, round, sorted
+import asyncio
+import time
+from uuid import UUID
+import pytest
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.security import OAuth2PasswordBearer
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dependencies import get_read_db, oauth2_scheme, require_role
+from app.routers import user_routes
+from app.routers.user_routes import get_user
+from app.schemas.user_schemas import UserResponse
+from app.services.jwt_service import decode_token
+from app.services.password_service import PasswordService
+from app.utils.security import verify_password
+
+pytestmark = [pytest.mark.asyncio, pytest.mark.slow]
+
+REQUESTS = 400
+CONCURRENCY = 20
+LOGINS = 8
+
+legacy_router_scheme = OAuth2PasswordBearer(tokenUrl="login")
+
+
+def legacy_get_current_user(token: str = Depends(oauth2_scheme)):
+    payload = decode_token(token)
+    if payload is None or payload.get("sub") is None or payload.get("role") is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return {"user_id": payload["sub"], "role": payload["role"]}
+
+
+def legacy_require_role(role):
+    def role_checker(current_user: dict = Depends(legacy_get_current_user)):
+        if current_user["role"] not in role:
+            raise HTTPException(status_code=403, detail="Operation not permitted")
+        return current_user
+    return role_checker
+
+
+def build_app(role_dependency, *extra_dependencies) -> FastAPI:
+    """The users router behind no middleware, with GET /users/{id} served through the given chain."""
+    bench_app = FastAPI()
+
+    @bench_app.get("/users/{user_id}", response_model=UserResponse, dependencies=list(extra_dependencies))
+    async def bench_get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(get_read_db),
+                             current_user: dict = Depends(role_dependency)):
+        return await get_user(user_id, request, db, current_user, None, None)
+
+    # Registered after the route above, which therefore wins.
+    bench_app.include_router(user_routes.router)
+    return bench_app
+
+
+async def measure(asgi_app, url, headers):
+    latencies = []
+
+    async with AsyncClient(app=asgi_app, base_url="http://testserver") as client:
+        async def worker(count):
+            for _ in range(count):
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200
+
+        await worker(10)  # warm up the user and token caches
+        latencies.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(REQUESTS // CONCURRENCY) for _ in range(CONCURRENCY)))
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(latencies)
+    return {
+        "p50_ms": round(latencies[len(latencies) // 2], 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2),
+        "max_ms": round(max(latencies), 2),
+        "rps": round(len(latencies) / elapsed),
+    }
+
+
+async def test_get_user_auth_chain_latency(app_engine, admin_user, admin_token, record_property):
+    url = f"/users/{admin_user.id}"
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    legacy_app = build_app(legacy_require_role(["ADMIN", "MANAGER"]), Depends(legacy_router_scheme))
+    current_app = build_app(require_role(["ADMIN", "MANAGER"]))
+    # Run each twice, alternating, so neither side benefits from going second.
+    legacy = await measure(legacy_app, url, headers)
+    current = await measure(current_app, url, headers)
+    legacy = await measure(legacy_app, url, headers)
+    current = await measure(current_app, url, headers)
+
+    record_property("legacy", legacy)
+    record_property("async", current)
+    # The async chain skips two threadpool hops per request, so it must not be slower.
+    assert current["p50_ms"] <= legacy["p50_ms"]
+
+
+async def get_latencies_during_logins(client, url, headers, email):
+    """Times sequential GETs for as long as LOGINS concurrent logins are verifying passwords."""
+    form = {"username": email, "password": "MySuperPassword$1234"}
+    logins = asyncio.gather(*(client.post("/login/", data=form) for _ in range(LOGINS)))
+    latencies = []
+    while not logins.done():
+        started = time.perf_counter()
+        response = await client.get(url, headers=headers)
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200
+    assert [response.status_code for response in await logins] == [200] * LOGINS
+    return sorted(latencies)
+
+
+async def test_event_loop_keeps_up_while_hashing(app_client, admin_user, admin_token, verified_user,
+                                                 monkeypatch, record_property):
+    url = f"/users/{admin_user.id}"
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    # Start the pool's workers and warm the caches so neither shows up in the timings.
+    await PasswordService.verify("MySuperPassword$1234", verified_user.hashed_password)
+    await app_client.get(url, headers=headers)
+    started = time.perf_counter()
+    verify_password("MySuperPassword$1234", verified_user.hashed_password)
+    bcrypt_ms = (time.perf_counter() - started) * 1000
+
+    offloaded = await get_latencies_during_logins(app_client, url, headers, verified_user.email)
+
+    async def verify_inline(cls, plain_password, hashed_password):
+        return verify_password(plain_password, hashed_password)
+    monkeypatch.setattr(PasswordService, "verify", classmethod(verify_inline))
+    inline = await get_latencies_during_logins(app_client, url, headers, verified_user.email)
+
+    record_property("bcrypt_verify_ms", round(bcrypt_ms, 2))
+    record_property("offloaded", {"requests": len(offloaded), "max_ms": round(offloaded[-1], 2)})
+    record_property("inline", {"requests": len(inline), "max_ms": round(inline[-1], 2)})
+    # Inline, a GET can wait behind a whole bcrypt verify; offloaded, none ever does.
+    assert offloaded[-1] < bcrypt_ms
+    assert offloaded[-1] < inline[-1]
+    assert len(offloaded) > len(inline)
@@ -0,0 +1,50 @@
+"""
+Benchmark for resolving 50 user ids.
+
+Fetches the same users with 50 GET /users/{id} requests and with one POST
+/users/batch-get, starting from an empty user cache each time, and reports the time of
+each. Every GET pays authentication, a session and a SELECT of its own.
+"""
+from builtins import range, round, str
+import time
+import uuid
+import pytest
+from sqlalchemy import insert
+from app.models.user_model import User, UserRole
+from app.services.user_cache import UserCache
+
+pytestmark = [pytest.mark.asyncio, pytest.mark.slow]
+
+USERS = 50
+
+
+async def seed_users(session):
+    user_ids = [uuid.uuid4() for _ in range(USERS)]
+    await session.execute(insert(User), [
+        {"id": user_id, "email": f"batch{i}@example.com", "nickname": f"batch_{i}", "hashed_password": "hashed",
+         "role": UserRole.AUTHENTICATED, "email_verified": True}
+        for i, user_id in enumerate(user_ids)
+    ])
+    await session.commit()
+    return [str(user_id) for user_id in user_ids]
+
+
+async def test_batch_get_speedup(async_client, db_session, admin_token, record_property):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    user_ids = await seed_users(db_session)
+
+    await UserCache.clear()
+    started = time.perf_counter()
+    singles = [(await async_client.get(f"/users/{user_id}", headers=headers)).json() for user_id in user_ids]
+    singles_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    await UserCache.clear()
+    started = time.perf_counter()
+    batch = (await async_client.post("/users/batch-get", json={"ids": user_ids}, headers=headers)).json()
+    batch_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    record_property("singles_ms", singles_ms)
+    record_property("batch_ms", batch_ms)
+    assert batch["items"] == singles
+    assert batch["missing"] == []
+    assert batch_ms < singles_ms
@@ -0,0 +1,69 @@
+"""
+Microbenchmark for HATEOAS link generation on a 100-row page.
+
+Builds the same links the previous way (request.url_for per user link and a validated
+PaginationLink per pagination link) and from the route templates compiled at startup,
+checks both give the same URLs and that the templates are faster.
+"""
+from builtins import max, min, range, round, str
+import time
+from uuid import uuid4
+import pytest
+from starlette.requests import Request
+from app.main import app
+from app.schemas.pagination_schema import PaginationLink
+from app.utils.link_generation import USER_LINK_ACTIONS, create_link, create_user_links, pagination_link_rows
+
+pytestmark = pytest.mark.slow
+
+ROWS = 100
+ROUNDS = 20
+
+
+def legacy_user_links(user_id, request):
+    return [
+        create_link(rel, str(request.url_for(action, user_id=str(user_id))), method, action_desc)
+        for rel, action, method, action_desc in USER_LINK_ACTIONS
+    ]
+
+
+def legacy_pagination_links(request, skip, limit, total_items):
+    base_url = str(request.url).split("?")[0]
+    links = [
+        PaginationLink(rel="self", href=f"{base_url}?skip={skip}&limit={limit}"),
+        PaginationLink(rel="first", href=f"{base_url}?skip=0&limit={limit}"),
+        PaginationLink(rel="last", href=f"{base_url}?skip={max(0, (total_items + limit - 1) // limit * limit - limit)}&limit={limit}"),
+        PaginationLink(rel="next", href=f"{base_url}?skip={skip + limit}&limit={limit}"),
+    ]
+    if skip > 0:
+        links.append(PaginationLink(rel="prev", href=f"{base_url}?skip={max(skip - limit, 0)}&limit={limit}"))
+    return links
+
+
+def measure(build):
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        result = build()
+        timings.append(time.perf_counter() - started)
+    return result, round(min(timings) * 1e6)
+
+
+def test_link_generation_speedup(record_property):
+    request = Request({"type": "http", "scheme": "http", "server": ("testserver", 80), "path": "/users/", "root_path": "",
+                       "query_string": b"skip=100&limit=100", "headers": [(b"host", b"testserver")], "app": app, "router": app.router})
+    user_ids = [uuid4() for _ in range(ROWS)]
+
+    legacy_users, legacy_users_us = measure(lambda: [legacy_user_links(user_id, request) for user_id in user_ids])
+    template_users, template_users_us = measure(lambda: [create_user_links(user_id, request) for user_id in user_ids])
+    legacy_pages, legacy_pages_us = measure(lambda: [legacy_pagination_links(request, 100, 100, 1000) for _ in range(ROWS)])
+    template_pages, template_pages_us = measure(lambda: [pagination_link_rows(request, 100, 100, 1000) for _ in range(ROWS)])
+
+    record_property("user_links_url_for_us", legacy_users_us)
+    record_property("user_links_templates_us", template_users_us)
+    record_property("pagination_links_validated_us", legacy_pages_us)
+    record_property("pagination_links_templates_us", template_pages_us)
+    assert template_users == legacy_users
+    assert [row["href"] for row in template_pages[0]] == [str(link.href) for link in legacy_pages[0]]
+    assert template_users_us < legacy_users_us
+    assert template_pages_us < legacy_pages_us
@@ -0,0 +1,91 @@
+"""
+Round-trip benchmark for the login pipeline.
+
+Counts the SQL statements and commits issued per login attempt by the previous
+route flow (is_account_locked + login_user through full ORM rows) and by the
+current single-SELECT / single-UPDATE pipeline.
+"""
+from builtins import len
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import event, select
+from app.dependencies import get_settings
+from app.models.user_model import User
+from app.services.password_service import PasswordService
+from app.services.user_service import LoginStatus, UserService
+
+pytestmark = [pytest.mark.asyncio, pytest.mark.slow]
+settings = get_settings()
+
+
+@contextmanager
+def count_round_trips(db_session):
+    counts = {"statements": 0, "commits": 0}
+
+    def on_execute(*args):
+        counts["statements"] += 1
+
+    def on_commit(conn):
+        counts["commits"] += 1
+
+    engine = db_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", on_execute)
+    event.listen(engine, "commit", on_commit)
+    try:
+        yield counts
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+        event.remove(engine, "commit", on_commit)
+
+
+async def legacy_login(session, email, password):
+    """The login flow as the route ran it before the single-round-trip pipeline."""
+    result = await session.execute(select(User).filter_by(email=email))
+    await session.commit()
+    user = result.scalars().first()
+    if user and user.is_locked:
+        return None
+    result = await session.execute(select(User).filter_by(email=email))
+    await session.commit()
+    user = result.scalars().first()
+    if user is None or not user.email_verified or user.is_locked:
+        return None
+    if await PasswordService.verify(password, user.hashed_password):
+        user.failed_login_attempts = 0
+        user.last_login_at = datetime.now(timezone.utc)
+    else:
+        user.failed_login_attempts += 1
+        if user.failed_login_attempts >= settings.max_login_attempts:
+            user.is_locked = True
+    session.add(user)
+    await session.commit()
+    return user if user.failed_login_attempts == 0 else None
+
+
+async def test_login_round_trips(db_session, verified_user, record_property):
+    with count_round_trips(db_session) as legacy:
+        assert await legacy_login(db_session, verified_user.email, "MySuperPassword$1234") is not None
+    with count_round_trips(db_session) as pipeline:
+        result = await UserService.authenticate(db_session, verified_user.email, "MySuperPassword$1234")
+    assert result.status is LoginStatus.SUCCESS
+
+    record_property("legacy", legacy)
+    record_property("pipeline", pipeline)
+    assert pipeline["statements"] == 2
+    assert pipeline["statements"] < legacy["statements"]
+    assert pipeline["commits"] < legacy["commits"]
+
+
+async def test_failed_login_round_trips(db_session, verified_user):
+    with count_round_trips(db_session) as pipeline:
+        result = await UserService.authenticate(db_session, verified_user.email, "WrongPassword$1234")
+    assert result.status is LoginStatus.INVALID_CREDENTIALS
+    assert pipeline["statements"] == 2
+
+
+async def test_unknown_email_round_trips(db_session):
+    with count_round_trips(db_session) as pipeline:
+        result = await UserService.authenticate(db_session, "nobody@example.com", "WrongPassword$1234")
+    assert result.status is LoginStatus.INVALID_CREDENTIALS
+    assert pipeline["statements"] == 1
@@ -0,0 +1,60 @@
+"""
+Memory and throughput benchmark for reading 10,000 users.
+
+Reads the same users as ORM instances (list_users) and as rows of just the listed
+columns (list_user_rows), and reports the peak memory of each read, as traced by
+tracemalloc, and rows per second. The session is cleared before every read so the
+ORM path pays for building its identity map each time, as a request's session would.
+"""
+from builtins import min, range, round
+import time
+import tracemalloc
+import uuid
+import pytest
+from sqlalchemy import insert
+from app.models.user_model import User, UserRole
+from app.services.user_service import UserService
+
+pytestmark = [pytest.mark.asyncio, pytest.mark.slow]
+
+ROWS = 10_000
+ROUNDS = 3
+
+
+async def seed_users(session):
+    await session.execute(insert(User), [
+        {"id": uuid.uuid4(), "email": f"reader{i}@example.com", "nickname": f"reader_{i}", "first_name": "John",
+         "last_name": "Doe", "bio": "Experienced software developer specializing in web applications.",
+         "profile_picture_url": "https://example.com/profiles/john.jpg", "hashed_password": "hashed",
+         "role": UserRole.AUTHENTICATED, "email_verified": True}
+        for i in range(ROWS)
+    ])
+    await session.commit()
+
+
+async def measure(session, read):
+    timings = []
+    for _ in range(ROUNDS):
+        session.expunge_all()
+        started = time.perf_counter()
+        rows = await read(session, limit=ROWS)
+        timings.append(time.perf_counter() - started)
+    session.expunge_all()
+    tracemalloc.start()
+    rows = await read(session, limit=ROWS)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return rows, round(peak / 2**20, 1), round(ROWS / min(timings))
+
+
+async def test_read_path_cost(db_session, record_property):
+    await seed_users(db_session)
+
+    users, orm_mb, orm_rate = await measure(db_session, UserService.list_users)
+    rows, row_mb, row_rate = await measure(db_session, UserService.list_user_rows)
+
+    record_property("orm", {"peak_mib": orm_mb, "rows_per_second": orm_rate})
+    record_property("rows", {"peak_mib": row_mb, "rows_per_second": row_rate})
+    assert [row.id for row in rows] == [user.id for user in users]
+    assert row_mb < orm_mb
+    assert row_rate > orm_rate
@@ -0,0 +1,81 @@
+"""
+Round-trip and throughput benchmark for registration.
+
+Runs the previous flow (an email lookup in the route and again in the service, a
+lookup per generated nickname, a COUNT(*) for the first-user check, then the INSERT)
+against the current single INSERT ... ON CONFLICT statement, and reports statements
+per registration and registrations per second. Password hashing is stubbed out on
+both sides so only the database work is compared.
+
+Against a local database the pipeline is not faster in wall-clock terms: SQLAlchemy
+2.0 does not cache compiled PostgreSQL INSERT ... ON CONFLICT statements, so each
+registration pays a few milliseconds of compilation. Each round trip it saves costs
+about as much over a real network, and bcrypt hashing outweighs both.
+"""
+from builtins import range, round
+import time
+import pytest
+from sqlalchemy import func, select
+from app.models.user_model import User, UserRole
+from app.services.password_service import PasswordService
+from app.services.user_service import UserService
+from app.utils.nickname_gen import generate_nickname
+from app.utils.query_metrics import QueryMetrics
+from app.utils.security import generate_verification_token
+
+pytestmark = [pytest.mark.asyncio, pytest.mark.slow]
+
+REGISTRATIONS = 200
+
+
+async def legacy_register(session, user_data):
+    """Registration as the route and service ran it before the single-statement pipeline."""
+    for _ in range(2):
+        if (await session.execute(select(User).filter_by(email=user_data["email"]))).scalars().first():
+            return None
+    nickname = generate_nickname()
+    while (await session.execute(select(User).filter_by(nickname=nickname))).scalars().first():
+        nickname = generate_nickname()
+    user_count = (await session.execute(select(func.count()).select_from(User))).scalar()
+    user = User(email=user_data["email"], nickname=nickname, hashed_password="hashed",
+                role=UserRole.ADMIN if user_count == 0 else UserRole.ANONYMOUS)
+    if user.role == UserRole.ADMIN:
+        user.email_verified = True
+    else:
+        user.verification_token = generate_verification_token()
+    session.add(user)
+    await session.commit()
+    return user
+
+
+async def pipeline_register(session, user_data, email_service):
+    user = await UserService.create(session, user_data, email_service)
+    await session.commit()
+    return user
+
+
+async def measure(register):
+    counts = QueryMetrics.start_request()
+    started = time.perf_counter()
+    for i in range(REGISTRATIONS):
+        assert await register({"email": f"bench{i}_{time.monotonic_ns()}@example.com", "password": "Secure*1234", "role": "ANONYMOUS"}) is not None
+    elapsed = time.perf_counter() - started
+    return {
+        "statements": round(counts["queries"] / REGISTRATIONS, 2),
+        "commits": round(counts["commits"] / REGISTRATIONS, 2),
+        "per_second": round(REGISTRATIONS / elapsed),
+    }
+
+
+async def test_registration_throughput(db_session, email_service, monkeypatch, record_property):
+    async def fast_hash(password):
+        return "hashed"
+    monkeypatch.setattr(PasswordService, "hash", fast_hash)
+
+    legacy = await measure(lambda data: legacy_register(db_session, data))
+    pipeline = await measure(lambda data: pipeline_register(db_session, data, email_service))
+
+    record_property("legacy", legacy)
+    record_property("pipeline", pipeline)
+    assert pipeline["statements"] < legacy["statements"]
+
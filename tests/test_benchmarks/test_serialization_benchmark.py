@@ -0,0 +1,69 @@
+"""
+Serialization benchmark for a page of 1,000 users.
+
+Encodes the same users twice: the previous way (model_validate per row into a
+UserListResponse, then FastAPI's response_model validation, jsonable_encoder and
+json.dumps) and with the compiled ModelEncoders the route uses now. Reports the cost
+per 1,000 users of each and checks both produce the same bytes.
+"""
+from builtins import min, next, range, round
+import time
+import uuid
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from app.models.user_model import User, UserRole
+from app.routers import user_routes
+from app.routers.user_routes import USER_ENCODER, USER_LIST_ENCODER
+from app.schemas.pagination_schema import PaginationLink
+from app.schemas.user_schemas import UserListResponse, UserResponse
+
+pytestmark = [pytest.mark.asyncio, pytest.mark.slow]
+
+USERS = 1000
+ROUNDS = 5
+
+
+def make_users():
+    return [
+        User(id=uuid.uuid4(), email=f"user{i}@example.com", nickname=f"clever_panda_{i}", first_name="John",
+             last_name="Doe", bio="Experienced software developer specializing in web applications.",
+             profile_picture_url="https://example.com/profiles/john.jpg", linkedin_profile_url="https://linkedin.com/in/johndoe",
+             github_profile_url="https://github.com/johndoe", role=UserRole.AUTHENTICATED, is_professional=False)
+        for i in range(USERS)
+    ]
+
+
+LINKS = [PaginationLink(rel="self", href="http://testserver/users/?skip=0&limit=1000")]
+
+
+async def legacy_encode(users, response_field):
+    page = UserListResponse(items=[UserResponse.model_validate(user) for user in users], total=USERS, page=1, size=USERS, links=LINKS)
+    content = await serialize_response(field=response_field, response_content=page)
+    return JSONResponse(content).body
+
+
+async def encoder_encode(users, response_field):
+    return USER_LIST_ENCODER.encode(items=[USER_ENCODER.values(user) for user in users], total=USERS, page=1, size=USERS, links=LINKS)
+
+
+async def measure(encode, users, response_field):
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        body = await encode(users, response_field)
+        timings.append(time.perf_counter() - started)
+    return body, round(min(timings) * 1000, 2)
+
+
+async def test_list_serialization_cost(record_property):
+    users = make_users()
+    response_field = next(route for route in user_routes.router.routes if route.name == "list_users").response_field
+
+    legacy_body, legacy_ms = await measure(legacy_encode, users, response_field)
+    encoder_body, encoder_ms = await measure(encoder_encode, users, response_field)
+
+    record_property("legacy_ms", legacy_ms)
+    record_property("encoder_ms", encoder_ms)
+    assert encoder_body == legacy_body
+    assert encoder_ms < legacy_ms
@@ -0,0 +1,19 @@
+from builtins import range, sum
+from app.utils.bloom_filter import BloomFilter
+
+def test_added_items_are_always_found():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    bloom.update(f"user_{i}" for i in range(1000))
+    assert all(f"user_{i}" in bloom for i in range(1000))
+
+def test_false_positive_rate_near_target():
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    bloom.update(f"user_{i}" for i in range(10000))
+    false_positives = sum(f"other_{i}" in bloom for i in range(10000))
+    assert false_positives < 200
+
+def test_readding_does_not_count_twice():
+    bloom = BloomFilter(capacity=100)
+    assert bloom.add("clever_panda_1") is True
+    assert bloom.add("clever_panda_1") is False
+    assert bloom.stats()["items"] == 1
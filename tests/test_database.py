@@ -0,0 +1,45 @@
+import pytest
+from app.database import Database
+from app.dependencies import get_settings
+from app.utils.metrics import LatencyHistogram
+
+pytestmark = pytest.mark.asyncio
+settings = get_settings()
+
+@pytest.fixture
+async def pooled_database():
+    class PooledDatabase(Database):
+        _engine = None
+        _session_factory = None
+        _pool_wait = LatencyHistogram()
+        _pool_timeouts = 0
+
+    PooledDatabase.initialize(settings.database_url, pool_size=3, max_overflow=2, pool_timeout=5,
+                              pool_pre_ping=True, pool_recycle=600, statement_cache_size=0)
+    yield PooledDatabase
+    await PooledDatabase.dispose()
+
+# Test pool options are applied to the engine
+async def test_initialize_applies_pool_options(pooled_database):
+    pool = pooled_database._engine.pool
+    assert pool.size() == 3
+    assert pool._max_overflow == 2
+    assert pool._timeout == 5
+    assert pool._pre_ping is True
+    assert pool._recycle == 600
+
+# Test warm-up pre-opens connections, capped at the pool size
+async def test_warm_up_opens_connections(pooled_database):
+    await pooled_database.warm_up(10)
+    stats = pooled_database.pool_stats()
+    assert stats["checked_in"] == 3
+    assert stats["checked_out"] == 0
+
+# Test checkout records wait time and shows up as a checked-out connection
+async def test_checkout_records_wait_time(pooled_database):
+    async with pooled_database.get_session_factory()() as session:
+        await pooled_database.checkout(session)
+        stats = pooled_database.pool_stats()
+        assert stats["checked_out"] == 1
+        assert stats["wait_time"]["count"] == 1
+    assert pooled_database.pool_stats()["checked_out"] == 0
@@ -0,0 +1,76 @@
+from builtins import str
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from app.dependencies import get_db, get_read_db
+from app.models.user_model import User, UserRole
+from app.utils.etag import PreconditionFailed
+from app.utils.query_metrics import QueryMetrics
+
+pytestmark = [pytest.mark.asyncio, pytest.mark.usefixtures("app_engine")]
+
+def new_user(email: str) -> User:
+    return User(nickname=email.split("@")[0], email=email, hashed_password="x", role=UserRole.AUTHENTICATED)
+
+# Test the request session commits once when the endpoint succeeds
+async def test_get_db_commits_once_at_end(db_session):
+    counts = QueryMetrics.start_request()
+    dependency = get_db()
+    session = await dependency.__anext__()
+    session.add(new_user("uow_commit@example.com"))
+    await session.flush()
+    with pytest.raises(StopAsyncIteration):
+        await dependency.__anext__()
+    assert counts["commits"] == 1
+    stored = await db_session.scalar(select(User).where(User.email == "uow_commit@example.com"))
+    assert stored is not None
+
+# Test the request session rolls back and re-raises HTTP errors from the endpoint
+async def test_get_db_rolls_back_on_http_error(db_session):
+    dependency = get_db()
+    session = await dependency.__anext__()
+    session.add(new_user("uow_rollback@example.com"))
+    await session.flush()
+    with pytest.raises(HTTPException) as exc_info:
+        await dependency.athrow(HTTPException(status_code=404, detail="User not found"))
+    assert exc_info.value.status_code == 404
+    stored = await db_session.scalar(select(User).where(User.email == "uow_rollback@example.com"))
+    assert stored is None
+
+# Test the request session rolls back and re-raises other errors unchanged for their handlers
+async def test_get_db_reraises_unchanged(db_session):
+    dependency = get_db()
+    session = await dependency.__anext__()
+    session.add(new_user("uow_reraise@example.com"))
+    await session.flush()
+    with pytest.raises(PreconditionFailed):
+        await dependency.athrow(PreconditionFailed("stale"))
+    stored = await db_session.scalar(select(User).where(User.email == "uow_reraise@example.com"))
+    assert stored is None
+
+# Test read-only sessions do not pay a commit round-trip
+async def test_get_read_db_skips_commit(db_session, user):
+    counts = QueryMetrics.start_request()
+    dependency = get_read_db()
+    session = await dependency.__anext__()
+    assert await session.scalar(select(User.email).where(User.id == user.id)) == user.email
+    with pytest.raises(StopAsyncIteration):
+        await dependency.__anext__()
+    assert counts["queries"] == 1
+    assert counts["commits"] == 0
+
+# Test the auth chain resolves without threadpool dispatches
+async def test_auth_chain_stays_on_event_loop(async_client, admin_user, admin_token, monkeypatch):
+    import fastapi.dependencies.utils as dependency_utils
+    dispatched = []
+    run_in_threadpool = dependency_utils.run_in_threadpool
+
+    async def counting_run_in_threadpool(func, *args, **kwargs):
+        dispatched.append(func)
+        return await run_in_threadpool(func, *args, **kwargs)
+
+    monkeypatch.setattr(dependency_utils, "run_in_threadpool", counting_run_in_threadpool)
+    response = await async_client.get(f"/users/{admin_user.id}", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    # Only the test's own get_db override (a plain lambda) may still be sync.
+    assert {getattr(func, "__name__", None) for func in dispatched} <= {"<lambda>"}
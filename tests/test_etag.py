@@ -0,0 +1,25 @@
+from builtins import str
+import pytest
+from app.utils.etag import make_etag, none_match, parse_if_match
+
+def test_etag_round_trip():
+    assert make_etag(7) == '"7"'
+    assert parse_if_match(make_etag(7)) == [7]
+
+@pytest.mark.parametrize("header", [None, "*", " * "])
+def test_if_match_any_version(header):
+    assert parse_if_match(header) is None
+
+def test_if_match_lists_every_strong_tag():
+    assert parse_if_match('"1", "3" ,"5"') == [1, 3, 5]
+
+@pytest.mark.parametrize("header", ['W/"3"', '"abc"', "3", '"-1"'])
+def test_if_match_foreign_tags_match_nothing(header):
+    assert parse_if_match(header) == []
+
+def test_if_none_match_uses_weak_comparison():
+    assert none_match('W/"4"', 4)
+    assert none_match('"3", "4"', 4)
+    assert none_match("*", 4)
+    assert not none_match('"3"', 4)
+    assert not none_match('"abc"', 4)
@@ -6,7 +6,8 @@ from uuid import uuid4
 import pytest
 from fastapi import Request
 
-from app.utils.link_generation import create_link, create_pagination_link, create_user_links, generate_pagination_links
+from app.main import app
+from app.utils.link_generation import create_link, create_pagination_link, create_user_links, generate_pagination_links, pagination_link_rows, route_url
 
 from urllib.parse import urlparse, parse_qs, urlunparse, urlencode
 
@@ -25,8 +26,8 @@ def normalize_url(url):
 @pytest.fixture
 def mock_request():
     request = MagicMock(spec=Request)
-    request.url_for = MagicMock(side_effect=lambda action, user_id: f"http://testserver/{action}/{user_id}")
     request.url = "http://testserver/users"
+    request.base_url = "http://testserver/"
     return request
 
 def test_create_link():
@@ -37,9 +38,9 @@ def test_create_user_links(mock_request):
     user_id = uuid4()
     links = create_user_links(user_id, mock_request)
     assert len(links) == 3
-    assert normalize_url(str(links[0].href)) == f"http://testserver/get_user/{user_id}"
-    assert normalize_url(str(links[1].href)) == f"http://testserver/update_user/{user_id}"
-    assert normalize_url(str(links[2].href)) == f"http://testserver/delete_user/{user_id}"
+    # get_user, update_user and delete_user share one path; the links differ by action.
+    assert [normalize_url(str(link.href)) for link in links] == [f"http://testserver/users/{user_id}"] * 3
+    assert [link.action for link in links] == ["view", "update", "delete"]
 
 def test_generate_pagination_links(mock_request):
     skip = 10
@@ -49,3 +50,29 @@ def test_generate_pagination_links(mock_request):
     assert len(links) >= 4
     expected_self_url = "http://testserver/users?limit=5&skip=10"
     assert normalize_url(str(links[0].href)) == normalize_url(expected_self_url), "Self link should match expected URL"
+
+def test_generate_cursor_pagination_links(mock_request):
+    links = generate_pagination_links(mock_request, 0, 5, 50, next_cursor="abc", prev_cursor="xyz", cursor_mode=True)
+    hrefs = {link.rel: normalize_url(str(link.href)) for link in links}
+    assert hrefs["next"] == normalize_url("http://testserver/users?cursor=abc&limit=5")
+    assert hrefs["prev"] == normalize_url("http://testserver/users?cursor=xyz&limit=5")
+    assert "last" not in hrefs
+
+def make_request(host: str, query_string: bytes = b"") -> Request:
+    return Request({"type": "http", "scheme": "http", "server": ("testserver", 80), "path": "/users/", "root_path": "",
+                    "query_string": query_string, "headers": [(b"host", host.encode())], "app": app, "router": app.router})
+
+@pytest.mark.parametrize("host", ["testserver", "testserver:80", "TestServer:8080"])
+def test_route_url_matches_url_for(host):
+    request = make_request(host)
+    user_id = uuid4()
+    expected = str(create_link("self", str(request.url_for("get_user", user_id=str(user_id))), action="view").href)
+    assert route_url(request, "get_user", user_id=user_id) == expected
+
+@pytest.mark.parametrize("host", ["testserver", "testserver:80"])
+@pytest.mark.parametrize("cursor_mode", [False, True])
+def test_link_rows_match_validated_links(host, cursor_mode):
+    request = make_request(host, b"cursor=abc&limit=5")
+    rows = pagination_link_rows(request, 10, 5, 50, next_cursor="abc", prev_cursor="xyz", cursor_mode=cursor_mode)
+    validated = [link.model_dump(mode="json") for link in generate_pagination_links(request, 10, 5, 50, "abc", "xyz", cursor_mode)]
+    assert rows == validated
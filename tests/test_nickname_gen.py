@@ -0,0 +1,25 @@
+from builtins import len, range, set
+import re
+from app.utils.nickname_gen import NAMESPACE_SIZE, NicknamePermutation, format_nickname, generate_nickname
+
+NICKNAME_PATTERN = re.compile(r'^[\w-]+$')
+
+def test_generated_nickname_is_url_safe():
+    nickname = generate_nickname()
+    assert NICKNAME_PATTERN.match(nickname)
+    assert 3 <= len(nickname) <= 50
+
+def test_namespace_bounds():
+    assert format_nickname(0) == "clever_panda_0"
+    assert format_nickname(NAMESPACE_SIZE - 1) == "zesty_yak_9999"
+
+def test_permutation_has_no_collisions():
+    permutation = NicknamePermutation(b"key")
+    values = [permutation.permute(counter) for counter in range(50000)]
+    assert len(set(values)) == len(values)
+    assert all(0 <= value < NAMESPACE_SIZE for value in values)
+
+def test_permutation_depends_on_key():
+    first, second = NicknamePermutation(b"one"), NicknamePermutation(b"two")
+    assert [first.nickname(i) for i in range(5)] != [second.nickname(i) for i in range(5)]
+    assert first.nickname(7) == NicknamePermutation(b"one").nickname(7)
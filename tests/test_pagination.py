@@ -0,0 +1,33 @@
+from builtins import str
+from datetime import datetime, timezone
+from uuid import uuid4
+import pytest
+from app.utils.pagination import InvalidCursor, decode_cursor, decode_rank_cursor, encode_cursor, encode_rank_cursor
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 12, 17, 3, 49, 43, 648550, tzinfo=timezone.utc)
+    row_id = uuid4()
+    cursor = decode_cursor(encode_cursor(created_at, row_id, "prev"))
+    assert cursor.created_at == created_at
+    assert cursor.id == row_id
+    assert cursor.direction == "prev"
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(datetime.now(timezone.utc), uuid4())
+    assert all(c.isalnum() or c in "-_" for c in cursor)
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(datetime.now(timezone.utc), uuid4(), "sideways")])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+def test_rank_cursor_round_trip_is_exact():
+    row_id = uuid4()
+    cursor = decode_rank_cursor(encode_rank_cursor(0.05000000074505806, row_id))
+    assert cursor.rank == 0.05000000074505806
+    assert cursor.id == row_id
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(datetime.now(timezone.utc), uuid4())])
+def test_invalid_rank_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_rank_cursor(cursor)
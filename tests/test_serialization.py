@@ -0,0 +1,42 @@
+from builtins import str
+from datetime import datetime, timezone
+from typing import List
+import pytest
+from uuid import uuid4
+from app.models.user_model import User, UserRole
+from app.schemas.event_schemas import EventListResponse, EventResponse
+from app.schemas.user_schemas import UserResponse
+from app.utils.serialization import InvalidFieldset, ModelEncoder, parse_fieldset
+
+def test_encoder_matches_model_json():
+    user = User(id=uuid4(), email="john.doe@example.com", nickname="john_doe", first_name="Zoë",
+                role=UserRole.MANAGER, is_professional=True)
+    assert ModelEncoder(UserResponse).encode(user) == UserResponse.model_validate(user).model_dump_json().encode()
+
+def test_encoder_drops_excluded_fields_and_overrides_values():
+    event = EventResponse(id=uuid4(), title="Launch", createdby="John Doe", startdate=datetime(2024, 12, 17, tzinfo=timezone.utc),
+                          enddate=datetime(2024, 12, 18, tzinfo=timezone.utc), version=3)
+    encoder = ModelEncoder(EventResponse)
+    assert "version" not in encoder.fields
+    assert encoder.encode(event) == event.model_dump_json().encode()
+    assert b'"title":"Renamed"' in encoder.encode(event, title="Renamed")
+
+def test_list_encoder_fills_defaults():
+    item_encoder = ModelEncoder(EventResponse)
+    body = ModelEncoder(EventListResponse, items=List[item_encoder.row_type]).encode(items=[], size=0)
+    assert body == EventListResponse(items=[], size=0).model_dump_json().encode()
+
+def test_parse_fieldset_orders_and_validates_names():
+    allowed = ("id", "nickname", "role")
+    assert parse_fieldset(None, allowed) is None
+    assert parse_fieldset("role, id,role", allowed) == ("id", "role")
+    with pytest.raises(InvalidFieldset):
+        parse_fieldset("id,hashed_password", allowed)
+    with pytest.raises(InvalidFieldset):
+        parse_fieldset(",", allowed)
+
+def test_encoder_with_sparse_fieldset():
+    user = User(id=uuid4(), email="john.doe@example.com", nickname="john_doe", role=UserRole.MANAGER)
+    encoder = ModelEncoder(UserResponse, include=("id", "nickname", "role"))
+    assert encoder.fields == ("nickname", "role", "id")
+    assert encoder.encode(user) == UserResponse.model_validate(user).model_dump_json(include={"id", "nickname", "role"}).encode()
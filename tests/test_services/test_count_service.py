@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import text
+from app.models.user_model import User
+from app.services.count_service import CountMode, RowCountService
+from app.services.user_service import UserService
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture(autouse=True)
+def clear_count_cache():
+    RowCountService.clear()
+    yield
+    RowCountService.clear()
+
+# Test exact mode counts every row
+async def test_exact_count(db_session, users_with_same_role_50_users):
+    result = await RowCountService.count(db_session, User, CountMode.EXACT)
+    assert result.total == 50
+    assert result.estimated is False
+
+# Test none mode skips the count
+async def test_none_count(db_session, users_with_same_role_50_users):
+    result = await RowCountService.count(db_session, User, CountMode.NONE)
+    assert result.total is None
+
+# Test cached mode reuses the count until the table is written through the service
+async def test_cached_count_invalidated_on_delete(db_session, users_with_same_role_50_users):
+    assert (await RowCountService.count(db_session, User, CountMode.CACHED)).total == 50
+    await db_session.execute(text("DELETE FROM users WHERE id = :id"), {"id": users_with_same_role_50_users[0].id})
+    assert (await RowCountService.count(db_session, User, CountMode.CACHED)).total == 50
+    await UserService.delete(db_session, users_with_same_role_50_users[1].id)
+    assert (await RowCountService.count(db_session, User, CountMode.CACHED)).total == 48
+
+# Test estimated mode falls back to an exact count for small tables
+async def test_estimated_count_small_table_is_exact(db_session, users_with_same_role_50_users):
+    result = await RowCountService.count(db_session, User, CountMode.ESTIMATED)
+    assert result.total == 50
+    assert result.estimated is False
+
+# Test estimated mode reports planner statistics once the table is large enough
+async def test_estimated_count_uses_statistics(db_session, users_with_same_role_50_users, monkeypatch):
+    monkeypatch.setattr("app.services.count_service.settings.count_estimate_min_rows", 1)
+    await db_session.commit()
+    await db_session.execute(text("ANALYZE users"))
+    result = await RowCountService.count(db_session, User, CountMode.ESTIMATED)
+    assert result.estimated is True
+    assert result.total == 50
@@ -0,0 +1,70 @@
+from builtins import range
+import asyncio
+import pytest
+from app.dependencies import get_settings
+from app.models.user_model import UserRole
+from app.services.email_filter import EmailFilter
+from app.services.user_service import LoginStatus, UserService
+from app.utils.bloom_filter import BloomFilter
+from app.utils.pg_notify import notify
+from app.utils.query_metrics import QueryMetrics
+
+pytestmark = pytest.mark.asyncio
+settings = get_settings()
+
+async def wait_for_remote_keys(count):
+    for _ in range(50):
+        if EmailFilter.metrics()["remote_keys"] >= count:
+            return
+        await asyncio.sleep(0.02)
+
+# Test an unknown email is rejected without a query once the filter is built
+async def test_unknown_email_skips_database(db_session, verified_user):
+    await EmailFilter.rebuild(db_session)
+    counts = QueryMetrics.start_request()
+    result = await UserService.authenticate(db_session, "nobody@example.com", "WrongPassword$1234")
+    assert result.status is LoginStatus.INVALID_CREDENTIALS
+    assert counts["queries"] == 0
+    assert EmailFilter.metrics()["skipped"] == 1
+
+# Test registered emails still log in
+async def test_registered_email_passes_filter(db_session, verified_user):
+    await EmailFilter.rebuild(db_session)
+    result = await UserService.authenticate(db_session, verified_user.email, "MySuperPassword$1234")
+    assert result.status is LoginStatus.SUCCESS
+
+# Test the filter answers nothing until it is built
+async def test_unbuilt_filter_is_not_trusted():
+    assert EmailFilter.may_exist("nobody@example.com") is True
+    assert EmailFilter.metrics()["trusted"] is False
+
+# Test emails registered after the build are known straight away
+async def test_created_user_is_remembered(db_session, email_service):
+    await EmailFilter.rebuild(db_session)
+    user = await UserService.create(db_session, {"email": "new_user@example.com", "password": "ValidPassword123!", "role": UserRole.ANONYMOUS.name}, email_service)
+    assert user is not None
+    assert EmailFilter.may_exist("new_user@example.com") is True
+
+# Test an email change adds the new email and counts the old one as stale
+async def test_email_change(db_session, user):
+    await EmailFilter.rebuild(db_session)
+    await UserService.update(db_session, user.id, {"email": "changed@example.com"})
+    assert EmailFilter.may_exist("changed@example.com") is True
+    assert EmailFilter.metrics()["stale"] == 1
+
+# Test registrations on other workers reach the filter through NOTIFY
+async def test_registration_announced_to_other_workers(db_session, email_service, app_engine):
+    await EmailFilter.start(settings.database_url)
+    try:
+        await UserService.create(db_session, {"email": "announced@example.com", "password": "ValidPassword123!", "role": UserRole.ANONYMOUS.name}, email_service)
+        await db_session.commit()
+        await wait_for_remote_keys(1)
+        assert EmailFilter.metrics()["remote_keys"] == 1
+        # A key from another worker is added even though this worker never saw the email.
+        key = BloomFilter.key("elsewhere@example.com").hex()
+        await notify(db_session, settings.email_filter_channel, key)
+        await db_session.commit()
+        await wait_for_remote_keys(2)
+        assert EmailFilter.may_exist("elsewhere@example.com") is True
+    finally:
+        await EmailFilter.stop()
@@ -1,8 +1,11 @@
 from builtins import range
 import pytest
+from uuid import uuid4
 from sqlalchemy import select
 from app.dependencies import get_settings
 from app.services.event_service import EventService
+from app.utils.etag import PreconditionFailed
+from app.utils.query_metrics import QueryMetrics
 
 pytestmark = pytest.mark.asyncio
 
@@ -34,3 +37,58 @@ async def test_create_event_with_invalid_data(db_session, email_service):
     assert event is None
 
     
+# Test an update writes only the fields it was given
+async def test_update_event_keeps_unset_fields(db_session, email_service):
+    event = await EventService.create(db_session, {"title": "Partial", "createdby": "John Doe", "startdate": "2024-12-17", "enddate": "2024-12-18"}, email_service)
+    updated = await EventService.update(db_session, event.id, {"title": "Renamed"})
+    assert updated.title == "Renamed"
+    assert updated.createdby == "John Doe"
+    assert updated.enddate == event.enddate
+
+# Test each write is a single statement
+async def test_event_writes_are_single_statements(db_session, email_service):
+    counts = QueryMetrics.start_request()
+    event = await EventService.create(db_session, {"title": "Counted", "createdby": "John Doe", "startdate": "2024-12-17", "enddate": "2024-12-18"}, email_service)
+    assert counts["queries"] == 1
+    await EventService.update(db_session, event.id, {"createdby": "Jane Doe"})
+    assert counts["queries"] == 2
+    assert await EventService.delete(db_session, event.id) is True
+    assert counts["queries"] == 3
+    assert await EventService.update(db_session, event.id, {"title": "Gone"}) is None
+    assert await EventService.delete(db_session, event.id) is False
+
+# Test an update applies only while the event is still at the version the caller read
+async def test_update_event_checks_version(db_session, email_service):
+    event = await EventService.create(db_session, {"title": "Versioned", "createdby": "John Doe", "startdate": "2024-12-17", "enddate": "2024-12-18"}, email_service)
+    assert event.version == 0
+    counts = QueryMetrics.start_request()
+    updated = await EventService.update(db_session, event.id, {"title": "Renamed"}, [0])
+    assert updated.version == 1
+    assert counts["queries"] == 1
+    with pytest.raises(PreconditionFailed):
+        await EventService.update(db_session, event.id, {"title": "Stale"}, [0])
+    with pytest.raises(PreconditionFailed):
+        await EventService.update(db_session, event.id, {}, [0])
+    assert (await EventService.update(db_session, event.id, {}, [1])).title == "Renamed"
+
+# Test event rows carry the listed columns without loading Event instances
+async def test_event_rows(db_session, email_service):
+    for day in range(10, 13):
+        await EventService.create(db_session, {"title": f"Day {day}", "createdby": "John Doe", "startdate": f"2024-12-{day}", "enddate": f"2024-12-{day}"}, email_service)
+    events = await EventService.list_events(db_session, limit=3)
+    rows = await EventService.list_event_rows(db_session, limit=3)
+    assert [row.id for row in rows] == [event.id for event in events]
+    page = await EventService.list_event_rows_by_cursor(db_session, limit=2)
+    assert [row.title for row in page.items] == [event.title for event in events[:2]]
+    assert page.next_cursor is not None
+    row = await EventService.get_row(db_session, events[0].id)
+    assert (row.title, row.version) == (events[0].title, events[0].version)
+
+# Test a batch read returns the events found, keyed by id
+async def test_get_event_rows(db_session, email_service):
+    first = await EventService.create(db_session, {"title": "First", "createdby": "John Doe", "startdate": "2024-12-17", "enddate": "2024-12-18"}, email_service)
+    second = await EventService.create(db_session, {"title": "Second", "createdby": "John Doe", "startdate": "2024-12-17", "enddate": "2024-12-18"}, email_service)
+    counts = QueryMetrics.start_request()
+    rows = await EventService.get_rows(db_session, [second.id, first.id, uuid4()], fields=("title",))
+    assert counts["queries"] == 1
+    assert {event_id: row.title for event_id, row in rows.items()} == {first.id: "First", second.id: "Second"}
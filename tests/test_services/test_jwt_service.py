@@ -0,0 +1,55 @@
+from builtins import range
+import time
+from datetime import timedelta
+import jwt
+import pytest
+from app.services.jwt_service import VerifiedTokenCache, create_access_token, decode_token
+from settings.config import settings
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    VerifiedTokenCache.clear()
+    yield
+    VerifiedTokenCache.clear()
+
+# Test a repeat token is served from the cache
+def test_decode_token_caches_verified_payload():
+    token = create_access_token(data={"sub": "john@example.com", "role": "admin"})
+    first = decode_token(token)
+    second = decode_token(token)
+    assert first == second
+    assert second["role"] == "ADMIN"
+    metrics = VerifiedTokenCache.metrics()
+    assert metrics["misses"] == 1
+    assert metrics["hits"] == 1
+
+# Test callers cannot alter the cached payload
+def test_cached_payload_is_a_copy():
+    token = create_access_token(data={"sub": "john@example.com", "role": "admin"})
+    decode_token(token)["role"] = "ANONYMOUS"
+    assert decode_token(token)["role"] == "ADMIN"
+
+# Test tokens that fail validation are rejected and never cached
+def test_invalid_token_not_cached():
+    token = jwt.encode({"sub": "john@example.com", "exp": time.time() + 60}, "wrong_secret", algorithm=settings.jwt_algorithm)
+    assert decode_token(token) is None
+    assert decode_token(token) is None
+    assert VerifiedTokenCache.metrics()["size"] == 0
+
+# Test a cached token is dropped once it expires
+def test_cached_token_expires(monkeypatch):
+    token = create_access_token(data={"sub": "john@example.com", "role": "admin"}, expires_delta=timedelta(minutes=5))
+    decode_token(token)
+    monkeypatch.setattr(time, "time", lambda: jwt.decode(token, options={"verify_signature": False})["exp"] + 1)
+    assert VerifiedTokenCache.get(token) is None
+    assert VerifiedTokenCache.metrics()["expirations"] == 1
+
+# Test the cache is bounded
+def test_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(settings, "token_cache_max_entries", 2)
+    tokens = [create_access_token(data={"sub": f"user{i}@example.com", "role": "admin"}) for i in range(3)]
+    for token in tokens:
+        decode_token(token)
+    assert VerifiedTokenCache.metrics()["size"] == 2
+    assert VerifiedTokenCache.metrics()["evictions"] == 1
+    assert VerifiedTokenCache.get(tokens[0]) is None
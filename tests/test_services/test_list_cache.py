@@ -0,0 +1,63 @@
+from builtins import str
+import pytest
+from starlette.requests import Request
+from app.models.event_model import Event
+from app.models.user_model import User
+from app.services.list_cache import ListCache
+from app.services.user_service import UserService
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_request() -> Request:
+    return Request({"type": "http", "scheme": "http", "server": ("testserver", 80), "path": "/users/",
+                    "root_path": "", "query_string": b"", "headers": []})
+
+
+def user_key(**params) -> str:
+    return ListCache.key(User, "ADMIN", make_request(), **{"skip": 0, "limit": 10, "cursor": None, **params})
+
+# Test keys normalize the query and separate roles and tables
+async def test_key_normalization():
+    assert user_key(limit=10, skip=0) == user_key(skip=0, limit=10)
+    assert user_key() != user_key(limit=50)
+    assert user_key() != ListCache.key(User, "MANAGER", make_request(), skip=0, limit=10)
+    assert user_key() != ListCache.key(Event, "ADMIN", make_request(), skip=0, limit=10)
+    assert user_key(q="a&role=ADMIN") != user_key(q="a", role="ADMIN")
+
+# Test a stored body is served until a write bumps the table's generation
+async def test_write_invalidates(db_session, user):
+    key = user_key()
+    await ListCache.store(db_session, key, b"[]")
+    assert await ListCache.get(db_session, key) == b"[]"
+    await UserService.update(db_session, user.id, {"bio": "Listed"})
+    # Until the transaction commits, the writing session bypasses the cache.
+    assert await ListCache.get(db_session, user_key()) is None
+    await db_session.commit()
+    assert user_key() != key
+    assert await ListCache.get(db_session, user_key()) is None
+    assert ListCache.metrics()["generations"]["users"] == 2
+
+# Test a page read while a write commits is stored under the old generation and never served
+async def test_store_after_write_is_unreachable(db_session, user):
+    key = user_key()
+    await UserService.update(db_session, user.id, {"bio": "Racing"})
+    await db_session.commit()
+    await ListCache.store(db_session, key, b"stale")
+    assert await ListCache.get(db_session, user_key()) is None
+
+# Test the cache stays within its byte budget and expires entries
+async def test_byte_budget_and_ttl(db_session, monkeypatch):
+    monkeypatch.setattr("app.services.list_cache.settings.list_cache_max_bytes", 10)
+    await ListCache.store(db_session, "a", b"12345")
+    await ListCache.store(db_session, "b", b"12345")
+    await ListCache.get(db_session, "a")
+    await ListCache.store(db_session, "c", b"12345")
+    assert await ListCache.get(db_session, "b") is None
+    assert await ListCache.get(db_session, "a") == b"12345"
+    await ListCache.store(db_session, "big", b"x" * 11)
+    assert ListCache.metrics()["bytes"] == 10
+    monkeypatch.setattr("app.services.list_cache.settings.list_cache_ttl_seconds", 0)
+    await ListCache.store(db_session, "d", b"1")
+    assert await ListCache.get(db_session, "d") is None
+    assert ListCache.metrics()["evictions"] == 2
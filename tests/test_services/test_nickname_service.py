@@ -0,0 +1,45 @@
+from builtins import len, range, set
+import pytest
+from app.services.nickname_service import NicknameService
+from app.services.user_service import UserService
+from app.utils.query_metrics import QueryMetrics
+
+pytestmark = pytest.mark.asyncio
+
+# Test allocation reserves one block per sequence round trip and never repeats a nickname
+async def test_allocate_reserves_blocks(db_session, monkeypatch):
+    monkeypatch.setattr("app.services.nickname_service.settings.nickname_block_size", 10)
+    counts = QueryMetrics.start_request()
+    nicknames = [await NicknameService.allocate(db_session) for _ in range(25)]
+    assert len(set(nicknames)) == 25
+    assert counts["queries"] == 3
+    assert NicknameService.metrics()["blocks"] == 3
+
+# Test workers drawing from the same sequence get disjoint nicknames
+async def test_allocate_across_workers(db_session):
+    first = [await NicknameService.allocate(db_session) for _ in range(5)]
+    NicknameService.reset()  # as if a second worker started
+    second = [await NicknameService.allocate(db_session) for _ in range(5)]
+    assert not set(first) & set(second)
+
+# Test availability falls back to the database until the filter is loaded
+async def test_availability_before_load(db_session, user):
+    counts = QueryMetrics.start_request()
+    assert await NicknameService.is_available(db_session, user.nickname) is False
+    assert await NicknameService.is_available(db_session, "unused_nickname") is True
+    assert counts["queries"] == 2
+
+# Test a loaded filter answers free nicknames without a query
+async def test_availability_from_filter(db_session, user):
+    await NicknameService.refresh(db_session)
+    counts = QueryMetrics.start_request()
+    assert await NicknameService.is_available(db_session, "unused_nickname") is True
+    assert counts["queries"] == 0
+    assert await NicknameService.is_available(db_session, user.nickname) is False
+    assert counts["queries"] == 1
+
+# Test nicknames written after the load are remembered
+async def test_update_remembers_nickname(db_session, user):
+    await NicknameService.refresh(db_session)
+    await UserService.update(db_session, user.id, {"nickname": "renamed_user"})
+    assert await NicknameService.is_available(db_session, "renamed_user") is False
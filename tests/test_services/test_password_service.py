@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from app.services import password_service
+from app.services.password_service import PasswordHashingBusy, PasswordService
+
+pytestmark = pytest.mark.asyncio
+
+# Test hashing and verifying through the process pool
+async def test_hash_and_verify_in_process_pool():
+    hashed = await PasswordService.hash("Secure*1234")
+    assert hashed.startswith("$2b$")
+    assert await PasswordService.verify("Secure*1234", hashed) is True
+    assert await PasswordService.verify("Wrong*1234", hashed) is False
+
+# Test the thread pool fallback when no worker processes are configured
+async def test_hash_without_worker_processes(monkeypatch):
+    monkeypatch.setattr(password_service.settings, "password_hash_workers", 0)
+    monkeypatch.setattr(PasswordService, "_executor", None)
+    hashed = await PasswordService.hash("Secure*1234")
+    assert await PasswordService.verify("Secure*1234", hashed) is True
+
+# Test admission control rejects new jobs once the pool is saturated
+async def test_hash_rejected_when_saturated(monkeypatch):
+    monkeypatch.setattr(password_service.settings, "password_hash_max_pending", 0)
+    rejected_before = PasswordService.metrics()["rejected"]
+    with pytest.raises(PasswordHashingBusy):
+        await PasswordService.hash("Secure*1234")
+    assert PasswordService.metrics()["rejected"] == rejected_before + 1
+
+# Test hashing does not block other coroutines on the event loop
+async def test_hash_does_not_block_event_loop():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    await PasswordService.hash("Secure*1234")
+    task.cancel()
+    assert ticks > 1
+
+# Test latency and queue metrics are reported
+async def test_metrics_record_latency():
+    count_before = PasswordService.metrics()["hash_latency"]["count"]
+    await PasswordService.hash("Secure*1234")
+    metrics = PasswordService.metrics()
+    assert metrics["hash_latency"]["count"] == count_before + 1
+    assert metrics["in_flight"] == 0
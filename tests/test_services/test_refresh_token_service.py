@@ -0,0 +1,52 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update
+from app.models.refresh_token_model import RefreshToken
+from app.services.password_service import PasswordService
+from app.services.refresh_token_service import RefreshStatus, RefreshTokenService
+
+pytestmark = pytest.mark.asyncio
+
+# Test a refresh token rotates into a new token of the same family
+async def test_rotate_issues_successor(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    result = await RefreshTokenService.rotate(db_session, token)
+    assert result.status is RefreshStatus.SUCCESS
+    assert result.user.email == verified_user.email
+    assert result.refresh_token != token
+    families = (await db_session.execute(select(RefreshToken.family_id))).scalars().all()
+    assert len(families) == 2 and len(set(families)) == 1
+
+# Test only a digest of the token is stored
+async def test_token_is_stored_hashed(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    stored = (await db_session.execute(select(RefreshToken.token_hash))).scalar_one()
+    assert stored != token and len(stored) == 64
+
+# Test refreshing never runs bcrypt
+async def test_rotate_skips_password_verification(db_session, verified_user):
+    verified_before = PasswordService.metrics()["verify_latency"]["count"]
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    await RefreshTokenService.rotate(db_session, token)
+    assert PasswordService.metrics()["verify_latency"]["count"] == verified_before
+
+# Test reusing a rotated token revokes the whole family
+async def test_reuse_revokes_family(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    successor = (await RefreshTokenService.rotate(db_session, token)).refresh_token
+    assert (await RefreshTokenService.rotate(db_session, token)).status is RefreshStatus.REUSED
+    assert (await RefreshTokenService.rotate(db_session, successor)).status is RefreshStatus.INVALID
+
+# Test expired and unknown tokens are rejected
+async def test_expired_and_unknown_tokens(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    await db_session.execute(update(RefreshToken).values(expires_at=datetime.now(timezone.utc) - timedelta(minutes=1)))
+    assert (await RefreshTokenService.rotate(db_session, token)).status is RefreshStatus.INVALID
+    assert (await RefreshTokenService.rotate(db_session, "not-a-token")).status is RefreshStatus.INVALID
+
+# Test locked users cannot refresh
+async def test_locked_user_cannot_refresh(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    verified_user.is_locked = True
+    await db_session.commit()
+    assert (await RefreshTokenService.rotate(db_session, token)).status is RefreshStatus.INVALID
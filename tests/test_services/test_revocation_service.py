@@ -0,0 +1,89 @@
+from builtins import range, str
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import func, insert, select
+from app.dependencies import get_settings
+from app.models.token_revocation_model import TokenRevocation
+from app.services.jwt_service import create_access_token, decode_token
+from app.services.revocation_service import RevocationService
+from app.services.user_service import UserService
+
+pytestmark = pytest.mark.asyncio
+settings = get_settings()
+
+def token_payload(user, version=0):
+    token = create_access_token(data={"sub": user.email, "role": "AUTHENTICATED", "uid": str(user.id), "ver": version})
+    return decode_token(token)
+
+# Test revoking a user rejects tokens of older versions only
+async def test_revoke_user_rejects_older_versions(db_session, verified_user):
+    old_payload = token_payload(verified_user)
+    assert await RevocationService.revoke_user(db_session, verified_user.id) == 1
+    await db_session.commit()
+    assert not RevocationService.is_revoked(old_payload)
+    await RevocationService.refresh(db_session)
+    assert RevocationService.is_revoked(old_payload)
+    assert not RevocationService.is_revoked(token_payload(verified_user, version=1))
+
+# Test a single token can be revoked by its jti
+async def test_revoke_token(db_session, verified_user):
+    payload = token_payload(verified_user)
+    other = token_payload(verified_user)
+    await RevocationService.revoke_token(db_session, payload["jti"], payload["exp"])
+    await db_session.commit()
+    await RevocationService.refresh(db_session)
+    assert RevocationService.is_revoked(payload)
+    assert not RevocationService.is_revoked(other)
+
+# Test uncommitted revocations are not picked up
+async def test_rolled_back_revocation_ignored(db_session, verified_user):
+    payload = token_payload(verified_user)
+    await RevocationService.revoke_token(db_session, payload["jti"], payload["exp"])
+    await db_session.rollback()
+    await RevocationService.refresh(db_session)
+    assert not RevocationService.is_revoked(payload)
+
+# Test both kinds of revocation clear rows that have expired
+async def test_revocations_clear_expired_rows(db_session, verified_user):
+    expired = datetime.now(timezone.utc) - timedelta(minutes=1)
+    for revoke in (lambda: RevocationService.revoke_token(db_session, "new", time.time() + 60),
+                   lambda: RevocationService.revoke_user(db_session, verified_user.id)):
+        await db_session.execute(insert(TokenRevocation).values(jti="stale", expires_at=expired))
+        await revoke()
+        assert await db_session.scalar(select(func.count()).where(TokenRevocation.jti == "stale")) == 0
+
+# Test expired revocations are pruned on refresh
+async def test_refresh_prunes_expired_entries(db_session):
+    RevocationService._apply_jti("expired", time.time() - 1)
+    RevocationService._apply_version("00000000-0000-0000-0000-000000000000", 3, time.time() - 1)
+    await RevocationService.refresh(db_session)
+    assert RevocationService.metrics()["revoked_tokens"] == 0
+    assert RevocationService.metrics()["revoked_users"] == 0
+
+# Test role and email changes bump the token version, other fields do not
+async def test_update_revokes_on_claim_changes(db_session, verified_user):
+    await UserService.update(db_session, verified_user.id, {"bio": "No claims changed"})
+    await UserService.update(db_session, verified_user.id, {"role": "MANAGER"})
+    await db_session.commit()
+    await RevocationService.refresh(db_session)
+    assert RevocationService.is_revoked(token_payload(verified_user))
+    assert not RevocationService.is_revoked(token_payload(verified_user, version=1))
+
+# Test revocations reach other workers through NOTIFY without waiting for a refresh
+async def test_revocation_notification(db_session, verified_user, monkeypatch, app_engine):
+    monkeypatch.setattr(settings, "revocation_refresh_seconds", 3600)
+    await RevocationService.start(settings.database_url)
+    try:
+        payload = token_payload(verified_user)
+        await RevocationService.revoke_user(db_session, verified_user.id)
+        await db_session.commit()
+        for _ in range(50):
+            if RevocationService.is_revoked(payload):
+                break
+            await asyncio.sleep(0.02)
+        assert RevocationService.is_revoked(payload)
+        assert RevocationService.metrics()["listening"] is True
+    finally:
+        await RevocationService.stop()
@@ -0,0 +1,124 @@
+from builtins import range, str
+import asyncio
+import pytest
+from sqlalchemy import select
+from app.dependencies import get_settings
+from app.models.user_model import User
+from app.services.user_cache import PENDING_INVALIDATIONS, MemoryUserCacheBackend, UserCache, UserCacheBackend
+from app.services.user_service import UserService
+from app.utils.query_metrics import QueryMetrics
+
+pytestmark = pytest.mark.asyncio
+settings = get_settings()
+
+# Test a repeated lookup is served from the cache without a query
+async def test_get_by_id_hits_cache(db_session, user):
+    await UserService.get_by_id(db_session, user.id)
+    counts = QueryMetrics.start_request()
+    cached = await UserService.get_by_id(db_session, user.id)
+    assert cached.email == user.email
+    assert counts["queries"] == 0
+    assert UserCache.metrics()["hits"] == 1
+
+# Test email and nickname lookups share the entry cached by id
+async def test_lookup_aliases(db_session, user):
+    await UserService.get_by_id(db_session, user.id)
+    counts = QueryMetrics.start_request()
+    assert (await UserService.get_by_email(db_session, user.email)).id == user.id
+    assert (await UserService.get_by_nickname(db_session, user.nickname)).id == user.id
+    assert counts["queries"] == 0
+
+# Test an update invalidates the cached user and is visible after commit
+async def test_update_invalidates(db_session, user):
+    await UserService.get_by_id(db_session, user.id)
+    await UserService.update(db_session, user.id, {"first_name": "Cached"})
+    # Until the transaction commits, the writing session bypasses the cache.
+    assert (await UserService.get_by_id(db_session, user.id)).first_name == "Cached"
+    assert await UserCache.backend().get(f"id:{user.id}") is None
+    await db_session.commit()
+    await UserService.get_by_id(db_session, user.id)
+    assert (await UserCache.backend().get(f"id:{user.id}"))["first_name"] == "Cached"
+
+# Test a changed nickname no longer resolves through the stale alias
+async def test_stale_alias_misses(db_session, user):
+    old_nickname = user.nickname
+    await UserService.get_by_id(db_session, user.id)
+    await UserService.update(db_session, user.id, {"nickname": "renamed_user"})
+    await db_session.commit()
+    await UserService.get_by_nickname(db_session, "renamed_user")
+    assert await UserService.get_by_nickname(db_session, old_nickname) is None
+
+# Test the memory backend evicts least recently used entries and expires old ones
+async def test_memory_backend_lru_and_ttl():
+    backend = MemoryUserCacheBackend(max_entries=2)
+    await backend.set("a", 1, 60)
+    await backend.set("b", 2, 60)
+    await backend.get("a")
+    await backend.set("c", 3, 60)
+    assert await backend.get("b") is None
+    assert await backend.get("a") == 1
+    assert backend.stats()["evictions"] == 1
+    await backend.set("d", 4, 0)
+    assert await backend.get("d") is None
+
+class DictBackend(UserCacheBackend):
+    """A backend outside this module, standing in for a store shared between workers."""
+
+    def __init__(self):
+        self.entries = {}
+
+    async def get(self, key):
+        return self.entries.get(key)
+
+    async def set(self, key, value, ttl):
+        self.entries[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.entries.pop(key, None)
+
+    async def clear(self):
+        self.entries.clear()
+
+# Test a configured backend stores and serves the cached users
+async def test_configured_backend(db_session, user):
+    backend = DictBackend()
+    UserCache.configure(backend)
+    await UserService.get_by_id(db_session, user.id)
+    assert f"id:{user.id}" in backend.entries
+    counts = QueryMetrics.start_request()
+    assert (await UserService.get_by_email(db_session, user.email)).id == user.id
+    assert counts["queries"] == 0
+
+# Test the cache can be disabled
+async def test_disabled_cache(db_session, user, monkeypatch):
+    monkeypatch.setattr("app.services.user_cache.settings.user_cache_backend", "none")
+    UserCache.reset()
+    await UserService.get_by_id(db_session, user.id)
+    assert await UserService.get_by_id(db_session, user.id) is not None
+    assert UserCache.metrics()["enabled"] is False
+
+# Test commits broadcast invalidations that other workers' listeners apply
+async def test_invalidation_broadcast(db_session, user):
+    await UserCache.start_listener(settings.database_url)
+    try:
+        await UserService.get_by_id(db_session, user.id)
+        # Record the write without the local delete, as if another worker had made it.
+        db_session.info[PENDING_INVALIDATIONS] = {str(user.id)}
+        await db_session.commit()
+        for _ in range(50):
+            if UserCache.metrics()["remote_invalidations"]:
+                break
+            await asyncio.sleep(0.02)
+        assert UserCache.metrics()["remote_invalidations"] == 1
+        assert await UserCache.backend().get(f"id:{user.id}") is None
+    finally:
+        await UserCache.stop_listener()
+
+# Test login invalidates the cached user so last_login_at is fresh
+async def test_login_invalidates(db_session, verified_user):
+    await UserService.get_by_id(db_session, verified_user.id)
+    assert await UserService.login_user(db_session, verified_user.email, "MySuperPassword$1234") is not None
+    await db_session.commit()
+    refreshed = (await db_session.execute(select(User).where(User.id == verified_user.id))).scalar_one()
+    assert (await UserService.get_by_id(db_session, verified_user.id)).last_login_at == refreshed.last_login_at
@@ -0,0 +1,147 @@
+from builtins import any, dict, isinstance, len, list, range, sorted, str
+import json
+import uuid
+import pytest
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.dialects import postgresql
+from app.models.user_model import User, UserRole
+from app.services.count_service import CountMode, RowCountService
+from app.services.user_service import SearchMatch, UserService
+from app.utils.pagination import decode_rank_cursor
+
+pytestmark = pytest.mark.asyncio
+
+USERS = 10_000
+SEARCH_COLUMNS = ("email", "nickname", "first_name", "last_name")
+
+
+@pytest.fixture
+async def searchable_users(db_session):
+    """Enough users, with rare states, for the planner to prefer the search and filter indexes."""
+    await db_session.execute(insert(User), [
+        {"id": uuid.uuid4(), "email": f"member{i}@example.com", "nickname": f"nick_{i}", "first_name": f"First{i % 500}",
+         "last_name": "100%_Real" if i == 7 else f"Last{i}", "hashed_password": "hashed",
+         "bio": f"Python and FastAPI developer, {i} years of Postgres" if i % 400 == 0 else f"Java developer number {i}",
+         "role": UserRole.ADMIN if i % 1000 == 0 else UserRole.AUTHENTICATED, "is_locked": i % 200 == 0,
+         "email_verified": i % 250 != 0, "is_professional": i % 300 == 0}
+        for i in range(USERS)
+    ])
+    await db_session.commit()
+    # Rows inserted after CREATE INDEX wait in the GIN pending list until a vacuum, and the
+    # planner avoids GIN indexes with a long one.
+    await db_session.execute(text("SELECT gin_clean_pending_list('ix_users_bio_tsv')"))
+    await db_session.execute(text("ANALYZE users"))
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+async def explain(session, query):
+    sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    plan = (await session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return list(plan_nodes(plan[0]["Plan"]))
+
+
+def list_query(criteria):
+    return select(User.id).where(*criteria).order_by(User.created_at, User.id).limit(11)
+
+
+# Test search matches prefixes by default and substrings on request, ignoring case
+async def test_search_prefix_and_substring(db_session, searchable_users):
+    rows = await UserService.list_user_rows(db_session, limit=50, criteria=UserService.filter_criteria("MEMBER123"))
+    assert {row.email for row in rows} == {f"member{i}@example.com" for i in [123] + list(range(1230, 1240))}
+    rows = await UserService.list_user_rows(db_session, limit=50, criteria=UserService.filter_criteria("ber99@", SearchMatch.SUBSTRING))
+    assert [row.email for row in rows] == ["member99@example.com"]
+    assert await UserService.list_user_rows(db_session, criteria=UserService.filter_criteria("ber99@")) == []
+
+# Test LIKE wildcards in a search term only match themselves
+async def test_search_escapes_wildcards(db_session, searchable_users):
+    rows = await UserService.list_user_rows(db_session, criteria=UserService.filter_criteria("100%_"))
+    assert [row.email for row in rows] == ["member7@example.com"]
+    assert await UserService.list_user_rows(db_session, criteria=UserService.filter_criteria("1%0")) == []
+    assert await UserService.list_user_rows(db_session, criteria=UserService.filter_criteria("nick__")) == []
+
+# Test filters combine with each other, with search and with the total
+async def test_filters(db_session, searchable_users):
+    criteria = UserService.filter_criteria(role=UserRole.ADMIN, is_locked=True)
+    rows = await UserService.list_user_rows(db_session, limit=50, criteria=criteria)
+    assert {row.email for row in rows} == {f"member{i}@example.com" for i in range(0, USERS, 1000)}
+    assert (await RowCountService.count(db_session, User, CountMode.ESTIMATED, criteria)).total == 10
+    criteria = UserService.filter_criteria("member1", email_verified=False, is_professional=False)
+    rows = await UserService.list_user_rows(db_session, limit=50, criteria=criteria)
+    assert {row.email for row in rows} == {f"member{i}@example.com" for i in (1000, 1250, 1750)}
+    page = await UserService.list_user_rows_by_cursor(db_session, limit=3, criteria=UserService.filter_criteria(is_locked=True))
+    locked = {f"member{i}@example.com" for i in range(0, USERS, 200)}
+    assert len(page.items) == 3 and {row.email for row in page.items} <= locked
+    assert page.next_cursor is not None
+
+# Test prefix search is answered by the lower(column) pattern indexes
+async def test_prefix_search_uses_pattern_indexes(db_session, searchable_users):
+    nodes = await explain(db_session, list_query(UserService.filter_criteria("member123")))
+    assert not any(node["Node Type"] == "Seq Scan" for node in nodes)
+    assert {f"ix_users_{column}_lower_pattern" for column in SEARCH_COLUMNS} <= {node.get("Index Name") for node in nodes}
+
+# Test rare states and roles are answered by their partial and role indexes
+@pytest.mark.parametrize("filters, index_name", [
+    (dict(is_locked=True), "ix_users_locked_created_at_id"),
+    (dict(email_verified=False), "ix_users_unverified_created_at_id"),
+    (dict(is_professional=True), "ix_users_professional_created_at_id"),
+    (dict(role=UserRole.ADMIN), "ix_users_role_created_at_id"),
+])
+async def test_filters_use_indexes(db_session, searchable_users, filters, index_name):
+    criteria = UserService.filter_criteria(**filters)
+    for query in (list_query(criteria), select(User.id).where(*criteria)):
+        nodes = await explain(db_session, query)
+        assert not any(node["Node Type"] == "Seq Scan" for node in nodes)
+        assert index_name in {node.get("Index Name") for node in nodes}
+
+# Test substring search is answered by trigram indexes where pg_trgm is available
+async def test_substring_search_uses_trigram_indexes(db_session, searchable_users):
+    available = (await db_session.execute(text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"))).scalar()
+    if not available:
+        pytest.skip("pg_trgm is not installed on this server")
+    await db_session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for column in SEARCH_COLUMNS:
+        await db_session.execute(text(f"CREATE INDEX ix_users_{column}_lower_trgm ON users USING gin (lower({column}) gin_trgm_ops)"))
+    await db_session.execute(text("ANALYZE users"))
+    nodes = await explain(db_session, list_query(UserService.filter_criteria("ber123", SearchMatch.SUBSTRING)))
+    assert not any(node["Node Type"] == "Seq Scan" for node in nodes)
+    assert {f"ix_users_{column}_lower_trgm" for column in SEARCH_COLUMNS} <= {node.get("Index Name") for node in nodes}
+
+
+# Test bio search ranks in the database and pages through every match once
+async def test_bio_search_pages_by_rank(db_session, searchable_users):
+    seen, cursor = [], None
+    while True:
+        results, next_cursor, _ = await UserService.search_bios(db_session, "python fastapi", limit=7, cursor=cursor)
+        seen.extend(results)
+        if next_cursor is None:
+            break
+        cursor = decode_rank_cursor(next_cursor)
+    assert len(seen) == USERS // 400
+    assert len({result["id"] for result in seen}) == len(seen)
+    assert [result["rank"] for result in seen] == sorted((result["rank"] for result in seen), reverse=True)
+    assert "<mark>Python</mark>" in seen[0]["snippet"]
+    assert (await UserService.search_bios(db_session, "python -postgres")).items == []
+
+# Test the search vector follows bio updates and snippets escape user markup
+async def test_bio_search_follows_updates(db_session, user):
+    assert (await UserService.search_bios(db_session, "kubernetes")).items == []
+    await UserService.update(db_session, user.id, {"bio": "Kubernetes operator <script>alert(1)</script> & more"})
+    await db_session.commit()
+    results = (await UserService.search_bios(db_session, "kubernetes")).items
+    assert [result["id"] for result in results] == [user.id]
+    assert results[0]["snippet"].startswith("<mark>Kubernetes</mark> operator")
+    assert "<script>" not in results[0]["snippet"]
+
+# Test bio search is answered by the GIN index on the search vector
+async def test_bio_search_uses_gin_index(db_session, searchable_users):
+    bio_tsv = User.__table__.c.bio_tsv
+    query = select(User.id).where(bio_tsv.op("@@")(func.websearch_to_tsquery(text("'english'::regconfig"), "python fastapi")))
+    nodes = await explain(db_session, query)
+    assert not any(node["Node Type"] == "Seq Scan" for node in nodes)
+    assert "ix_users_bio_tsv" in {node.get("Index Name") for node in nodes}
@@ -1,10 +1,15 @@
-from builtins import range
+from builtins import len, range, sorted
 import pytest
+from uuid import uuid4
 from sqlalchemy import select
 from app.dependencies import get_settings
 from app.models.user_model import User, UserRole
-from app.services.user_service import UserService
+from app.services.nickname_service import NicknameService
+from app.services.user_service import NICKNAME_ATTEMPTS, CreateStatus, LoginStatus, UserService
+from app.utils.etag import PreconditionFailed
 from app.utils.nickname_gen import generate_nickname
+from app.utils.pagination import decode_cursor
+from app.utils.query_metrics import QueryMetrics
 
 pytestmark = pytest.mark.asyncio
 
@@ -30,6 +35,47 @@ async def test_create_user_with_invalid_data(db_session, email_service):
     user = await UserService.create(db_session, user_data, email_service)
     assert user is None
 
+# Test the first user becomes a verified admin and later users do not
+async def test_create_first_user_is_admin(db_session, email_service):
+    first = await UserService.create(db_session, {"email": "first@example.com", "password": "ValidPassword123!", "role": UserRole.ANONYMOUS.name}, email_service)
+    second = await UserService.create(db_session, {"email": "second@example.com", "password": "ValidPassword123!", "role": UserRole.ADMIN.name}, email_service)
+    assert first.role == UserRole.ADMIN and first.email_verified
+    assert second.role == UserRole.ANONYMOUS and not second.email_verified
+    assert second.verification_token is not None
+    email_service.send_verification_email.assert_awaited_once()
+
+# Test a duplicate email is rejected by the insert itself, in one statement
+async def test_create_user_duplicate_email(db_session, email_service, user):
+    await NicknameService.allocate(db_session)  # reserve a nickname block up front
+    counts = QueryMetrics.start_request()
+    created = await UserService.create(db_session, {"email": user.email, "password": "ValidPassword123!", "role": UserRole.ANONYMOUS.name}, email_service)
+    assert created is None
+    assert counts["queries"] == 1
+
+# Test a nickname a user already picked is retried with another one
+async def test_create_user_retries_taken_nickname(db_session, email_service, user, monkeypatch):
+    nicknames = iter([user.nickname, "fresh_nickname_1"])
+    async def allocate(session):
+        return next(nicknames)
+    monkeypatch.setattr(NicknameService, "allocate", allocate)
+    created = await UserService.create(db_session, {"email": "unique@example.com", "password": "ValidPassword123!", "role": UserRole.ANONYMOUS.name}, email_service)
+    assert created.nickname == "fresh_nickname_1"
+    assert (await UserService.get_by_id(db_session, created.id)).email == "unique@example.com"
+
+# Test add_user tells a taken email, running out of nicknames and invalid data apart
+async def test_add_user_reports_why(db_session, email_service, user, monkeypatch):
+    user_data = {"email": user.email, "password": "ValidPassword123!", "role": UserRole.ANONYMOUS.name}
+    assert await UserService.add_user(db_session, user_data, email_service) == (CreateStatus.EMAIL_TAKEN, None)
+    assert (await UserService.add_user(db_session, {**user_data, "email": "invalidemail"}, email_service)).status is CreateStatus.INVALID
+    allocated = []
+    async def allocate(session):
+        allocated.append(user.nickname)
+        return user.nickname
+    monkeypatch.setattr(NicknameService, "allocate", allocate)
+    result = await UserService.add_user(db_session, {**user_data, "email": "unique@example.com"}, email_service)
+    assert result == (CreateStatus.NO_FREE_NICKNAME, None)
+    assert len(allocated) == NICKNAME_ATTEMPTS
+
 # Test creating a user with invalid password short password
 async def test_create_user_with_invalid_password_short(db_session, email_service):
     user_data = {
@@ -114,6 +160,61 @@ async def test_update_user_invalid_data(db_session, user):
     updated_user = await UserService.update(db_session, user.id, {"email": "invalidemail"})
     assert updated_user is None
 
+# Test the version of a cached user is read without a query, and of any other with a narrow one
+async def test_get_version(db_session, user):
+    counts = QueryMetrics.start_request()
+    assert await UserService.get_version(db_session, user.id) == user.version
+    assert counts["queries"] == 1
+    await UserService.get_by_id(db_session, user.id)
+    counts = QueryMetrics.start_request()
+    assert await UserService.get_version(db_session, user.id) == user.version
+    assert counts["queries"] == 0
+    assert await UserService.get_version(db_session, uuid4()) is None
+
+# Test an update applies only while the user is still at the version the caller read
+async def test_update_user_checks_version(db_session, user):
+    version = user.version
+    updated_user = await UserService.update(db_session, user.id, {"bio": "First"}, [version])
+    assert updated_user.version == version + 1
+    with pytest.raises(PreconditionFailed):
+        await UserService.update(db_session, user.id, {"bio": "Stale"}, [version])
+    assert (await UserService.get_by_id(db_session, user.id)).bio == "First"
+
+# Test a version check on a missing user still reports it as missing
+async def test_update_missing_user_with_version(db_session):
+    assert await UserService.update(db_session, uuid4(), {"bio": "Nobody"}, [0]) is None
+
+# Test each user write is a single statement, including the token revocation it implies
+@pytest.mark.parametrize("write", [
+    lambda session, user: UserService.update(session, user.id, {"bio": "One statement"}),
+    lambda session, user: UserService.update(session, user.id, {"role": "MANAGER"}),
+    lambda session, user: UserService.update(session, user.id, {"email": "moved@example.com"}),
+    lambda session, user: UserService.delete(session, user.id),
+    lambda session, user: UserService.verify_email_with_token(session, user.id, user.verification_token),
+])
+async def test_user_writes_are_single_statements(db_session, user, write):
+    user.verification_token = "token"
+    await db_session.commit()
+    counts = QueryMetrics.start_request()
+    assert await write(db_session, user)
+    assert counts["queries"] == 1
+
+# Test unlocking an account is a single statement, and resetting a password adds only the refresh token revocation
+async def test_reset_and_unlock_are_single_statements(db_session, locked_user):
+    counts = QueryMetrics.start_request()
+    assert await UserService.unlock_user_account(db_session, locked_user.id) is True
+    assert counts["queries"] == 1
+    assert await UserService.reset_password(db_session, locked_user.id, "NewPassword123!") is True
+    assert counts["queries"] == 3
+
+# Test writes to a missing user report it without raising
+async def test_writes_to_missing_user(db_session):
+    missing = uuid4()
+    assert await UserService.update(db_session, missing, {"bio": "Nobody"}) is None
+    assert await UserService.reset_password(db_session, missing, "NewPassword123!") is False
+    assert await UserService.verify_email_with_token(db_session, missing, "token") is False
+    assert await UserService.unlock_user_account(db_session, missing) is False
+
 # Test deleting a user who exists
 async def test_delete_user_exists(db_session, user):
     deletion_success = await UserService.delete(db_session, user.id)
@@ -202,3 +303,96 @@ async def test_unlock_user_account(db_session, locked_user):
     assert unlocked, "The account should be unlocked"
     refreshed_user = await UserService.get_by_id(db_session, locked_user.id)
     assert not refreshed_user.is_locked, "The user should no longer be locked"
+
+# Test authenticating a locked account reports the lock without touching the counter
+async def test_authenticate_locked_account(db_session, locked_user):
+    result = await UserService.authenticate(db_session, locked_user.email, "MySuperPassword$1234")
+    assert result.status is LoginStatus.LOCKED
+    assert result.user is None
+
+# Test failed attempts are counted atomically and lock the account at the limit
+async def test_authenticate_failed_attempts_lock_account(db_session, verified_user):
+    max_login_attempts = get_settings().max_login_attempts
+    for _ in range(max_login_attempts):
+        result = await UserService.authenticate(db_session, verified_user.email, "wrongpassword")
+        assert result.status is LoginStatus.INVALID_CREDENTIALS
+    attempts = await db_session.scalar(select(User.failed_login_attempts).where(User.id == verified_user.id))
+    assert attempts == max_login_attempts
+    result = await UserService.authenticate(db_session, verified_user.email, "MySuperPassword$1234")
+    assert result.status is LoginStatus.LOCKED
+
+# Test a successful login resets the failed attempt counter
+async def test_authenticate_success_resets_attempts(db_session, verified_user):
+    await UserService.authenticate(db_session, verified_user.email, "wrongpassword")
+    result = await UserService.authenticate(db_session, verified_user.email, "MySuperPassword$1234")
+    assert result.status is LoginStatus.SUCCESS
+    assert result.user.email == verified_user.email
+    attempts = await db_session.scalar(select(User.failed_login_attempts).where(User.id == verified_user.id))
+    assert attempts == 0
+
+# Test keyset pagination walks every user exactly once in both directions
+async def test_list_users_by_cursor(db_session, users_with_same_role_50_users):
+    seen = []
+    page = await UserService.list_users_by_cursor(db_session, limit=15)
+    seen.extend(user.id for user in page.items)
+    assert page.prev_cursor is None
+    while page.next_cursor:
+        page = await UserService.list_users_by_cursor(db_session, limit=15, cursor=decode_cursor(page.next_cursor))
+        seen.extend(user.id for user in page.items)
+    assert len(seen) == 50
+    assert len(set(seen)) == 50
+
+    last_page_ids = [user.id for user in page.items]
+    previous = await UserService.list_users_by_cursor(db_session, limit=15, cursor=decode_cursor(page.prev_cursor))
+    assert [user.id for user in previous.items] == seen[-len(last_page_ids) - 15:-len(last_page_ids)]
+    assert previous.next_cursor is not None
+
+# Test offset pages use the same deterministic order as cursor pages
+async def test_list_users_offset_matches_cursor_order(db_session, users_with_same_role_50_users):
+    offset_page = await UserService.list_users(db_session, skip=0, limit=20)
+    cursor_page = await UserService.list_users_by_cursor(db_session, limit=20)
+    assert [user.id for user in offset_page] == [user.id for user in cursor_page.items]
+
+# Test row pages hold the same users as ORM pages, as rows of just the listed columns
+async def test_list_user_rows_match_orm_pages(db_session, users_with_same_role_50_users):
+    users = await UserService.list_users(db_session, skip=5, limit=10)
+    rows = await UserService.list_user_rows(db_session, skip=5, limit=10)
+    assert [row.id for row in rows] == [user.id for user in users]
+    assert rows[0].email == users[0].email
+    assert "hashed_password" not in rows[0]._fields
+    cursor_page = await UserService.list_user_rows_by_cursor(db_session, limit=10)
+    next_page = await UserService.list_user_rows_by_cursor(db_session, limit=10, cursor=decode_cursor(cursor_page.next_cursor))
+    assert [row.id for row in cursor_page.items + next_page.items] == [user.id for user in await UserService.list_users(db_session, limit=20)]
+
+# Test sparse row pages select only the requested columns and the cursor keys
+async def test_list_user_rows_with_fields(db_session, users_with_same_role_50_users):
+    rows = await UserService.list_user_rows(db_session, limit=5, fields=("nickname", "role"))
+    assert rows[0]._fields == ("id", "created_at", "nickname", "role")
+    page = await UserService.list_user_rows_by_cursor(db_session, limit=5, fields=("id", "nickname"))
+    assert page.items[0]._fields == ("id", "created_at", "nickname")
+    assert page.next_cursor is not None
+
+# Test a user row is read once and then served from the cache
+async def test_get_row(db_session, user):
+    counts = QueryMetrics.start_request()
+    row = await UserService.get_row(db_session, user.id)
+    assert row["email"] == user.email
+    assert row["version"] == user.version
+    assert counts["queries"] == 1
+    counts = QueryMetrics.start_request()
+    assert await UserService.get_row(db_session, user.id) == row
+    assert counts["queries"] == 0
+    assert await UserService.get_row(db_session, uuid4()) is None
+
+# Test a batch read serves cached users and reads the rest in one query
+async def test_get_rows(db_session, user, admin_user, manager_user):
+    users = [user, admin_user, manager_user]
+    await UserService.get_row(db_session, user.id)
+    counts = QueryMetrics.start_request()
+    rows = await UserService.get_rows(db_session, [user.id for user in users] + [uuid4()])
+    assert counts["queries"] == 1
+    assert sorted(rows) == sorted(user.id for user in users)
+    assert rows[admin_user.id]["email"] == admin_user.email
+    counts = QueryMetrics.start_request()
+    assert (await UserService.get_rows(db_session, [user.id for user in users]))[manager_user.id]["nickname"] == manager_user.nickname
+    assert counts["queries"] == 0